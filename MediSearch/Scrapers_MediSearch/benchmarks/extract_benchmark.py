@@ -0,0 +1,214 @@
+# 📁 Archivo: benchmarks/extract_benchmark.py
+#
+# Micro-benchmark de los extract_data (el camino caliente de CPU de cada corrida)
+# sobre el corpus de fixtures/<farmacia>/*.html:
+#   - tiempo por página de make_soup y de extract_data por separado (mejor de N)
+#   - pico de memoria asignada por página (tracemalloc)
+# Compara contra extract_baseline.json y falla (exit 1) si el throughput cae más
+# de --threshold o el pico de memoria crece más de --alloc-threshold. Para que la
+# baseline sirva en otra máquina, el costo por página se expresa en unidades de
+# una calibración de CPU medida junto a cada medición.
+#
+# Uso: python benchmarks/extract_benchmark.py                  (medir y comparar)
+#      python benchmarks/extract_benchmark.py --update-baseline (guardar la baseline)
+
+import argparse
+import hashlib
+import json
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+from html.parser import HTMLParser
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+from scraper_core.html_parser import available_backends, default_backend, make_soup
+from scraper_core.registry import PHARMACIES, load_scraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+BASELINE_FILE = Path(__file__).resolve().parent / "extract_baseline.json"
+DEFAULT_THRESHOLD = 0.25        # 25% menos páginas/s = regresión
+DEFAULT_ALLOC_THRESHOLD = 0.5   # 50% más memoria pico por página = regresión
+CALIBRATION_ROUNDS = 15
+# Cada pasada dura al menos esto: con páginas de ~100 µs, pocas vueltas son puro ruido
+MIN_PASS_S = 0.3
+
+
+def load_corpus(pharmacy):
+    return {path.name: path.read_text(encoding="utf-8")
+            for path in sorted((FIXTURES_DIR / pharmacy).glob("*.html"))}
+
+
+# 🔏 Si el corpus cambia, la baseline deja de ser comparable
+def corpus_hash(corpus):
+    digest = hashlib.sha256()
+    for name, html in sorted(corpus.items()):
+        digest.update(name.encode())
+        digest.update(html.encode())
+    return digest.hexdigest()[:16]
+
+
+# 🧮 Carga fija (HTMLParser de la stdlib sobre un documento sintético, nada del
+# repo) para normalizar por la velocidad de la máquina
+CALIBRATION_DOC = "".join(
+    f'<div class="item" data-id="{i}"><a href="/p-{i}.html">Producto {i}</a>'
+    f'<span class="price">${i * 10}</span></div>' for i in range(2000))
+
+
+def calibrate():
+    best = float("inf")
+    for _ in range(CALIBRATION_ROUNDS):
+        start = time.perf_counter()
+        parser = HTMLParser()
+        parser.feed(CALIBRATION_DOC)
+        parser.close()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ⏱️ Mejor de `repeats` pasadas sobre todo el corpus; cada pasada da las
+# vueltas necesarias para durar MIN_PASS_S (o `iterations` si se indica)
+def time_pages(extract_data, pages, backend, iterations, repeats):
+    soup_runs, extract_runs = [], []
+    start = time.perf_counter()
+    for html in pages:  # Calentamiento (caché de selectores, imports perezosos)
+        extract_data(make_soup(html, backend))
+    if iterations is None:
+        iterations = max(1, math.ceil(MIN_PASS_S / max(time.perf_counter() - start, 1e-6)))
+    for _ in range(repeats):
+        soup_s = extract_s = 0.0
+        for _ in range(iterations):
+            for html in pages:
+                start = time.perf_counter()
+                soup = make_soup(html, backend)
+                parsed = time.perf_counter()
+                extract_data(soup)
+                soup_s += parsed - start
+                extract_s += time.perf_counter() - parsed
+        count = iterations * len(pages)
+        soup_runs.append(soup_s / count)
+        extract_runs.append(extract_s / count)
+    return min(soup_runs), min(extract_runs)
+
+
+# 🧠 Pico de memoria asignada (KiB) por página, promedio del corpus
+def peak_alloc_kib(extract_data, pages, backend):
+    peaks = []
+    tracemalloc.start()
+    try:
+        for html in pages:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            extract_data(make_soup(html, backend))
+            peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks)
+
+
+def measure(pharmacy, backend, iterations, repeats):
+    corpus = load_corpus(pharmacy)
+    extract_data = load_scraper(pharmacy).extract_data
+    pages = list(corpus.values())
+    # Calibración justo antes y después: el ruido de la máquina afecta a ambas por igual
+    calibration = calibrate()
+    soup_s, extract_s = time_pages(extract_data, pages, backend, iterations, repeats)
+    calibration = min(calibration, calibrate())
+    return {
+        "pages": len(pages),
+        "corpus": corpus_hash(corpus),
+        "soup_us": round(soup_s * 1e6, 1),
+        "extract_us": round(extract_s * 1e6, 1),
+        "pages_per_s": round(1 / (soup_s + extract_s), 1),
+        "peak_kib": round(peak_alloc_kib(extract_data, pages, backend), 1),
+        # Costo por página en unidades de calibración: comparable entre máquinas
+        "relative_cost": round((soup_s + extract_s) / calibration, 6),
+    }
+
+
+# 🚨 Diferencias contra la baseline (costo relativo a la calibración)
+def regressions(current, baseline, threshold, alloc_threshold):
+    problems = []
+    for key, now in current.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"   ℹ️ {key}: sin baseline")
+            continue
+        if before["corpus"] != now["corpus"]:
+            print(f"   ⚠️ {key}: el corpus cambió, actualiza la baseline (--update-baseline)")
+            continue
+        ratio = before["relative_cost"] / now["relative_cost"]
+        expected = now["pages_per_s"] / ratio
+        alloc_ratio = now["peak_kib"] / before["peak_kib"] if before["peak_kib"] else 1.0
+        print(f"   {key:<24} {ratio * 100:6.1f}% del throughput esperado | "
+              f"memoria pico {alloc_ratio * 100:6.1f}% de la baseline")
+        if ratio < 1 - threshold:
+            problems.append(f"{key}: {now['pages_per_s']} páginas/s, se esperaban ~{expected:.1f}")
+        if alloc_ratio > 1 + alloc_threshold:
+            problems.append(f"{key}: {now['peak_kib']} KiB pico por página (baseline {before['peak_kib']})")
+    return problems
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de extract_data con control de regresiones")
+    parser.add_argument("--pharmacy", choices=PHARMACIES, action="append")
+    parser.add_argument("--backend", choices=available_backends(), action="append",
+                        help="Backends a medir (por defecto el más rápido instalado)")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help=f"Vueltas por pasada (por defecto las que quepan en {MIN_PASS_S}s)")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--alloc-threshold", type=float, default=DEFAULT_ALLOC_THRESHOLD)
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--update-baseline", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    current = {}
+    for pharmacy in args.pharmacy or PHARMACIES:
+        if not load_corpus(pharmacy):
+            print(f"⚠️ {pharmacy}: sin fixtures en {FIXTURES_DIR / pharmacy}")
+            continue
+        print(f"\n🏥 {pharmacy}")
+        for backend in args.backend or [default_backend()]:
+            result = measure(pharmacy, backend, args.iterations, args.repeats)
+            current[f"{pharmacy}/{backend}"] = result
+            print(f"   {backend:<12} {result['pages_per_s']:>9.1f} páginas/s | soup {result['soup_us']}µs "
+                  f"+ extract {result['extract_us']}µs | pico {result['peak_kib']} KiB "
+                  f"({result['pages']} páginas)")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        stored = {}
+        if baseline_path.exists():
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                stored = json.load(f).get("results", {})
+        stored.update(current)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({"results": stored}, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline guardada en {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\n⚠️ No hay baseline en {baseline_path}; créala con --update-baseline")
+        return
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print("\n📏 Comparación con la baseline")
+    problems = regressions(current, baseline["results"], args.threshold, args.alloc_threshold)
+    if problems:
+        print("\n❌ Regresiones de rendimiento:")
+        for problem in problems:
+            print(f"   {problem}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
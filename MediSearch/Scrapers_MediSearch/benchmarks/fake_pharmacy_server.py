@@ -0,0 +1,525 @@
+# 📁 Archivo: benchmarks/fake_pharmacy_server.py
+#
+# Servidor local que reemplaza a las farmacias para pruebas de carga.
+# Todo se sirve bajo http://127.0.0.1:<puerto>/<host real>/<ruta real>, así
+# una URL de producto se redirige con rebase_url() sin tocar su ruta:
+#   - páginas de producto (HTML de fixtures/<farmacia>/)
+#   - Algolia de Salcobrand:       POST /<app>.algolia.net/1/indexes/*/queries
+#   - product-service de Cruz Verde: search, detail/<id> y stores-stock
+#     (con cookie de sesión que vence: 401 INVALID_SESSION)
+#   - Search-UpdateGrid y Stores-SaveZone de Ahumada
+#   - store_stock de Salcobrand
+# El catálogo sale de extracted_urls/*.json multiplicado por `multiplier`, con
+# precios y stock deterministas por producto. Latencia, errores 5xx y 429 son
+# configurables para ver cómo se comportan reintentos y limitador.
+#
+#   python benchmarks/fake_pharmacy_server.py --port 8800 --latency-ms 80 --error-rate 0.02
+
+import argparse
+import html
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+EXTRACTED_URLS_DIR = BASE_DIR / "url_extractor" / "extracted_urls"
+
+PHARMACY_HOSTS = {
+    "ahumada": "www.farmaciasahumada.cl",
+    "cruzverde": "www.cruzverde.cl",
+    "salcobrand": "salcobrand.cl",
+}
+CRUZVERDE_API_HOST = "api.cruzverde.cl"
+AHUMADA_CONTROLLERS = "/on/demandware.store/Sites-ahumada-cl-Site/default/"
+SESSION_COOKIE = "connect.sid"
+# Las copias de un producto (catálogo x10, x100) desplazan su id en este paso
+ID_STRIDE = 10_000_000
+DEFAULT_SESSION_TTL_S = 1800
+DEFAULT_INCOMPLETE_TILES = 0.05
+
+
+# 🔤 Comparación de categorías sin tildes, comas ni mayúsculas
+def _fold(text):
+    text = unicodedata.normalize("NFKD", unquote(text)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9>]+", "", text.lower())
+
+
+# 🏷️ Claves con las que cada extractor pide el listado de una categoría
+def listing_key(key, categoria):
+    cat, _, sub = categoria.partition("/")
+    if key == "ahumada":
+        sub = re.sub(r"(?<!-)-\d+$", "", sub)
+        if cat == "dolor--fiebre-e-inflamacion" and sub:
+            return _fold(f"medicamentos-dolor,-fiebre-e-inflamacion-{sub}")
+        return _fold(f"medicamentos-{cat}-{sub}" if sub else f"medicamentos-{cat}")
+    if key == "cruzverde":
+        return _fold(f"{sub}-{cat}-medicamentos" if sub else f"{cat}-medicamentos")
+    main = "Dolor, fiebre y antiflamatorios" if cat == "dolor-fiebre-y-antiflamatorios" \
+        else cat.replace("-", " ").title()
+    facet = f"Medicamentos > {main}"
+    if sub:
+        facet += " > " + sub.replace("-", " ").title()
+    return _fold(facet)
+
+
+def _name_from_url(url, product_id):
+    slug = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    slug = re.sub(r"-?\d*\.html$", "", slug)
+    words = slug.replace("-", " ").strip()
+    return words.title() if words and not words.isdigit() else f"Producto {product_id}"
+
+
+class FakeCatalog:
+    """Productos por farmacia y categoría: los de extracted_urls, copiados `multiplier` veces."""
+
+    def __init__(self, multiplier=1, base_size=None, urls_dir=EXTRACTED_URLS_DIR):
+        self.multiplier = multiplier
+        self.categories = {}   # farmacia → {categoria: [producto]}
+        self.by_id = {}        # (farmacia, id) → producto
+        self.listings = {}     # (farmacia, clave de listado) → categoria
+        for key in PHARMACY_HOSTS:
+            path = Path(urls_dir) / f"{key}_urls.json"
+            if path.exists():
+                with open(path, "r", encoding="utf-8") as f:
+                    self._load(key, json.load(f), base_size)
+
+    def _load(self, key, all_data, base_size):
+        seen = {}
+        categories = self.categories.setdefault(key, {})
+        for categoria, entries in all_data.items():
+            self.listings[(key, listing_key(key, categoria))] = categoria
+            products = categories.setdefault(categoria, [])
+            for entry in entries:
+                url = entry["url"] if isinstance(entry, dict) else entry
+                if url not in seen:
+                    if base_size is not None and len(seen) >= base_size:
+                        continue
+                    seen[url] = [self._product(key, entry, copy) for copy in range(self.multiplier)]
+                products.extend(seen[url])
+
+    def _product(self, key, entry, copy):
+        url = entry["url"] if isinstance(entry, dict) else entry
+        if isinstance(entry, dict) and "sku" in entry:
+            base_id = int(entry["sku"])
+        else:
+            match = re.search(r"(\d+)\.html$", url)
+            base_id = int(match.group(1)) if match else zlib.crc32(url.encode()) % ID_STRIDE
+        product_id = base_id + copy * ID_STRIDE
+        if copy:
+            url = f"{url}-{copy}" if key == "salcobrand" else \
+                re.sub(r"\d+\.html$", f"{product_id}.html", url)
+        digest = zlib.crc32(f"{key}:{product_id}".encode())
+        normal = 990 + (digest % 300) * 100
+        discount = (0, 0, 10, 20, 30)[(digest >> 8) % 5]
+        product = {
+            "id": product_id,
+            "url": url,
+            "name": _name_from_url(url, product_id),
+            "normal_price": normal,
+            "offer_price": normal - normal * discount // 1000 * 10,
+            "in_stock": digest % 11 != 0,
+            "bioequivalent": digest % 3 == 0,
+            "image": f"https://{PHARMACY_HOSTS[key]}/images/{product_id}.jpg",
+        }
+        if key == "salcobrand":
+            product["sku"] = str(product_id)
+            product["objectID"] = str(int(entry["objectID"]) + copy * ID_STRIDE)
+        self.by_id[(key, str(product_id))] = product
+        return product
+
+    def listing(self, key, listing):
+        categoria = self.listings.get((key, _fold(listing)))
+        return self.categories[key][categoria] if categoria else []
+
+    # 🗂️ Mismo formato que extracted_urls; con fields=True, como un extractor
+    # que guarda los datos del listado (fast scraper --fetch-mode listing), sin
+    # precio en la misma fracción `incomplete` de tiles que sirve el grid
+    def all_data(self, key, rebase=None, fields=False, incomplete=0.0):
+        rebase = rebase or (lambda url: url)
+        result = {}
+        for categoria, products in self.categories.get(key, {}).items():
+            entries = []
+            for p in products:
+                entry = {"url": rebase(p["url"])}
+                if key == "salcobrand":
+                    entry.update(objectID=p["objectID"], sku=p["sku"])
+                if fields:
+                    entry["fields"] = listing_fields(p, incomplete_tile(p, incomplete))
+                entries.append(entry if len(entry) > 1 else entry["url"])
+            result[categoria] = entries
+        return result
+
+    def size(self, key):
+        return len({p["url"] for products in self.categories.get(key, {}).values() for p in products})
+
+
+def incomplete_tile(product, rate):
+    return zlib.crc32(str(product["id"]).encode()) % 1000 < rate * 1000
+
+
+def listing_fields(product, incomplete=False):
+    offer = None if incomplete else product["offer_price"]
+    return {
+        "name": product["name"],
+        "image": product["image"],
+        "normal_price": product["normal_price"] if offer and product["normal_price"] > offer else None,
+        "offer_price": offer,
+        "stock": "available" if product["in_stock"] else "out_of_stock",
+        "bioequivalent": product["bioequivalent"],
+    }
+
+
+def _stock_units(*parts):
+    return zlib.crc32(":".join(map(str, parts)).encode()) % 25
+
+
+def _tile(product, incomplete):
+    href = html.escape(urlparse(product["url"]).path)
+    name = html.escape(product["name"])
+    price = ""
+    if not incomplete:
+        if product["offer_price"] < product["normal_price"]:
+            price += (f'<span class="strike-through list"><span class="value" content="{product["normal_price"]}">'
+                      f'${product["normal_price"]:,}</span></span>'.replace(",", "."))
+        price += (f'<span class="sales"><span class="value" content="{product["offer_price"]}">'
+                  f'${product["offer_price"]:,}</span></span>'.replace(",", "."))
+    badges = "" if product["in_stock"] else '<span class="badge-agotado">Agotado</span>'
+    if product["bioequivalent"]:
+        badges += '<span class="badge-bioequivalente">Bioequivalente</span>'
+    return (
+        f'<div class="product" data-pid="{product["id"]}"><div class="product-tile">'
+        f'<div class="image-container"><a href="{href}"><img class="tile-image" '
+        f'src="{html.escape(product["image"])}" alt="{name}"></a>{badges}</div>'
+        f'<div class="tile-body"><div class="pdp-link"><a class="link" href="{href}">{name}</a></div>'
+        f'<div class="price">{price}</div></div></div></div>'
+    )
+
+
+class FakePharmacyServer:
+    """Servidor HTTP en un hilo que imita las páginas y APIs de las tres farmacias."""
+
+    def __init__(self, catalog, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0,
+                 error_rate=0.0, throttle_rate=0.0, session_ttl=DEFAULT_SESSION_TTL_S,
+                 incomplete_tiles=DEFAULT_INCOMPLETE_TILES, etags=True, pages_dir=FIXTURES_DIR, seed=0):
+        self.catalog = catalog
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.session_ttl = session_ttl
+        self.incomplete_tiles = incomplete_tiles
+        self.etags = etags
+        self.pages = {key: [p.read_bytes() for p in sorted((Path(pages_dir) / key).glob("*.html"))]
+                      for key in PHARMACY_HOSTS}
+        self.sessions = {}
+        self.counts = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como los sitios reales
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server.handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                server.handle(self, self.rfile.read(length))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # 🔀 https://salcobrand.cl/products/x → http://127.0.0.1:<puerto>/salcobrand.cl/products/x
+    def rebase_url(self, url):
+        parsed = urlparse(url)
+        return f"{self.address}/{parsed.netloc}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-pharmacy",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # 🎲 Latencia y fallas inyectadas (antes de resolver la ruta)
+    def _fault(self):
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.error_rate:
+            return 503
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        return None
+
+    def handle(self, request, body):
+        parsed = urlparse(request.path)
+        host, _, path = parsed.path.lstrip("/").partition("/")
+        fault = self._fault()
+        if fault is not None:
+            route, status, payload, content_type = "fault", fault, b"", "text/plain"
+            headers = {"Retry-After": "1"} if fault == 429 else {}
+        else:
+            try:
+                route, status, payload, content_type, headers = self._route(
+                    host, "/" + path, parse_qs(parsed.query), body, request)
+            except Exception as e:
+                route, status, payload, content_type, headers = "error", 500, str(e).encode(), "text/plain", {}
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(payload)
+        with self._lock:
+            self.counts[(route, status)] += 1
+
+    def _json(self, route, data, status=200, headers=None):
+        return route, status, json.dumps(data, ensure_ascii=False).encode("utf-8"), \
+            "application/json", headers or {}
+
+    def _route(self, host, path, query, body, request):
+        if host.endswith(".algolia.net") and path.endswith("/queries"):
+            return self._json("algolia", self.algolia(json.loads(body or b"{}")))
+        if host == CRUZVERDE_API_HOST:
+            if not self._valid_session(request.headers.get("Cookie", "")):
+                return self._json("cruzverde_api", {"code": "INVALID_SESSION"}, 401)
+            if path.endswith("/products/search"):
+                return self._json("cruzverde_search", self.cruzverde_search(query))
+            if "/products/detail/" in path:
+                return self.cruzverde_detail(path.rsplit("/", 1)[-1])
+            if path.endswith("/products/stores-stock"):
+                return self._json("cruzverde_stock", self.cruzverde_stock(query))
+        if host == PHARMACY_HOSTS["ahumada"] and path.startswith(AHUMADA_CONTROLLERS):
+            controller = path[len(AHUMADA_CONTROLLERS):]
+            if controller == "Search-UpdateGrid":
+                return "ahumada_grid", 200, self.ahumada_grid(query), "text/html; charset=utf-8", {}
+            if controller == "Stores-SaveZone":
+                return self._json("ahumada_zone", {"success": True})
+        if host == PHARMACY_HOSTS["salcobrand"] and path.startswith("/api/v2/products/store_stock"):
+            return self._json("salcobrand_stock", self.salcobrand_stock(query))
+        for key, pharmacy_host in PHARMACY_HOSTS.items():
+            if host == pharmacy_host:
+                return self.product_page(key, path, request.headers.get("If-None-Match"))
+        return "unknown", 404, b"", "text/plain", {}
+
+    # 🍪 Cruz Verde: cualquier página entrega una sesión que vence tras session_ttl
+    def _new_session(self):
+        token = secrets.token_hex(8)
+        with self._lock:
+            self.sessions[token] = time.monotonic()
+        return {"Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/"}
+
+    def _valid_session(self, cookie_header):
+        if self.session_ttl is None:
+            return True
+        match = re.search(rf"{SESSION_COOKIE}=([0-9a-f]+)", cookie_header)
+        issued = self.sessions.get(match.group(1)) if match else None
+        return issued is not None and time.monotonic() - issued < self.session_ttl
+
+    # 📄 Página de producto con ETag (si etags) y 304 ante If-None-Match igual
+    def product_page(self, key, path, if_none_match=None):
+        pages = self.pages.get(key)
+        if not pages:
+            return "page", 404, b"", "text/plain", {}
+        page = pages[zlib.crc32(path.encode()) % len(pages)]
+        headers = self._new_session() if key == "cruzverde" else {}
+        if self.etags:
+            headers["ETag"] = f'"{zlib.crc32(page):08x}"'
+            if if_none_match == headers["ETag"]:
+                return "page", 304, b"", "text/html; charset=utf-8", headers
+        return "page", 200, page, "text/html; charset=utf-8", headers
+
+    # 🔎 Algolia: {"requests": [{"indexName", "params"}]} → {"results": [...]}
+    def algolia(self, payload):
+        results = []
+        for request in payload.get("requests", []):
+            params = parse_qs(request.get("params", ""))
+            per_page = int(params.get("hitsPerPage", ["20"])[0])
+            page = int(params.get("page", ["0"])[0])
+            products = []
+            for facet in re.findall(r'product_categories\.lvl\d+:([^"\]]+)', params.get("facetFilters", [""])[0]):
+                products = self.catalog.listing("salcobrand", facet)
+            chunk = products[page * per_page:(page + 1) * per_page]
+            results.append({
+                "index": request.get("indexName"),
+                "hits": [self._algolia_hit(p) for p in chunk],
+                "nbHits": len(products),
+                "page": page,
+                "nbPages": -(-len(products) // per_page) if per_page else 0,
+                "hitsPerPage": per_page,
+            })
+        return {"results": results}
+
+    # Los nombres de atributos de precio/stock del índice real no están
+    # verificados (ver salcobrand_extractor.py): además de los candidatos que
+    # prueba el extractor, una parte de los hits trae precios como texto
+    # ("$4.990"), stock como texto o un precio con formato desconocido, para
+    # que el benchmark ejercite también la vuelta a bajar la página
+    @staticmethod
+    def _algolia_hit(product):
+        slug = urlparse(product["url"]).path.rsplit("/", 1)[-1]
+        hit = {
+            "objectID": product["objectID"],
+            "sku": product["sku"],
+            "slug": slug,
+            "url": slug,
+            "name": product["name"],
+            "image_url": product["image"],
+            "normal_price": product["normal_price"],
+            "offer_price": product["offer_price"],
+            "in_stock": product["in_stock"],
+            "bioequivalent": product["bioequivalent"],
+        }
+        shape = zlib.crc32(product["url"].encode()) % 20
+        if shape < 5:
+            hit["normal_price"] = f"${product['normal_price']:,}".replace(",", ".")
+            hit["offer_price"] = f"${product['offer_price']:,}".replace(",", ".")
+            hit["in_stock"] = "true" if product["in_stock"] else "false"
+        elif shape == 5:
+            hit["offer_price"] = {"amount": product["offer_price"], "currency": "CLP"}
+        return hit
+
+    @staticmethod
+    def _cruzverde_prices(product):
+        prices = {"price-list-cl": product["normal_price"]}
+        if product["offer_price"] < product["normal_price"]:
+            prices["price-sale-cl"] = product["offer_price"]
+        return prices
+
+    def cruzverde_search(self, query):
+        limit = int(query.get("limit", ["80"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        cgid = next((r[len("cgid="):] for r in query.get("refine[]", []) if r.startswith("cgid=")), "")
+        products = self.catalog.listing("cruzverde", cgid)
+        return {
+            "total": len(products),
+            "hits": [{
+                "productId": str(p["id"]),
+                "productName": p["name"],
+                "prices": self._cruzverde_prices(p),
+                "stock": 10 if p["in_stock"] else 0,
+                "image": {"link": p["image"]},
+            } for p in products[offset:offset + limit]],
+        }
+
+    def cruzverde_detail(self, product_id):
+        product = self.catalog.by_id.get(("cruzverde", product_id))
+        if product is None:
+            return self._json("cruzverde_detail", {"code": "PRODUCT_NOT_FOUND"}, 404)
+        return self._json("cruzverde_detail", {"productData": {
+            "id": product_id,
+            "name": product["name"],
+            "prices": self._cruzverde_prices(product),
+            "stock": 10 if product["in_stock"] else 0,
+            "isBioequivalent": product["bioequivalent"],
+            "metaTags": {"ogImage": product["image"]},
+        }})
+
+    def cruzverde_stock(self, query):
+        comuna = query.get("id", [""])[0]
+        product_id = query.get("productId", [""])[0]
+        return {"stores": [{"address": f"Local {i + 1} {comuna}",
+                            "stock": _stock_units(product_id, comuna, i)} for i in range(3)]}
+
+    # 🧱 Ahumada: tiles HTML paginados con start/sz y botón "ver más"
+    def ahumada_grid(self, query):
+        cgid = query.get("cgid", [""])[0]
+        start = int(query.get("start", ["0"])[0])
+        size = int(query.get("sz", ["12"])[0])
+        products = self.catalog.listing("ahumada", cgid)
+        tiles = [_tile(p, incomplete_tile(p, self.incomplete_tiles))
+                 for p in products[start:start + size]]
+        more = ""
+        if start + size < len(products):
+            more = (f'<div class="show-more"><button data-url="{AHUMADA_CONTROLLERS}Search-UpdateGrid'
+                    f'?cgid={html.escape(cgid)}&amp;start={start + size}&amp;sz={size}">Ver más</button></div>')
+        return f'<div class="row product-grid" data-total="{len(products)}">{"".join(tiles)}{more}</div>'.encode()
+
+    def salcobrand_stock(self, query):
+        sku = query.get("sku", [""])[0]
+        state_id = query.get("state_id", [""])[0]
+        product = self.catalog.by_id.get(("salcobrand", sku))
+        if product is None or not product["in_stock"]:
+            return {}
+        return [{"name": f"Salcobrand {state_id}-{i + 1}", "stocks": {sku: _stock_units(sku, state_id, i)}}
+                for i in range(3)]
+
+    def stats(self):
+        with self._lock:
+            return {f"{route} {status}": n for (route, status), n in sorted(self.counts.items())}
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"🧪 Servidor falso: {sum(stats.values())} respuestas")
+        for name, n in stats.items():
+            print(f"   {name:<24} {n}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Farmacias falsas para pruebas de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--multiplier", type=int, default=1, help="Copias de cada producto del catálogo")
+    parser.add_argument("--base-size", type=int, default=None,
+                        help="Máximo de URLs únicas por farmacia antes de multiplicar")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fracción de respuestas 429")
+    parser.add_argument("--session-ttl", type=float, default=DEFAULT_SESSION_TTL_S,
+                        help="Segundos de validez de la cookie de Cruz Verde")
+    parser.add_argument("--incomplete-tiles", type=float, default=DEFAULT_INCOMPLETE_TILES,
+                        help="Fracción de tiles de Ahumada sin precio")
+    parser.add_argument("--no-etags", action="store_true",
+                        help="Páginas de producto sin ETag (el caché solo puede comparar huellas)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    catalog = FakeCatalog(args.multiplier, args.base_size)
+    server = FakePharmacyServer(catalog, args.host, args.port, args.latency_ms, args.jitter_ms,
+                                args.error_rate, args.throttle_rate, args.session_ttl,
+                                args.incomplete_tiles, not args.no_etags).start()
+    sizes = ", ".join(f"{key}={catalog.size(key)}" for key in PHARMACY_HOSTS)
+    print(f"🧪 Farmacias falsas en {server.address} ({sizes})")
+    print(f"   Ej.: {server.address}/{PHARMACY_HOSTS['salcobrand']}/products/<slug>")
+    try:
+        while True:
+            time.sleep(60)
+            server.print_stats()
+    except KeyboardInterrupt:
+        server.stop()
+        server.print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# 📁 Archivo: benchmarks/parser_benchmark.py
+#
+# Compara los backends de parseo sobre los HTML guardados en fixtures/:
+#   - páginas/segundo de make_soup + extract_data por farmacia y backend
+#   - paridad: cada backend debe entregar exactamente lo mismo que html.parser
+#
+# Uso: python benchmarks/parser_benchmark.py [--iterations 50] [--pharmacy ahumada]
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+from scraper_core.html_parser import available_backends, make_soup
+from scraper_core.registry import PHARMACIES, load_scraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+REFERENCE_BACKEND = "html.parser"
+
+
+def load_fixtures(pharmacy):
+    return {path.name: path.read_text(encoding="utf-8")
+            for path in sorted((FIXTURES_DIR / pharmacy).glob("*.html"))}
+
+
+# ⏱️ Páginas por segundo de un backend sobre todos los fixtures
+def pages_per_second(extract_data, pages, backend, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            extract_data(make_soup(html, backend))
+    elapsed = time.perf_counter() - start
+    return len(pages) * iterations / elapsed if elapsed else 0.0
+
+
+# 🔍 Diferencias contra el backend de referencia
+def parity_errors(extract_data, fixtures, backend):
+    errors = []
+    for name, html in fixtures.items():
+        expected = extract_data(make_soup(html, REFERENCE_BACKEND))
+        got = extract_data(make_soup(html, backend))
+        if got != expected:
+            errors.append(f"{name}: {got} != {expected}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de parseo")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--pharmacy", choices=PHARMACIES, action="append")
+    args = parser.parse_args()
+
+    ok = True
+    for pharmacy in args.pharmacy or PHARMACIES:
+        fixtures = load_fixtures(pharmacy)
+        if not fixtures:
+            print(f"⚠️ {pharmacy}: sin fixtures en {FIXTURES_DIR / pharmacy}")
+            continue
+        extract_data = load_scraper(pharmacy).extract_data
+        print(f"\n🏥 {pharmacy} ({len(fixtures)} páginas)")
+        for backend in available_backends():
+            errors = parity_errors(extract_data, fixtures, backend)
+            rate = pages_per_second(extract_data, list(fixtures.values()), backend, args.iterations)
+            status = "✅ paridad" if not errors else f"❌ {len(errors)} diferencias"
+            print(f"   {backend:<12} {rate:>9.1f} páginas/s  {status}")
+            for err in errors:
+                print(f"      {err}")
+            ok = ok and not errors
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
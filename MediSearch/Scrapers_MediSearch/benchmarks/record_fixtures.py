@@ -0,0 +1,140 @@
+# 📁 Archivo: benchmarks/record_fixtures.py
+#
+# Graba páginas de producto reales en fixtures/<farmacia>/ para el corpus de
+# extract_benchmark.py y parser_benchmark.py. Toma una muestra repartida entre
+# categorías de extracted_urls/<farmacia>_urls.json, la descarga por HTTP (o con
+# Chromium si el HTML servido no trae los selectores requeridos) y anota cada
+# archivo en fixtures/<farmacia>/manifest.json con su URL, fecha y sha256.
+# Tras grabar hay que regenerar la baseline: extract_benchmark.py --update-baseline
+#
+# Uso: python benchmarks/record_fixtures.py --pharmacy salcobrand --count 20 [--browser]
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+from scraper_core.async_engine import normalize_entry
+from scraper_core.html_parser import make_soup
+from scraper_core.http_fetch import USER_AGENT, has_required
+from scraper_core.rate_limiter import get_rate_limiter
+from scraper_core.registry import PHARMACIES, load_scraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+EXTRACTED_URLS_DIR = BASE_DIR / "url_extractor" / "extracted_urls"
+
+
+# 🎯 `count` URLs repartidas entre categorías (una por categoría por vuelta)
+def sample_urls(pharmacy, count, seed):
+    with open(EXTRACTED_URLS_DIR / f"{pharmacy}_urls.json", "r", encoding="utf-8") as f:
+        all_data = json.load(f)
+    rng = random.Random(seed)
+    pools = []
+    for entries in all_data.values():
+        urls = [normalize_entry(e)[0] for e in entries]
+        rng.shuffle(urls)
+        pools.append(urls)
+    picked = []
+    while len(picked) < count and any(pools):
+        for pool in pools:
+            if pool and len(picked) < count:
+                url = pool.pop()
+                if url not in picked:
+                    picked.append(url)
+    return picked
+
+
+def fixture_name(url):
+    slug = url.rstrip("/").rsplit("/", 1)[-1].removesuffix(".html")
+    return "recorded_" + re.sub(r"[^a-zA-Z0-9-]+", "-", slug)[:80] + ".html"
+
+
+def fetch_http(client, limiter, url):
+    limiter.acquire(url)
+    start = time.monotonic()
+    resp = client.get(url)
+    limiter.feedback_response(url, resp, time.monotonic() - start)
+    resp.raise_for_status()
+    return resp.text
+
+
+def fetch_browser(url, spec):
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            page = browser.new_page()
+            page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            for selector in spec.get("ready_selectors", []):
+                page.wait_for_selector(selector, state="attached",
+                                       timeout=spec.get("ready_timeout_ms", 8000))
+            return page.content()
+        finally:
+            browser.close()
+
+
+def record(pharmacy, count, seed, use_browser):
+    spec = load_scraper(pharmacy).SPEC
+    out_dir = FIXTURES_DIR / pharmacy
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / "manifest.json"
+    manifest = {}
+    if manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    limiter = get_rate_limiter()
+    saved = 0
+    with httpx.Client(headers={"User-Agent": USER_AGENT, "Accept-Language": "es-CL,es;q=0.9"},
+                      timeout=30, follow_redirects=True) as client:
+        for url in sample_urls(pharmacy, count, seed):
+            try:
+                html, via = fetch_http(client, limiter, url), "http"
+                if not has_required(make_soup(html, "html.parser"), spec["required_selectors"]):
+                    if not use_browser:
+                        print(f"⚠️ {url}: el HTML no trae los selectores requeridos (usa --browser)")
+                        continue
+                    html, via = fetch_browser(url, spec), "browser"
+            except Exception as e:
+                print(f"❌ {url}: {e}")
+                continue
+            name = fixture_name(url)
+            (out_dir / name).write_text(html, encoding="utf-8")
+            manifest[name] = {
+                "url": url,
+                "via": via,
+                "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                "sha256": hashlib.sha256(html.encode("utf-8")).hexdigest(),
+            }
+            saved += 1
+            print(f"💾 {name} ({len(html) / 1024:.0f} KB, {via})")
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"✅ {pharmacy}: {saved} páginas grabadas en {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graba páginas de producto reales como fixtures")
+    parser.add_argument("--pharmacy", choices=PHARMACIES, action="append")
+    parser.add_argument("--count", type=int, default=20, help="Páginas por farmacia")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--browser", action="store_true",
+                        help="Renderizar con Chromium las páginas que lo necesiten")
+    args = parser.parse_args()
+    for pharmacy in args.pharmacy or PHARMACIES:
+        record(pharmacy, args.count, args.seed, args.browser)
+    get_rate_limiter().print_stats()
+
+
+if __name__ == "__main__":
+    main()
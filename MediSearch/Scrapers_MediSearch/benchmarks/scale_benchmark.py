@@ -0,0 +1,210 @@
+# 📁 Archivo: benchmarks/scale_benchmark.py
+#
+# Corre el motor async real de cada farmacia contra fake_pharmacy_server.py
+# con el catálogo multiplicado (1x, 10x, 100x) y reporta:
+#   - productos/segundo
+#   - latencia de descarga p50/p95/p99 (fases http, goto y api del motor)
+#   - pico de memoria (este proceso + parsers y navegadores)
+#   - con --fetch-cache, una segunda pasada con el caché caliente y su tasa de salto
+# Por defecto se levanta el limitador de tasa para medir la capacidad del
+# motor y no la cortesía con los sitios; --rate-limited usa los límites reales.
+#
+# Uso: python benchmarks/scale_benchmark.py [--multipliers 1 10 100] [--base-size 200]
+#                                           [--pharmacy salcobrand] [--latency-ms 50]
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+from fake_pharmacy_server import DEFAULT_SESSION_TTL_S, FakeCatalog, FakePharmacyServer
+from scraper_core.async_engine import AsyncScrapeEngine, DEFAULT_CONCURRENCY, FETCH_MODES, plan_tasks
+from scraper_core.browser_pool import process_tree_rss_mb
+from scraper_core.fetch_cache import fetch_cache_path
+from scraper_core.rate_limiter import get_rate_limiter
+from scraper_core.extract_runner import ExtractClient
+from scraper_core.registry import PHARMACIES, load_extractor, load_scraper
+from scraper_core.timings import percentile
+
+try:
+    import psutil
+except ImportError:  # Sin psutil se usa el máximo histórico del proceso (getrusage)
+    psutil = None
+
+REPORTS_DIR = BASE_DIR.parent / "logs"
+UNTHROTTLED_RATE = 100_000.0
+MEMORY_SAMPLE_S = 0.25
+
+
+# 🧠 Pico de RSS mientras corre el bloque
+class PeakMemory:
+    def __init__(self):
+        self.peak_mb = 0.0
+        self._halt = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="peak-memory", daemon=True)
+
+    def _sample(self):
+        if psutil is None:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return psutil.Process().memory_info().rss / (1024 * 1024) + (process_tree_rss_mb() or 0.0)
+
+    def _run(self):
+        while True:
+            self.peak_mb = max(self.peak_mb, self._sample())
+            if self._halt.wait(MEMORY_SAMPLE_S):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._halt.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._sample())
+
+
+# 🔎 Listado de Salcobrand armado por el extractor real (hit_entry/hit_fields)
+# contra el Algolia falso, para que --fetch-mode listing pase por el mismo
+# parseo defensivo de los hits que en producción
+def salcobrand_listing(catalog, server):
+    extractor = load_extractor("salcobrand")
+    routes = [(categoria, *categoria.partition("/")[::2]) for categoria in catalog.categories["salcobrand"]]
+    routes = [(key, main, sub or None) for key, main, sub in routes]
+
+    async def harvest():
+        async with ExtractClient() as client:
+            return await extractor.fetch_all(client, routes, True, extractor.QUERIES_PER_REQUEST,
+                                             algolia_url=server.rebase_url(extractor.ALGOLIA_URL))
+
+    all_data, _ = asyncio.run(harvest())
+    for entries in all_data.values():
+        for entry in entries:
+            entry["url"] = server.rebase_url(entry["url"])
+    return all_data
+
+
+def run_case(pharmacy, catalog, server, scratch_dir, options, warm=False):
+    scraper = load_scraper(pharmacy)
+    spec = dict(scraper.SPEC, output_file=Path(scratch_dir) / f"{pharmacy}_{catalog.multiplier}x.jsonl",
+                first_party_domains=scraper.SPEC.get("first_party_domains", []) + ["127.0.0.1"])
+    for key in ("api_detail_url", "api_session_url"):
+        if key in spec:
+            spec[key] = server.rebase_url(spec[key])
+    listing = options.get("fetch_mode") == "listing"
+    if options.get("fetch_cache") and not warm:
+        fetch_cache_path(spec).unlink(missing_ok=True)
+    if listing and pharmacy == "salcobrand":
+        all_data = salcobrand_listing(catalog, server)
+    else:
+        all_data = catalog.all_data(pharmacy, server.rebase_url, fields=listing,
+                                    incomplete=server.incomplete_tiles)
+    tasks, _ = plan_tasks(all_data)
+    engine = AsyncScrapeEngine(spec, **options)
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        asyncio.run(engine.run(tasks))
+        elapsed = time.perf_counter() - start
+    latencies = [t for phase in ("http", "goto", "api") for t in engine.timings.values(phase)]
+    return {
+        "pharmacy": pharmacy,
+        "multiplier": catalog.multiplier,
+        "urls": len(tasks),
+        "ok": engine.ok,
+        "failed": engine.failed,
+        "elapsed_s": round(elapsed, 2),
+        "products_per_s": round(engine.ok / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_memory_mb": round(memory.peak_mb, 1),
+        "http_hit_ratio": round(engine.http_stats.ratio(), 3),
+        "api_hit_ratio": round(engine.api_stats.ratio(), 3),
+        "cache": "warm" if warm else ("cold" if options.get("fetch_cache") else None),
+        "skip_ratio": round(engine.skip_stats.ratio(), 3),
+    }
+
+
+def print_report(results):
+    print("\n📊 Benchmark de escala")
+    print(f"   {'farmacia':<11} {'x':>4} {'URLs':>8} {'ok':>8} {'prod/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'pico MB':>8} {'caché':>6} {'salto':>6}")
+    for r in results:
+        print(f"   {r['pharmacy']:<11} {r['multiplier']:>4} {r['urls']:>8} {r['ok']:>8} "
+              f"{r['products_per_s']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+              f"{r['peak_memory_mb']:>8} {r['cache'] or '-':>6} {r['skip_ratio']:>6}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de scrapers contra farmacias falsas")
+    parser.add_argument("--pharmacy", choices=PHARMACIES, action="append")
+    parser.add_argument("--multipliers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--base-size", type=int, default=None,
+                        help="URLs únicas por farmacia a 1x (por defecto todo extracted_urls)")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=DEFAULT_SESSION_TTL_S,
+                        help="Segundos de validez de la cookie de Cruz Verde")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--parse-workers", type=int, default=None)
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="http-first")
+    parser.add_argument("--fetch-cache", action="store_true",
+                        help="Cada caso dos veces: caché frío y caché caliente (GET condicional + huella)")
+    parser.add_argument("--no-etags", action="store_true",
+                        help="El servidor falso no manda ETag: el caché caliente solo compara huellas")
+    parser.add_argument("--rate-limited", action="store_true",
+                        help="Respetar el limitador de tasa por host de producción")
+    parser.add_argument("--report", default=None, help="JSON de salida (por defecto logs/benchmark_scale_<fecha>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.rate_limited:
+        limiter = get_rate_limiter()
+        limiter.initial_rate = limiter.max_rate = UNTHROTTLED_RATE
+    options = dict(concurrency=args.concurrency, per_host=args.concurrency,
+                   fetch_mode=args.fetch_mode, parse_workers=args.parse_workers,
+                   fetch_cache=args.fetch_cache)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="medisearch-bench-") as scratch_dir:
+        for multiplier in args.multipliers:
+            catalog = FakeCatalog(multiplier, args.base_size)
+            server = FakePharmacyServer(catalog, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                        error_rate=args.error_rate,
+                                        throttle_rate=args.throttle_rate,
+                                        session_ttl=args.session_ttl,
+                                        etags=not args.no_etags).start()
+            try:
+                for pharmacy in args.pharmacy or PHARMACIES:
+                    print(f"\n🏁 {pharmacy} x{multiplier}: {catalog.size(pharmacy)} URLs en {server.address}")
+                    results.append(run_case(pharmacy, catalog, server, scratch_dir, options))
+                    if args.fetch_cache:
+                        print(f"\n🔥 {pharmacy} x{multiplier}: caché caliente")
+                        results.append(run_case(pharmacy, catalog, server, scratch_dir, options, warm=True))
+            finally:
+                server.stop()
+            server.print_stats()
+
+    print_report(results)
+    report = Path(args.report) if args.report else \
+        REPORTS_DIR / f"benchmark_scale_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    with open(report, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "results": results}, f, indent=2, ensure_ascii=False)
+    print(f"📝 Reporte: {report}")
+
+
+if __name__ == "__main__":
+    main()
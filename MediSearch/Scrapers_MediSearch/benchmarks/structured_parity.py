@@ -0,0 +1,155 @@
+# 📁 Archivo: benchmarks/structured_parity.py
+#
+# Paridad del camino rápido de datos estructurados (SPEC["extract_structured"]:
+# JSON-LD / estado embebido) contra make_soup + extract_data, sobre todas las
+# páginas de fixtures/<farmacia>/ (incluidas las subcarpetas, p. ej. structured/):
+#   - cobertura: páginas donde los datos estructurados traen todo lo requerido
+#     (en el resto parse_stage vuelve a los selectores)
+#   - paridad por campo en las páginas cubiertas y lista de diferencias
+#   - tiempo por página de cada camino (mejor de N)
+# El reporte queda en logs/structured_parity_<fecha>.json; con --min-parity sale
+# con exit 1 si algún campo queda por debajo.
+#
+# Uso: python benchmarks/structured_parity.py
+#      python benchmarks/structured_parity.py --pharmacy cruzverde --min-parity 1.0
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+from scraper_core.html_parser import available_backends, default_backend, make_soup
+from scraper_core.product_api import FIELDS, merge_fields, missing_fields
+from scraper_core.registry import PHARMACIES, load_scraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+REPORTS_DIR = BASE_DIR.parent / "logs"
+# discount se deriva de los precios: compararlo no agrega información
+COMPARED_FIELDS = tuple(field for field in FIELDS if field != "discount")
+
+
+def load_corpus(pharmacy):
+    root = FIXTURES_DIR / pharmacy
+    return {path.relative_to(root).as_posix(): path.read_text(encoding="utf-8")
+            for path in sorted(root.rglob("*.html"))}
+
+
+# ⏱️ Mejor de `repeats` pasadas de `fn` sobre todas las páginas, en µs por página
+def time_per_page(fn, pages, iterations, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for html in pages:
+                fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best / (iterations * len(pages)) * 1e6
+
+
+def compare(pharmacy, backend, iterations, repeats):
+    scraper = load_scraper(pharmacy)
+    extract_structured = scraper.SPEC.get("extract_structured")
+    if extract_structured is None:
+        print(f"   ℹ️ {pharmacy}: sin extract_structured en el SPEC")
+        return None
+    corpus = load_corpus(pharmacy)
+    matches = Counter()
+    covered, mismatches, fallbacks = [], [], []
+    for name, html in corpus.items():
+        fields = extract_structured(html)
+        if fields is None or missing_fields(fields):
+            fallbacks.append({"page": name, "missing": missing_fields(fields)})
+            continue
+        covered.append(html)
+        structured = dict(zip(FIELDS, merge_fields(fields)))
+        selectors = dict(zip(FIELDS, scraper.extract_data(make_soup(html, backend))))
+        for field in COMPARED_FIELDS:
+            if structured[field] == selectors[field]:
+                matches[field] += 1
+            else:
+                mismatches.append({"page": name, "field": field,
+                                   "structured": structured[field], "selectors": selectors[field]})
+
+    result = {
+        "pages": len(corpus),
+        "covered": len(covered),
+        "coverage": round(len(covered) / len(corpus), 3) if corpus else 0.0,
+        "parity": {field: round(matches[field] / len(covered), 3) if covered else None
+                   for field in COMPARED_FIELDS},
+        "mismatches": mismatches,
+        "fallbacks": fallbacks,
+    }
+    if covered:
+        result["structured_us"] = round(time_per_page(extract_structured, covered, iterations, repeats), 1)
+        result["selectors_us"] = round(time_per_page(
+            lambda html: scraper.extract_data(make_soup(html, backend)), covered, iterations, repeats), 1)
+        result["speedup"] = round(result["selectors_us"] / max(result["structured_us"], 1e-3), 1)
+    return result
+
+
+def print_result(pharmacy, result):
+    print(f"\n🏥 {pharmacy}: {result['covered']}/{result['pages']} páginas con datos estructurados "
+          f"completos ({result['coverage'] * 100:.0f}%)")
+    if result["covered"]:
+        print(f"   ⏱️ estructurado {result['structured_us']}µs | soup + extract_data "
+              f"{result['selectors_us']}µs por página (x{result['speedup']})")
+    for field, parity in result["parity"].items():
+        if parity is not None:
+            print(f"   {field:<14} {parity * 100:6.1f}% igual")
+    for miss in result["mismatches"]:
+        print(f"   ≠ {miss['page']} {miss['field']}: {miss['structured']!r} vs {miss['selectors']!r}")
+    for fallback in result["fallbacks"]:
+        print(f"   ↩️ {fallback['page']}: a selectores (falta {', '.join(fallback['missing'])})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Paridad de datos estructurados vs. selectores")
+    parser.add_argument("--pharmacy", choices=PHARMACIES, action="append")
+    parser.add_argument("--backend", choices=available_backends(), default=default_backend())
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-parity", type=float, default=None,
+                        help="Paridad mínima por campo (0-1); por debajo sale con exit 1")
+    parser.add_argument("--report", default=None,
+                        help="JSON de salida (por defecto logs/structured_parity_<fecha>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = {}
+    for pharmacy in args.pharmacy or PHARMACIES:
+        result = compare(pharmacy, args.backend, args.iterations, args.repeats)
+        if result is None or not result["pages"]:
+            continue
+        results[pharmacy] = result
+        print_result(pharmacy, result)
+
+    report = Path(args.report) if args.report else \
+        REPORTS_DIR / f"structured_parity_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    with open(report, "w", encoding="utf-8") as f:
+        json.dump({"backend": args.backend, "results": results}, f, indent=2, ensure_ascii=False)
+    print(f"\n📝 Reporte: {report}")
+
+    if args.min_parity is None:
+        return
+    low = [f"{pharmacy}/{field}: {parity * 100:.1f}%"
+           for pharmacy, result in results.items()
+           for field, parity in result["parity"].items()
+           if parity is not None and parity < args.min_parity]
+    if low:
+        print("\n❌ Paridad por debajo del mínimo:")
+        for line in low:
+            print(f"   {line}")
+        sys.exit(1)
+    print("\n✅ Paridad dentro del mínimo")
+
+
+if __name__ == "__main__":
+    main()
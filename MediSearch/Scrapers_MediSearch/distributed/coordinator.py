@@ -0,0 +1,139 @@
+# 📁 Archivo: distributed/coordinator.py
+#
+# Coordinador de la cola distribuida. Lee extracted_urls/*.json, deduplica
+# las URLs de cada farmacia, las parte en shards y los encola en el broker.
+# Luego espera a que los workers terminen y junta sus resultados en el mismo
+# JSONL (y dead-letter) que escribiría el fast scraper de cada farmacia.
+#
+#   python coordinator.py --serve 0.0.0.0:8765 --token SECRETO --local-workers 2
+#   (en otras máquinas) python worker.py --broker http://coordinador:8765 --token SECRETO
+#
+# --serve fuera de loopback exige --token: sin él cualquiera en la red podría
+# tomar shards o subir resultados. El limitador AIMD es por proceso: N workers
+# mandan hasta N veces la tasa por host a cada farmacia.
+
+import argparse
+import ipaddress
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "Scrapers_MediSearch"))
+from scraper_core.async_engine import plan_tasks, print_dedup
+from scraper_core.broker_http import BrokerServer
+from scraper_core.jsonl_writer import JsonlWriter
+from scraper_core.registry import PHARMACIES, load_scraper
+from scraper_core.retry import dead_letter_path
+from scraper_core.work_queue import DEFAULT_SHARD_SIZE, SqliteBroker, job_finished, shard_tasks
+
+BROKER_FILE = BASE_DIR / "logs" / "work_queue.sqlite"
+WORKER_SCRIPT = Path(__file__).resolve().parent / "worker.py"
+POLL_INTERVAL_S = 10
+
+
+def enqueue_job(broker, job, pharmacies, shard_size):
+    for key in pharmacies:
+        scraper = load_scraper(key)
+        with open(scraper.INPUT_FILE, "r", encoding="utf-8") as f:
+            tasks, total = plan_tasks(json.load(f))
+        print_dedup(scraper.SPEC["pharmacy"], total, len(tasks))
+        shards = broker.enqueue(job, key, shard_tasks(tasks, shard_size))
+        print(f"📮 {key}: {shards} shards de hasta {shard_size} URLs")
+
+
+def wait_for_job(broker, job):
+    while True:
+        counts = broker.counts(job)
+        print(f"⏳ {job}: " + ", ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+        if job_finished(counts):
+            return counts
+        time.sleep(POLL_INTERVAL_S)
+
+
+# 🧺 Resultados de todos los shards → salida final de cada farmacia
+def merge_results(broker, job, pharmacies):
+    for key in pharmacies:
+        spec = load_scraper(key).SPEC
+        writer = JsonlWriter(spec["output_file"]).start()
+        for record in broker.results(job, key):
+            writer.write(record)
+        writer.close()
+        writer.print_stats()
+        dead_letters = broker.results(job, key, kind="dead")
+        with open(dead_letter_path(spec["output_file"]), "w", encoding="utf-8") as f:
+            for item in dead_letters:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        if dead_letters:
+            print(f"🪦 {key}: {len(dead_letters)} URLs en dead-letter")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Coordinador de la cola de scraping distribuida")
+    parser.add_argument("--pharmacies", nargs="+", choices=PHARMACIES, default=list(PHARMACIES))
+    parser.add_argument("--broker-file", default=str(BROKER_FILE))
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--job", default=None,
+                        help="Retomar un job existente en vez de encolar uno nuevo")
+    parser.add_argument("--serve", default=None, metavar="HOST:PUERTO",
+                        help="Exponer el broker por HTTP para workers remotos")
+    parser.add_argument("--token", default=os.environ.get("BROKER_TOKEN"))
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Workers a lanzar en esta misma máquina")
+    args = parser.parse_args()
+    if args.serve:
+        host, sep, port = args.serve.rpartition(":")
+        if not sep or not port.isdigit():
+            parser.error("--serve espera HOST:PUERTO")
+        if not args.token and not is_loopback(host):
+            parser.error(f"--serve en {host or 'todas las interfaces'} necesita --token (o BROKER_TOKEN)")
+    return args
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    args = parse_args()
+    broker = SqliteBroker(args.broker_file)
+    job = args.job or datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    if args.job is None:
+        enqueue_job(broker, job, args.pharmacies, args.shard_size)
+
+    server = None
+    if args.serve:
+        host, port = args.serve.rsplit(":", 1)
+        server = BrokerServer(broker, host.strip("[]"), int(port), token=args.token).start()
+        print(f"🌐 Broker disponible en {server.address} (job {job})")
+
+    workers = [
+        subprocess.Popen([sys.executable, str(WORKER_SCRIPT), "--broker", f"sqlite:///{args.broker_file}",
+                          "--job", job, "--worker-id", f"local-{i}"])
+        for i in range(args.local_workers)
+    ]
+
+    counts = wait_for_job(broker, job)
+    for worker in workers:
+        worker.wait()
+    if server is not None:
+        server.stop()
+
+    merge_results(broker, job, args.pharmacies)
+    broker.close()
+    if counts.get("failed"):
+        print(f"❌ {counts['failed']} shards fallaron tras agotar sus intentos")
+        sys.exit(1)
+    print(f"🎉 Job {job} completo")
+
+if __name__ == "__main__":
+    main()
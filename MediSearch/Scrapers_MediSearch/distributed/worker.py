@@ -0,0 +1,136 @@
+# 📁 Archivo: distributed/worker.py
+#
+# Worker de la cola distribuida: toma shards del broker, los scrapea con el
+# motor async y reporta registros y dead-letters. Mientras trabaja renueva
+# el lease; si lo pierde (venció y otro lo tomó) descarta su resultado.
+#
+#   python worker.py --broker http://coordinador:8765 --token SECRETO
+#   python worker.py --broker sqlite:///../../logs/work_queue.sqlite   (misma máquina)
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from scraper_core.async_engine import AsyncScrapeEngine, DEFAULT_BROWSERS, DEFAULT_CONCURRENCY, FETCH_MODES
+from scraper_core.journal import journal_path
+from scraper_core.registry import load_scraper
+from scraper_core.retry import dead_letter_path
+from scraper_core.work_queue import DEFAULT_LEASE_SECONDS, job_finished, make_broker
+
+POLL_INTERVAL_S = 5
+
+
+def read_jsonl(path):
+    if not Path(path).exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# 💓 Renueva el lease cada tercio de su duración hasta que se detenga
+class LeaseKeeper(threading.Thread):
+    def __init__(self, broker, task_id, worker, lease_seconds):
+        super().__init__(name="lease-keeper", daemon=True)
+        self.broker = broker
+        self.task_id = task_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.lease_seconds / 3):
+            try:
+                if not self.broker.extend(self.task_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    print(f"⚠️ Se perdió el lease del shard {self.task_id}")
+                    return
+            except Exception as e:
+                print(f"⚠️ No se pudo renovar el lease del shard {self.task_id}: {e}")
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+# 🧩 Un shard → registros y dead-letters, con salida temporal propia
+def run_shard(lease, scratch_dir, options):
+    scraper = load_scraper(lease["pharmacy"])
+    output = Path(scratch_dir) / f"{lease['pharmacy']}_{lease['id']}.jsonl"
+    spec = dict(scraper.SPEC, output_file=output)
+    engine = AsyncScrapeEngine(spec, **options)
+    tasks = [(url, meta, categorias) for url, meta, categorias in lease["shard"]]
+    asyncio.run(engine.run(tasks))
+    records = read_jsonl(output)
+    dead_letters = read_jsonl(dead_letter_path(output))
+    for path in (output, dead_letter_path(output), journal_path(output)):
+        Path(path).unlink(missing_ok=True)
+    return records, dead_letters
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Worker de la cola de scraping distribuida")
+    parser.add_argument("--broker", required=True, help="http://host:puerto o sqlite:///ruta.db")
+    parser.add_argument("--token", default=os.environ.get("BROKER_TOKEN"))
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--job", default=None, help="Solo tomar shards de este job")
+    parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--wait", action="store_true",
+                        help="Seguir esperando trabajo aunque la cola quede vacía")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--browsers", type=int, default=DEFAULT_BROWSERS)
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="http-first")
+    parser.add_argument("--parse-workers", type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    broker = make_broker(args.broker, token=args.token)
+    options = {
+        "concurrency": args.concurrency,
+        "browsers": args.browsers,
+        "fetch_mode": args.fetch_mode,
+        "parse_workers": args.parse_workers,
+    }
+    done = 0
+    print(f"👷 Worker {args.worker_id} conectado a {args.broker}")
+    with tempfile.TemporaryDirectory(prefix="medisearch-worker-") as scratch_dir:
+        while True:
+            lease = broker.lease(args.worker_id, args.lease_seconds, job=args.job)
+            if lease is None:
+                if not args.wait and job_finished(broker.counts(args.job)):
+                    break
+                time.sleep(POLL_INTERVAL_S)
+                continue
+
+            print(f"📦 Shard {lease['id']} ({lease['pharmacy']}, {len(lease['shard'])} URLs)")
+            keeper = LeaseKeeper(broker, lease["id"], args.worker_id, args.lease_seconds)
+            keeper.start()
+            try:
+                records, dead_letters = run_shard(lease, scratch_dir, options)
+            except Exception as e:
+                keeper.stop()
+                print(f"❌ Shard {lease['id']} falló: {e}")
+                broker.fail(lease["id"], args.worker_id, e)
+                continue
+            keeper.stop()
+            if keeper.lost or not broker.complete(lease["id"], args.worker_id, records, dead_letters):
+                print(f"⚠️ Shard {lease['id']} ya no es de este worker; se descarta el resultado")
+                continue
+            done += 1
+            print(f"✅ Shard {lease['id']}: {len(records)} registros, {len(dead_letters)} en dead-letter")
+
+    broker.close()
+    print(f"🏁 Worker {args.worker_id} terminó ({done} shards)")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,38 @@
 from pathlib import Path
-import json, time, re
-from datetime import datetime
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re, sys
+from urllib.parse import urlparse
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "Scrapers_MediSearch"))
+from scraper_core.product_api import SharedSession
+from scraper_core.retry import FetchError
+from scraper_core.scraper_cli import run_cli
+from scraper_core.structured_data import embedded_json, find_key, json_ld_fields, json_ld_product
 INPUT_FILE = BASE_DIR / "Scrapers_MediSearch/url_extractor/extracted_urls/cruzverde_urls.json"
 OUTPUT_FILE = BASE_DIR / "product_updates/cruzverde_products.jsonl"  # archivo único
 
+# 🧭 Pool de navegadores
+POOL_SIZE = 3
+MAX_PAGES_PER_BROWSER = 200
+MAX_BROWSER_RSS_MB = 1024
+
+# ⚡ Motor async: páginas concurrentes totales y por host
+CONCURRENCY = 8
+PER_HOST = 6
+
+# 🔌 product-service: los mismos datos de la página, en JSON y sin renderizar
+API_DETAIL_URL = "https://api.cruzverde.cl/product-service/products/detail/{}?inventoryId={}"
+API_SESSION_URL = "https://www.cruzverde.cl/"
+INVENTORY_ID = "zonaS2Soriente"
+API_HEADERS = {
+    "Accept": "application/json",
+    "Origin": "https://www.cruzverde.cl",
+    "Referer": "https://www.cruzverde.cl/",
+}
+# Clase de la insignia que extract_data busca con ".bioequivalent"
+BIOEQUIVALENT_RE = re.compile(r'class="[^"]*\bbioequivalent\b')
+TRANSFER_STATE_MARKER = 'id="serverApp-state"'
+
 def extract_data(soup):
     name_tag = soup.select_one("div.product-name h1")
     name = name_tag.get_text(strip=True) if name_tag else None
@@ -61,69 +85,102 @@ def extract_data(soup):
     return name, image_url, raw_normal_price, offer_price, discount, stock, bioequivalent
 
 def extract_id_from_url(url):
-    match = re.search(r"-(\d+)\.html", url)
+    # Las URLs del extractor terminan en /<id>.html; las del sitio, en -<id>.html
+    match = re.search(r"[-/](\d+)\.html", url)
     return int(match.group(1)) if match else None
 
-def process_category(categoria, urls):
-    cat = categoria.split("/")[0]
-    subcat = categoria.split("/")[1] if "/" in categoria else None
-    results = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        for url in urls:
-            product_id = extract_id_from_url(url)
-            try:
-                page.goto(url, timeout=20000)
-                page.wait_for_load_state("networkidle")
-                page.wait_for_timeout(1000)
-                soup = BeautifulSoup(page.content(), "html.parser")
-                name, image, normal_price, offer_price, discount, stock, bioeq = extract_data(soup)
-
-                results.append({
-                    "pharmacy": "Cruz Verde",
-                    "id": product_id,
-                    "url": url,
-                    "offer_price": offer_price,
-                    "normal_price": normal_price,
-                    "discount": discount,
-                    "name": name,
-                    "category": cat,
-                    "subcategory": subcat,
-                    "image": image,
-                    "stock": stock,
-                    "bioequivalent": bioeq
-                })
-            except Exception as e:
-                print(f"❌ Error con ID {product_id}: {e}")
-            time.sleep(0.2)
-
-        page.close()
-        browser.close()
-
-    if results:
-        with open(OUTPUT_FILE, "a", encoding="utf-8") as f:
-            for item in results:
-                f.write(json.dumps(item, ensure_ascii=False) + "\n")
-        print(f"✅ Guardado: {OUTPUT_FILE}")
-
-def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        all_data = json.load(f)
-
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = {
-            executor.submit(process_category, categoria, urls): categoria
-            for categoria, urls in all_data.items()
-        }
-        for future in as_completed(futures):
-            categoria = futures[future]
-            try:
-                future.result()
-            except Exception as e:
-                print(f"❌ Error procesando {categoria}: {e}")
-
+# 🧾 productData del product-service → campos de extract_data
+def parse_api_product(data):
+    prices = data.get("prices") or {}
+    offer_price = prices.get("price-sale-cl") or prices.get("price-list-cl")
+    normal_price = prices.get("price-list-cl") if prices.get("price-sale-cl") else None
+    stock = data.get("stock")
+    return {
+        "name": data.get("name"),
+        "image": (data.get("metaTags") or {}).get("ogImage"),
+        "normal_price": int(normal_price) if normal_price else None,
+        "offer_price": int(offer_price) if offer_price else None,
+        "stock": None if stock is None else ("available" if stock > 0 else "out_of_stock"),
+        "bioequivalent": data.get("isBioequivalent") is True,
+    }
+
+# ⚡ Camino rápido sin DOM: JSON-LD del producto o, si no está, el productData
+# que la SPA deja en el TransferState de Angular (mismo formato que la API)
+def extract_structured(html):
+    product = json_ld_product(html)
+    if product is not None:
+        fields = json_ld_fields(product)
+        fields["bioequivalent"] = BIOEQUIVALENT_RE.search(html) is not None
+        return fields
+    state = embedded_json(html, TRANSFER_STATE_MARKER, angular_escapes=True)
+    product_data = find_key(state, "productData") if state is not None else None
+    return parse_api_product(product_data) if isinstance(product_data, dict) else None
+
+class CruzVerdeApi:
+    """Detalle de producto desde el product-service con una cookie de sesión compartida."""
+
+    def __init__(self, spec, get, browser_cookies=None):
+        self.detail_url = spec["api_detail_url"]
+        self.inventory_id = spec["api_inventory_id"]
+        self.host = urlparse(self.detail_url).netloc
+        self.get = get
+        self.session = SharedSession(spec["api_session_url"], get, browser_cookies)
+
+    async def product(self, url):
+        product_id = extract_id_from_url(url)
+        if product_id is None:
+            return None
+        api_url = self.detail_url.format(product_id, self.inventory_id)
+        resp = await self.session.call(lambda cookie: self.get(api_url, headers=dict(API_HEADERS, Cookie=cookie)))
+        if resp.status_code == 404:
+            return None
+        if resp.status_code >= 400:
+            raise FetchError(api_url, resp.status_code)
+        return parse_api_product(resp.json().get("productData") or {})
+
+# ⚙️ Configuración para el motor async
+SPEC = {
+    "key": "cruzverde",
+    "pharmacy": "Cruz Verde",
+    "extract_data": extract_data,
+    "extract_structured": extract_structured,
+    "extract_id": extract_id_from_url,
+    "input_file": INPUT_FILE,
+    "output_file": OUTPUT_FILE,
+    # Valores por defecto del CLI (scraper_cli.py)
+    "concurrency": CONCURRENCY,
+    "per_host": PER_HOST,
+    "browsers": POOL_SIZE,
+    "max_pages": MAX_PAGES_PER_BROWSER,
+    "max_rss_mb": MAX_BROWSER_RSS_MB,
+    "fetch_mode_help": "api = precios, stock y bioequivalencia desde el product-service",
+    # Si el HTML servido trae estos selectores no hace falta renderizar
+    "required_selectors": [
+        "div.product-name h1",
+        "div.product-prices span.price-sales",
+    ],
+    # El navegador se considera listo cuando existen nombre y bloque de precios
+    "ready_selectors": [
+        "div.product-name h1",
+        "div.product-prices",
+    ],
+    "ready_timeout_ms": 8000,
+    # Zona de precio para la huella de --fetch-cache (nombre, precios, stock, badge)
+    "hash_selectors": [
+        "div.product-name h1",
+        "div.product-prices",
+        ".availability",
+        ".bioequivalent",
+        "img.productImage",
+    ],
+    "first_party_domains": ["cruzverde.cl"],
+    # --fetch-mode api
+    "api": CruzVerdeApi,
+    "api_detail_url": API_DETAIL_URL,
+    "api_session_url": API_SESSION_URL,
+    "api_inventory_id": INVENTORY_ID,
+}
+
+# 🚀 Ejecutar
 if __name__ == "__main__":
-    main()
+    run_cli(SPEC)
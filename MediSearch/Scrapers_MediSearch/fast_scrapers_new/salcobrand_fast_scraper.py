@@ -1,14 +1,22 @@
 from pathlib import Path
-import json, time, re
-from datetime import datetime
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re, sys
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "Scrapers_MediSearch"))
+from scraper_core.scraper_cli import run_cli
+from scraper_core.structured_data import json_ld_fields, json_ld_product, visible_text
 INPUT_FILE = BASE_DIR / "Scrapers_MediSearch/url_extractor/extracted_urls/salcobrand_urls.json"
 OUTPUT_FILE = BASE_DIR / "product_updates/salcobrand_products.jsonl"  # archivo único
 
+# 🧭 Pool de navegadores
+POOL_SIZE = 3
+MAX_PAGES_PER_BROWSER = 200
+MAX_BROWSER_RSS_MB = 1024
+
+# ⚡ Motor async: páginas concurrentes totales y por host
+CONCURRENCY = 8
+PER_HOST = 6
+
 def extract_data(soup):
     name_tag = soup.select_one("h1.product-name")
     name = name_tag.get_text(strip=True) if name_tag else None
@@ -56,70 +64,59 @@ def extract_data(soup):
     bioequivalent = "bioequivalente" in stock_text
     return name, image_url, raw_normal_price, offer_price, discount, stock, bioequivalent
 
+# ⚡ Camino rápido: el JSON-LD de producto, sin armar el DOM; la
+# bioequivalencia sale del texto visible, igual que en extract_data
+def extract_structured(html):
+    product = json_ld_product(html)
+    if product is None:
+        return None
+    fields = json_ld_fields(product)
+    # visible_text solo si la palabra aparece en algún lado ("Bioequivalente" o
+    # "BIOEQUIVALENTE"; un `in` es mucho más barato que un regex sin mayúsculas)
+    mentioned = "ioequivalente" in html or "IOEQUIVALENTE" in html
+    fields["bioequivalent"] = mentioned and "bioequivalente" in visible_text(html)
+    return fields
+
 def extract_id_from_url(url):
     match = re.search(r"-(\d+)\.html", url)
     return int(match.group(1)) if match else None
 
-def process_category(categoria, urls):
-    cat = categoria.split("/")[0]
-    subcat = categoria.split("/")[1] if "/" in categoria else None
-    results = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        for url in urls:
-            product_id = extract_id_from_url(url)
-            try:
-                page.goto(url, timeout=20000)
-                page.wait_for_load_state("networkidle")
-                page.wait_for_timeout(1000)
-                soup = BeautifulSoup(page.content(), "html.parser")
-                name, image, normal_price, offer_price, discount, stock, bioeq = extract_data(soup)
-
-                results.append({
-                    "pharmacy": "Salcobrand",
-                    "id": product_id,
-                    "url": url,
-                    "offer_price": offer_price,
-                    "normal_price": normal_price,
-                    "discount": discount,
-                    "name": name,
-                    "category": cat,
-                    "subcategory": subcat,
-                    "image": image,
-                    "stock": stock,
-                    "bioequivalent": bioeq
-                })
-            except Exception as e:
-                print(f"❌ Error con ID {product_id}: {e}")
-            time.sleep(0.2)
-
-        page.close()
-        browser.close()
-
-    if results:
-        with open(OUTPUT_FILE, "a", encoding="utf-8") as f:
-            for item in results:
-                f.write(json.dumps(item, ensure_ascii=False) + "\n")
-        print(f"✅ Guardado: {OUTPUT_FILE}")
-
-def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        all_data = json.load(f)
-
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = {
-            executor.submit(process_category, categoria, urls): categoria
-            for categoria, urls in all_data.items()
-        }
-        for future in as_completed(futures):
-            categoria = futures[future]
-            try:
-                future.result()
-            except Exception as e:
-                print(f"❌ Error procesando {categoria}: {e}")
-
+# ⚙️ Configuración para el motor async
+SPEC = {
+    "key": "salcobrand",
+    "pharmacy": "Salcobrand",
+    "extract_data": extract_data,
+    "extract_structured": extract_structured,
+    "extract_id": extract_id_from_url,
+    "input_file": INPUT_FILE,
+    "output_file": OUTPUT_FILE,
+    # Valores por defecto del CLI (scraper_cli.py)
+    "concurrency": CONCURRENCY,
+    "per_host": PER_HOST,
+    "browsers": POOL_SIZE,
+    "max_pages": MAX_PAGES_PER_BROWSER,
+    "max_rss_mb": MAX_BROWSER_RSS_MB,
+    "fetch_mode_help": "listing = precios de los hits de Algolia (salcobrand_extractor.py --with-prices)",
+    # Si el HTML servido trae estos selectores no hace falta renderizar
+    "required_selectors": [
+        "h1.product-name",
+        "div.price-box span.price",
+    ],
+    # El navegador se considera listo cuando existen nombre y bloque de precios
+    "ready_selectors": [
+        "h1.product-name",
+        "div.price-box",
+    ],
+    "ready_timeout_ms": 8000,
+    # Huella de --fetch-cache: extract_data lee stock y bioequivalencia del texto
+    # de toda la página, así que se toma el bloque principal completo (sin
+    # cabecera, menú ni pie, que cambian sin que cambie el producto)
+    "hash_selectors": [
+        "main",
+    ],
+    "first_party_domains": ["salcobrand.cl", "salcobrandonline.cl"],
+}
+
+# 🚀 Ejecutar
 if __name__ == "__main__":
-    main()
+    run_cli(SPEC)
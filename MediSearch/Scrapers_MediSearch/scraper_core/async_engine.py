@@ -0,0 +1,541 @@
+# 📁 Archivo: scraper_core/async_engine.py
+#
+# Motor asyncio para los fast scrapers.
+# Agenda URLs de producto individuales (no categorías) sobre un número
+# configurable de páginas concurrentes, con un semáforo global y otro por host.
+# Cada farmacia entrega un SPEC con su extract_data y el motor produce los
+# mismos registros JSONL que escribía process_category.
+# En modo "http-first" cada URL se intenta primero con un GET directo y solo
+# pasa por Chromium si faltan los selectores requeridos del SPEC. En el
+# navegador se espera a los ready_selectors del SPEC (ver page_readiness.py).
+# Descarga y parseo son etapas separadas: los workers de descarga dejan el HTML
+# en una cola acotada y la etapa de parseo (procesos) lo convierte en registros,
+# que un único hilo escritor vuelca por lotes al JSONL (ver jsonl_writer.py).
+# Cada URL se reintenta con backoff según la clase de error, un circuit breaker
+# pausa el host si falla en masa y lo irrecuperable va al dead-letter (retry.py).
+# Tiempos, tamaños y resultados quedan como métricas Prometheus y logs JSON
+# etiquetados por farmacia y categoría principal de la URL (ver metrics.py).
+# En modo "api" los campos salen del JSON de la farmacia (SPEC["api"]) y el
+# navegador solo completa los productos a los que les falta algo (product_api.py).
+# En modo "listing" salen de los "fields" que el extractor guardó con cada URL
+# (hits de Algolia, tiles del listado) y lo que falte se baja como en http-first.
+# Con fetch_cache los GET van con If-None-Match / If-Modified-Since y un 304 o
+# una huella de precio igual reutilizan el registro anterior (fetch_cache.py).
+# Si el SPEC trae extract_structured, el parseo prueba primero el JSON-LD o el
+# estado embebido y solo arma el DOM si falta algo (structured_data.py).
+
+import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import httpx
+from playwright.async_api import async_playwright
+
+from scraper_core.browser_pool import (AsyncBrowserPool, DEFAULT_MAX_PAGES, DEFAULT_MAX_RSS_MB,
+                                       process_tree_rss_mb)
+from scraper_core.fetch_cache import (FetchCache, SkipStats, conditional_headers,
+                                      fetch_cache_path, response_validators)
+from scraper_core.html_parser import default_backend
+from scraper_core.http_fetch import HttpFirstStats, make_http_client
+from scraper_core.journal import ScrapeJournal, journal_path, record_key
+from scraper_core.jsonl_writer import DEFAULT_BATCH_SIZE, JsonlWriter, part_path
+from scraper_core.metrics import ScrapeMetrics
+from scraper_core.page_readiness import install_blocking, load_page
+from scraper_core.parse_stage import ParseStage, default_parse_workers
+from scraper_core.product_api import ApiStats, cookie_header, merge_fields
+from scraper_core.rate_limiter import get_rate_limiter
+from scraper_core.retry import (HOST_FAILURES, CircuitBreaker, DeadLetter, FetchError,
+                                ParseError, RetryPolicy, classify_error, dead_letter_path)
+from scraper_core.timings import PhaseTimings
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_HOST = 6
+DEFAULT_BROWSERS = 2
+FETCH_MODES = ("http-first", "browser", "api", "listing")
+METRICS_INTERVAL_S = 5
+WRITER_BACKOFF_S = 0.05
+
+
+# 🧠 Separar "categoria/subcategoria"
+def split_category(categoria):
+    cat = categoria.split("/")[0]
+    subcat = categoria.split("/")[1] if "/" in categoria else None
+    return cat, subcat
+
+
+# 🏷️ Categoría con la que se etiquetan las métricas de una URL
+def main_category(categorias):
+    return split_category(categorias[0])[0]
+
+
+# 🧠 Las URLs de Salcobrand vienen como {"url", "objectID", "sku"}
+def normalize_entry(entry):
+    if isinstance(entry, dict):
+        return entry["url"], entry
+    return entry, {}
+
+
+# 🗂️ Plan de descarga: cada URL única una sola vez, con todas sus categorías
+# Devuelve tareas (url, meta, [categorias]) y el total de entradas leídas.
+def plan_tasks(all_data):
+    memberships = {}
+    metas = {}
+    total = 0
+    for categoria, entries in all_data.items():
+        for entry in entries:
+            url, meta = normalize_entry(entry)
+            total += 1
+            categorias = memberships.setdefault(url, [])
+            if categoria not in categorias:
+                categorias.append(categoria)
+            metas.setdefault(url, meta)
+    tasks = [(url, metas[url], categorias) for url, categorias in memberships.items()]
+    return tasks, total
+
+
+def print_dedup(pharmacy, total, unique):
+    saved = (1 - unique / total) * 100 if total else 0.0
+    print(f"🧮 {pharmacy}: {total} entradas → {unique} URLs únicas "
+          f"({saved:.1f}% de descargas ahorradas)")
+
+
+# 🧾 Registro con el mismo esquema que process_category
+def build_record(spec, categoria, url, meta, data):
+    name, image, normal_price, offer_price, discount, stock, bioeq = data
+    cat, subcat = split_category(categoria)
+    product_id = spec["extract_id"](url)
+    if product_id is None:
+        product_id = meta.get("sku")
+    return {
+        "pharmacy": spec["pharmacy"],
+        "id": product_id,
+        "url": url,
+        "offer_price": offer_price,
+        "normal_price": normal_price,
+        "discount": discount,
+        "name": name,
+        "category": cat,
+        "subcategory": subcat,
+        "image": image,
+        "stock": stock,
+        "bioequivalent": bioeq
+    }
+
+
+class AsyncScrapeEngine:
+    """Reparte URLs de producto entre páginas concurrentes y una etapa de parseo aparte."""
+
+    def __init__(self, spec, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 browsers=DEFAULT_BROWSERS, max_pages=DEFAULT_MAX_PAGES,
+                 max_rss_mb=DEFAULT_MAX_RSS_MB, fetch_mode="http-first", parser=None,
+                 parse_workers=None, fsync="close", batch_size=DEFAULT_BATCH_SIZE,
+                 resume=False, max_attempts=None, metrics_file=None, metrics_port=None,
+                 json_log=None, fetch_cache=False, structured_data=True):
+        self.spec = dict(spec, parser=parser or spec.get("parser") or default_backend())
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.browsers = browsers
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.global_sem = asyncio.Semaphore(concurrency)
+        self.host_sems = defaultdict(lambda: asyncio.Semaphore(per_host))
+        if fetch_mode == "api" and "api" not in spec:
+            print(f"⚠️ {spec['pharmacy']} no tiene modo API; se usa http-first")
+            fetch_mode = "http-first"
+        self.fetch_mode = fetch_mode
+        self.parse_workers = default_parse_workers() if parse_workers is None else parse_workers
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.writer = None
+        self.resume = resume
+        self.journal = None
+        self.retry = RetryPolicy() if max_attempts is None else RetryPolicy(max_attempts)
+        self.breaker = CircuitBreaker()
+        self.dead_letter = None
+        self.backoffs = set()
+        self.retries = defaultdict(int)
+        self.http_stats = HttpFirstStats(spec["pharmacy"])
+        self.api = None
+        self.api_stats = ApiStats(spec["pharmacy"], "listado" if fetch_mode == "listing" else "API")
+        # Campos que trajo la API (o el listado) de las URLs que se completan descargando
+        self.api_partial = {}
+        self.use_cache = fetch_cache
+        self.structured_data = structured_data
+        # Productos parseados por datos estructurados vs. por selectores
+        self.extract_paths = defaultdict(int)
+        self.cache = None
+        self.skip_stats = SkipStats(spec["pharmacy"])
+        # ETag / Last-Modified de las URLs bajadas por HTTP, hasta guardar su registro
+        self.validators = {}
+        self.limiter = get_rate_limiter()
+        self.timings = PhaseTimings()
+        self.metrics = ScrapeMetrics(spec["pharmacy"], json_log=json_log)
+        self.metrics_file = metrics_file
+        self.metrics_port = metrics_port
+        self.client = None
+        self.pool = None
+        self.stage = None
+        self.pending = None
+        self.html_queue = None
+        self.ok = 0
+        self.failed = 0
+
+    # La cola del escritor tiene tope: si el disco se atasca (fsync, disco
+    # lento) se cede el loop en vez de bloquearlo con un put, así las
+    # descargas y las renovaciones de lease siguen corriendo
+    async def emit(self, record):
+        while not self.writer.try_write(record):
+            await asyncio.sleep(WRITER_BACKOFF_S)
+
+    def fail(self, categorias, url, meta, kind, error, attempts):
+        self.failed += 1
+        self.api_partial.pop(url, None)
+        self.validators.pop(url, None)
+        for categoria in categorias:
+            self.journal.mark_failed(categoria, url, f"{kind}: {error}")
+        self.dead_letter.add(categorias, meta or url, kind, error, attempts)
+        self.metrics.page_failed(url, main_category(categorias), kind, attempts, error)
+        print(f"❌ Error con {url} ({kind}, {attempts} intentos): {error}")
+
+    # 🔁 Reintento con backoff o, si no corresponde, al dead-letter
+    def retry_or_fail(self, url, meta, categorias, attempt, error, force_browser=True):
+        kind = classify_error(error)
+        if kind in HOST_FAILURES:
+            self.breaker.record(urlparse(url).netloc, False)
+        if not self.retry.should_retry(kind, attempt):
+            self.fail(categorias, url, meta, kind, error, attempt + 1)
+            return
+        self.retries[kind] += 1
+        delay = self.retry.delay(attempt)
+        self.metrics.retry(url, kind, attempt + 1, delay, main_category(categorias))
+        # En modo API se reintenta la API. Si no, un fallo del host se repite por
+        # el mismo camino y uno de contenido (parseo) va directo al navegador
+        if self.api is not None:
+            force_browser = False
+        elif kind not in HOST_FAILURES:
+            force_browser = True
+        item = (url, meta, categorias, force_browser, attempt + 1)
+        task = asyncio.create_task(self._requeue(delay, item))
+        self.backoffs.add(task)
+        task.add_done_callback(self.backoffs.discard)
+
+    async def _requeue(self, delay, item):
+        await asyncio.sleep(delay)
+        self.pending.put_nowait(item)
+
+    # 📒 El escritor avisa qué registros ya quedaron en disco (y cuánto tardó el lote)
+    def journal_flushed(self, records, seconds):
+        self.journal.mark_ok([record_key(r) for r in records])
+        self.metrics.records_written(records, seconds)
+
+    # 🔁 Con --resume se saltan las (categoria, url) ya guardadas
+    def open_journal(self, tasks):
+        self.journal = ScrapeJournal(journal_path(self.spec["output_file"]))
+        if not self.resume:
+            self.journal.reset()
+            return tasks
+        part = part_path(self.spec["output_file"])
+        self.journal.reconcile(part if part.exists() else self.spec["output_file"])
+        done = self.journal.done_keys()
+        remaining = []
+        for url, meta, categorias in tasks:
+            missing = [c for c in categorias if (c, url) not in done]
+            if missing:
+                remaining.append((url, meta, missing))
+        failed = self.journal.counts().get("failed", 0)
+        print(f"🔁 Reanudando {self.spec['pharmacy']}: {len(tasks) - len(remaining)} URLs ya guardadas, "
+              f"{len(remaining)} pendientes ({failed} fallidas antes)")
+        return remaining
+
+    async def setup_context(self, context):
+        await install_blocking(context, self.spec.get("first_party_domains", []))
+
+    def use_http(self, force_browser):
+        return (not force_browser and self.fetch_mode in ("http-first", "listing")
+                and self.http_stats.http_worthwhile())
+
+    # 🌐 Descarga: HTTP directo o navegador. Devuelve (html, via) con via
+    # "http", "browser" o "check" (GET condicional en modo navegador: el HTML
+    # solo sirve para comparar la huella); html None = 304, sin cambios.
+    async def fetch(self, url, force_browser, sink, cached=None):
+        host = urlparse(url).netloc
+        await self.breaker.wait_async(host)
+        async with self.global_sem, self.host_sems[host]:
+            use_http = self.use_http(force_browser)
+            headers = conditional_headers(cached) if not force_browser else {}
+            if use_http or headers:
+                await self.limiter.acquire_async(host)
+                start = time.monotonic()
+                try:
+                    resp = await self.client.get(url, headers=headers)
+                    self.limiter.feedback_response(host, resp, time.monotonic() - start)
+                    if resp.status_code == 304:
+                        if use_http:
+                            self.http_stats.http_hits += 1
+                        self.breaker.record(host, True)
+                        return None, "http"
+                    resp.raise_for_status()
+                    self.breaker.record(host, True)
+                    if self.cache is not None:
+                        self.validators[url] = response_validators(resp)
+                    return resp.text, "http" if use_http else "check"
+                except httpx.HTTPError as e:
+                    self.http_stats.http_errors += 1
+                    # 429/5xx/timeout/red: el host pide respiro, no un Chromium;
+                    # retry_or_fail anota el fallo en el breaker y aplica el backoff
+                    if classify_error(e) in HOST_FAILURES:
+                        raise
+                    # 403/404 u otro rechazo del GET: quizá el navegador sí pasa
+                    if use_http:
+                        self.http_stats.fallbacks += 1
+                finally:
+                    sink.record("http", time.monotonic() - start)
+
+            await self.limiter.acquire_async(host)
+            async with self.pool.page() as page:
+                html, status, seconds = await load_page(page, url, self.spec, sink)
+            self.limiter.feedback(host, status, seconds)
+            if status is not None and status >= 400:
+                raise FetchError(url, status)
+            self.breaker.record(host, True)
+            return html, "browser"
+
+    # 🔌 GET de la API con el cliente y el limitador compartidos
+    async def api_get(self, url, **kwargs):
+        host = urlparse(url).netloc
+        await self.limiter.acquire_async(host)
+        start = time.monotonic()
+        resp = await self.client.get(url, **kwargs)
+        self.limiter.feedback_response(host, resp, time.monotonic() - start)
+        return resp
+
+    # 🍪 Cookies de un navegador del pool, para sesiones que se arman con JS
+    async def browser_cookies(self, url):
+        async with self.pool.page() as page:
+            await page.goto(url, wait_until="networkidle", timeout=30000)
+            cookies = await page.context.cookies()
+        return cookie_header((c["name"], c["value"]) for c in cookies)
+
+    # 🔌 Campos del producto desde la API (None si la API no lo conoce)
+    async def fetch_api(self, url, sink):
+        host = self.api.host
+        await self.breaker.wait_async(host)
+        async with self.global_sem, self.host_sems[host]:
+            start = time.monotonic()
+            try:
+                fields = await self.api.product(url)
+            finally:
+                sink.record("api", time.monotonic() - start)
+        self.breaker.record(host, True)
+        return fields
+
+    # ✅ Un producto listo se replica en todas sus categorías
+    async def finish(self, url, meta, categorias, data, via):
+        for categoria in categorias:
+            await self.emit(build_record(self.spec, categoria, url, meta, data))
+        self.ok += 1
+        self.metrics.page_ok(url, main_category(categorias), via)
+
+    # ⏭️ Sin cambios (304 o misma huella): el registro anterior, sin parsear.
+    # En modo api/listing los campos recién traídos pisan a los del caché: que
+    # el HTML no cambió no dice nada del precio que informa la API.
+    async def reuse(self, url, meta, categorias, cached, outcome, content_hash=None):
+        partial = self.api_partial.pop(url, None)
+        data = cached.data if partial is None else merge_fields(partial, cached.data)
+        validators = self.validators.pop(url, None)
+        if validators is not None or data != cached.data:
+            # El ETag nuevo vale para la próxima corrida: el contenido es el mismo
+            self.cache.store(url, validators or (cached.etag, cached.last_modified),
+                             content_hash or cached.content_hash, data)
+        self.skip_stats.record(outcome)
+        await self.finish(url, meta, categorias, data, outcome)
+
+    # 💾 Campos recién parseados al caché; validadores solo si salieron de ese HTML
+    def remember(self, url, via, content_hash, data):
+        validators = self.validators.pop(url, None)
+        if self.cache is None:
+            return
+        self.skip_stats.record("parsed")
+        self.cache.store(url, validators if via == "http" else None, content_hash, data)
+
+    async def _fetch_worker(self):
+        while True:
+            url, meta, categorias, force_browser, attempt = await self.pending.get()
+            try:
+                category = main_category(categorias)
+                sink = self.metrics.sink(self.timings, category)
+                if self.fetch_mode in ("api", "listing") and not force_browser:
+                    fields = await self.fetch_api(url, sink) if self.api is not None else meta.get("fields")
+                    if not self.api_stats.record(fields):
+                        await self.finish(url, meta, categorias, merge_fields(fields), self.fetch_mode)
+                        continue
+                    self.api_partial[url] = fields or {}
+                    # Lo que la API no trae suele no estar en el HTML servido
+                    force_browser = self.api is not None
+                cached = self.cache.get(url) if self.cache is not None else None
+                html, via = await self.fetch(url, force_browser, sink, cached)
+                if html is None:
+                    await self.reuse(url, meta, categorias, cached, "not_modified")
+                    continue
+                self.metrics.content(len(html), category)
+                # Si la cola de parseo está llena, esta espera frena la descarga
+                await self.html_queue.put((url, meta, categorias, html, via, attempt))
+            except Exception as e:
+                self.retry_or_fail(url, meta, categorias, attempt, e, force_browser)
+            finally:
+                self.pending.task_done()
+
+    async def _parse_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            url, meta, categorias, html, via, attempt = await self.html_queue.get()
+            try:
+                cached = self.cache.get(url) if self.cache is not None else None
+                start = time.monotonic()
+                try:
+                    data, content_hash, path = await self.stage.parse(
+                        loop, self.spec["key"], self.spec["parser"], html,
+                        require_complete=via != "browser", fingerprint=self.cache is not None,
+                        known_hash=cached.content_hash if cached else None, hash_only=via == "check",
+                        structured=self.structured_data)
+                except Exception as e:
+                    raise ParseError(e) from e
+                finally:
+                    self.metrics.sink(self.timings, main_category(categorias)).record(
+                        "parse", time.monotonic() - start)
+                if cached is not None and content_hash is not None and content_hash == cached.content_hash:
+                    if via == "http":
+                        self.http_stats.http_hits += 1
+                    self.extract_paths[path] += 1
+                    await self.reuse(url, meta, categorias, cached, "unchanged", content_hash)
+                    continue
+                if data is None:
+                    # El HTML servido no traía lo necesario (o la huella cambió en
+                    # modo navegador): escalar al navegador
+                    self.validators.pop(url, None)
+                    if via == "http":
+                        self.http_stats.fallbacks += 1
+                    self.pending.put_nowait((url, meta, categorias, True, attempt))
+                    continue
+                if via == "http":
+                    self.http_stats.http_hits += 1
+                self.extract_paths[path] += 1
+                partial = self.api_partial.pop(url, None)
+                if partial is not None:
+                    data = merge_fields(partial, data)
+                self.remember(url, via, content_hash, data)
+                await self.finish(url, meta, categorias, data, via)
+            except Exception as e:
+                self.retry_or_fail(url, meta, categorias, attempt, e)
+            finally:
+                self.html_queue.task_done()
+
+    # ⏳ Espera a que ambas etapas queden vacías (el parseo y los reintentos
+    # en backoff pueden reencolar descargas)
+    async def _drain(self):
+        while True:
+            await self.pending.join()
+            await self.html_queue.join()
+            if self.backoffs:
+                await asyncio.gather(*list(self.backoffs))
+                continue
+            if self.pending.empty() and self.html_queue.empty():
+                return
+
+    # 📈 Gauges (pages/s, RSS, tasas por host) y snapshot .prom cada METRICS_INTERVAL_S
+    def sample_metrics(self):
+        self.metrics.sample(process_tree_rss_mb(), self.limiter.snapshot())
+        if self.metrics_file:
+            self.metrics.registry.write_snapshot(self.metrics_file)
+
+    async def _metrics_loop(self):
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL_S)
+            self.sample_metrics()
+
+    async def run(self, tasks):
+        tasks = self.open_journal(tasks)
+        self.stage = ParseStage(self.parse_workers)
+        self.writer = JsonlWriter(self.spec["output_file"], batch_size=self.batch_size,
+                                  fsync=self.fsync, on_flush=self.journal_flushed,
+                                  timings=self.timings)
+        self.writer.start(resume=self.resume)
+        self.dead_letter = DeadLetter(dead_letter_path(self.spec["output_file"]))
+        if self.use_cache:
+            self.cache = FetchCache(fetch_cache_path(self.spec))
+        self.pending = asyncio.Queue()
+        self.html_queue = asyncio.Queue(maxsize=self.stage.queue_size)
+        for url, meta, categorias in tasks:
+            self.pending.put_nowait((url, meta, categorias, False, 0))
+        server = self.metrics.registry.serve(self.metrics_port) if self.metrics_port else None
+        self.metrics.event("run_start", urls=len(tasks), concurrency=self.concurrency,
+                           fetch_mode=self.fetch_mode, parser=self.spec["parser"])
+
+        async with async_playwright() as p, make_http_client(self.concurrency) as client:
+            self.client = client
+            if self.fetch_mode == "api":
+                self.api = self.spec["api"](self.spec, self.api_get, self.browser_cookies)
+            # Los navegadores se lanzan recién cuando alguna URL los necesita
+            self.pool = AsyncBrowserPool(p, size=self.browsers, max_pages=self.max_pages,
+                                         max_rss_mb=self.max_rss_mb,
+                                         context_setup=self.setup_context)
+            parsers = max(1, self.parse_workers) * 2
+            workers = [asyncio.create_task(self._fetch_worker()) for _ in range(self.concurrency)]
+            workers += [asyncio.create_task(self._parse_worker()) for _ in range(parsers)]
+            workers.append(asyncio.create_task(self._metrics_loop()))
+            completed = False
+            try:
+                await self._drain()
+                completed = True
+            finally:
+                for w in workers + list(self.backoffs):
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                await self.pool.close()
+                self.stage.close()
+                # close/abort esperan al hilo escritor (y al fsync): fuera del loop
+                await asyncio.to_thread(self.writer.close if completed else self.writer.abort)
+                self.journal.close()
+                self.dead_letter.close()
+                if self.cache is not None:
+                    self.cache.close()
+                self.sample_metrics()
+                self.metrics.event("run_end", completed=completed, ok=self.ok, failed=self.failed,
+                                   retries=sum(self.retries.values()),
+                                   phases=self.timings.summary(), pool=self.pool.stats(),
+                                   cache_skips=dict(self.skip_stats.counts),
+                                   extract_paths=dict(self.extract_paths),
+                                   rate_limits=self.limiter.snapshot())
+                if server is not None:
+                    server.shutdown()
+
+        print(f"✅ {self.spec['pharmacy']}: {self.ok} productos únicos guardados en {self.spec['output_file']} "
+              f"({self.failed} errores)")
+        self.writer.print_stats()
+        if self.retries:
+            detail = ", ".join(f"{kind}={n}" for kind, n in sorted(self.retries.items()))
+            print(f"🔁 Reintentos: {sum(self.retries.values())} ({detail})")
+        self.dead_letter.print_stats()
+        self.breaker.print_stats()
+        if self.fetch_mode in ("http-first", "listing"):
+            self.http_stats.print_stats()
+        if self.cache is not None:
+            self.skip_stats.print_stats()
+        if self.extract_paths:
+            print(f"🧬 {self.spec['pharmacy']}: {self.extract_paths['structured']} por datos estructurados | "
+                  f"{self.extract_paths['selectors']} por selectores")
+        if self.fetch_mode in ("api", "listing"):
+            self.api_stats.print_stats(self.api.session if self.api is not None else None)
+        self.pool.print_stats()
+        self.limiter.print_stats()
+        self.timings.print_summary()
+
+
+# 🚀 Punto de entrada usado por los fast scrapers
+def run_async_scrape(spec, all_data, **options):
+    engine = AsyncScrapeEngine(spec, **options)
+    tasks, total = plan_tasks(all_data)
+    print_dedup(spec["pharmacy"], total, len(tasks))
+    asyncio.run(engine.run(tasks))
+    return engine
@@ -0,0 +1,113 @@
+# 📁 Archivo: scraper_core/broker_http.py
+#
+# Expone un broker local por HTTP para que workers de otras máquinas tomen
+# shards. El coordinador levanta BrokerServer sobre su SqliteBroker y los
+# workers usan HttpBroker, que implementa la misma interfaz que Broker.
+# Protocolo mínimo: POST /<método> con JSON, respuesta {"result": ...}.
+# Con `token` el servidor exige el header X-Broker-Token en cada petición.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from scraper_core.work_queue import DEFAULT_LEASE_SECONDS, Broker
+
+TOKEN_HEADER = "X-Broker-Token"
+METHODS = ("enqueue", "lease", "extend", "complete", "fail", "counts", "results")
+
+
+class BrokerServer:
+    """Servidor HTTP en un hilo que delega cada llamada en `broker`."""
+
+    def __init__(self, broker, host="127.0.0.1", port=8765, token=None):
+        self.broker = broker
+        broker_ref = broker
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.strip("/")
+                if token is not None and self.headers.get(TOKEN_HEADER) != token:
+                    self.send_error(403)
+                    return
+                if method not in METHODS:
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                kwargs = json.loads(self.rfile.read(length) or b"{}")
+                try:
+                    body = {"result": getattr(broker_ref, method)(**kwargs)}
+                    status = 200
+                except Exception as e:
+                    body = {"error": str(e)}
+                    status = 500
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # Sin una línea por petición en la consola del coordinador
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="broker-http",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HttpBroker(Broker):
+    """Cliente del BrokerServer con la misma interfaz que SqliteBroker."""
+
+    def __init__(self, url, timeout=60.0, token=None):
+        headers = {TOKEN_HEADER: token} if token else {}
+        self.client = httpx.Client(base_url=url.rstrip("/"), timeout=timeout, headers=headers)
+
+    def _call(self, method, **kwargs):
+        response = self.client.post(f"/{method}", json=kwargs)
+        if response.status_code == 403:
+            raise RuntimeError("❌ Broker remoto: token inválido")
+        body = response.json()
+        if response.status_code != 200:
+            raise RuntimeError(f"❌ Broker remoto ({method}): {body.get('error')}")
+        return body["result"]
+
+    def enqueue(self, job, pharmacy, shards):
+        return self._call("enqueue", job=job, pharmacy=pharmacy, shards=shards)
+
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, job=None):
+        return self._call("lease", worker=worker, lease_seconds=lease_seconds, job=job)
+
+    def extend(self, task_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._call("extend", task_id=task_id, worker=worker, lease_seconds=lease_seconds)
+
+    def complete(self, task_id, worker, records, dead_letters):
+        return self._call("complete", task_id=task_id, worker=worker, records=records,
+                          dead_letters=dead_letters)
+
+    def fail(self, task_id, worker, error):
+        return self._call("fail", task_id=task_id, worker=worker, error=str(error))
+
+    def counts(self, job=None):
+        return self._call("counts", job=job)
+
+    def results(self, job, pharmacy, kind="record"):
+        return self._call("results", job=job, pharmacy=pharmacy, kind=kind)
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,221 @@
+# 📁 Archivo: scraper_core/browser_pool.py
+#
+# Pool de navegadores compartido por los fast scrapers.
+# En vez de lanzar un Chromium por categoría, se mantiene un número fijo de
+# navegadores de larga vida compartidos por todas las corrutinas del motor
+# async. Cada URL recibe un contexto aislado (cookies, storage) y el navegador
+# se recicla después de N páginas o cuando la memoria (RSS) de los procesos de
+# Chromium se dispara. Un navegador que se cayó o se desconectó sale del pool y
+# se lanza otro en su lugar.
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+try:
+    import psutil
+except ImportError:  # Sin psutil no se mide RSS, solo se recicla por páginas
+    psutil = None
+
+DEFAULT_POOL_SIZE = 3
+DEFAULT_MAX_PAGES = 200
+DEFAULT_MAX_RSS_MB = 1024
+
+
+# 🧠 RSS total (MB) de los procesos hijos (drivers de Playwright + Chromium)
+def process_tree_rss_mb():
+    if psutil is None:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class PoolStats:
+    """Contadores de utilización del pool."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._counters = {"launches": 0, "recycles": 0, "crashes": 0, "pages": 0}
+        self._active = 0
+        self._peak_active = 0
+        self._busy_seconds = 0.0
+        self._peak_rss_mb = 0.0
+        self._started_at = None
+        self._finished_at = None
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def _lease_started(self):
+        with self._lock:
+            self._active += 1
+            self._peak_active = max(self._peak_active, self._active)
+
+    def _lease_finished(self, seconds):
+        rss = process_tree_rss_mb()
+        with self._lock:
+            self._active -= 1
+            self._counters["pages"] += 1
+            self._busy_seconds += seconds
+            if rss is not None:
+                self._peak_rss_mb = max(self._peak_rss_mb, rss)
+
+    # 📊 Métricas de utilización para dimensionar el pool
+    def stats(self):
+        end = self._finished_at or time.monotonic()
+        wall = (end - self._started_at) if self._started_at else 0.0
+        with self._lock:
+            capacity = wall * self.size
+            return {
+                "size": self.size,
+                "launches": self._counters["launches"],
+                "recycles": self._counters["recycles"],
+                "crashes": self._counters["crashes"],
+                "pages": self._counters["pages"],
+                "peak_active": self._peak_active,
+                "busy_seconds": round(self._busy_seconds, 2),
+                "wall_seconds": round(wall, 2),
+                # En el pool async varias páginas comparten navegador: puede superar 1.0
+                "utilisation": round(self._busy_seconds / capacity, 3) if capacity else 0.0,
+                "avg_active": round(self._busy_seconds / wall, 2) if wall else 0.0,
+                "peak_rss_mb": round(self._peak_rss_mb, 1) if psutil else None,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        print(
+            f"📊 Pool: {s['size']} navegadores | {s['pages']} páginas | "
+            f"{s['launches']} lanzamientos | {s['recycles']} reciclajes | {s['crashes']} caídos | "
+            f"utilización {s['utilisation'] * 100:.1f}% | activos prom. {s['avg_active']} | "
+            f"pico activos {s['peak_active']} | "
+            f"pico RSS {s['peak_rss_mb']} MB"
+        )
+
+
+class AsyncBrowserPool(PoolStats):
+    """Versión asyncio del pool: `size` navegadores compartidos por todas las corrutinas.
+
+    Cada préstamo crea un contexto aislado en el navegador con menos páginas
+    activas. Un navegador que debe reciclarse deja de recibir préstamos, se
+    lanza su reemplazo y se cierra cuando terminan sus páginas en curso.
+    """
+
+    def __init__(self, playwright, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                 max_rss_mb=DEFAULT_MAX_RSS_MB, headless=True, context_setup=None):
+        super().__init__(size)
+        self.playwright = playwright
+        self.context_setup = context_setup
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self._browsers = []
+        self._ready = False
+        self._launch_lock = asyncio.Lock()
+
+    async def _launch(self):
+        browser = await self.playwright.chromium.launch(headless=self.headless)
+        entry = {"browser": browser, "active": 0, "pages": 0, "draining": False}
+        self._browsers.append(entry)
+        self._count("launches")
+        return entry
+
+    async def start(self):
+        self._started_at = time.monotonic()
+        for _ in range(self.size):
+            await self._launch()
+        self._ready = True
+
+    def _over_rss(self):
+        rss = process_tree_rss_mb()
+        return rss is not None and rss / self.size > self.max_rss_mb
+
+    async def _retire(self, entry):
+        entry["draining"] = True
+        self._count("recycles")
+        await self._launch()
+
+    async def _close_if_idle(self, entry):
+        if entry["draining"] and entry["active"] == 0 and entry in self._browsers:
+            self._browsers.remove(entry)
+            try:
+                await entry["browser"].close()
+            except Exception as e:
+                print(f"⚠️ Error cerrando navegador: {e}")
+
+    # 💥 Navegadores caídos: fuera del pool y, si recibían préstamos, reemplazo.
+    # Sus páginas en curso fallan solas y se reintentan en otro navegador.
+    async def _replace_dead(self):
+        for entry in list(self._browsers):
+            if entry["browser"].is_connected():
+                continue
+            self._browsers.remove(entry)
+            self._count("crashes")
+            print("⚠️ Navegador desconectado; se lanza un reemplazo")
+            if not entry["draining"]:
+                await self._launch()
+
+    async def _pick(self):
+        async with self._launch_lock:
+            if not self._ready:
+                await self.start()
+            await self._replace_dead()
+            for entry in list(self._browsers):
+                if not entry["draining"] and entry["pages"] >= self.max_pages:
+                    await self._retire(entry)
+                    await self._close_if_idle(entry)
+            live = [e for e in self._browsers if not e["draining"]]
+            draining = any(e["draining"] for e in self._browsers)
+            if not draining and self._over_rss():
+                # Solo se recicla el navegador más usado para no vaciar el pool de golpe
+                oldest = max(live, key=lambda e: e["pages"])
+                if oldest["pages"] > 0:
+                    await self._retire(oldest)
+                    await self._close_if_idle(oldest)
+                    live = [e for e in self._browsers if not e["draining"]]
+            return min(live, key=lambda e: e["active"])
+
+    # 🔑 Préstamo de un contexto aislado + página
+    @asynccontextmanager
+    async def page(self):
+        entry = await self._pick()
+        entry["active"] += 1
+        context = None
+        start = None
+        try:
+            # Si el navegador se cae o context_setup falla, el finally igual
+            # libera el cupo: si no, un navegador en drenaje nunca se cierra
+            context = await entry["browser"].new_context()
+            if self.context_setup is not None:
+                await self.context_setup(context)
+            page = await context.new_page()
+            self._lease_started()
+            start = time.monotonic()
+            yield page
+        finally:
+            entry["active"] -= 1
+            if start is not None:
+                entry["pages"] += 1
+                self._lease_finished(time.monotonic() - start)
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._close_if_idle(entry)
+
+    async def close(self):
+        for entry in list(self._browsers):
+            try:
+                await entry["browser"].close()
+            except Exception:
+                pass
+        self._browsers.clear()
+        self._finished_at = time.monotonic()
@@ -0,0 +1,176 @@
+# 📁 Archivo: scraper_core/extract_runner.py
+#
+# Base async de los extractores de URLs. Un solo cliente httpx por corrida
+# (HTTP/2 si está instalado h2, si no HTTP/1.1 con keep-alive) reparte las
+# peticiones bajo un semáforo global y otro por host, con el limitador de tasa
+# adaptativo de siempre. Cada extractor escribe una corrutina por categoría
+# (que a su vez pide en paralelo las páginas cuando conoce el total) y
+# run_categories las corre a la vez, devolviendo el resultado en el orden
+# original de categorías: el JSON de extracted_urls queda igual que antes.
+#
+# El cliente reintenta con backoff los errores transitorios (timeouts, red,
+# 429, 5xx). Si una página igual falla, gather_pages la salta y la categoría
+# queda "parcial": se guarda lo que sí llegó y la ruta se anota en
+# <salida>.partial.json para que el diff del listado no la tome por completa.
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlparse
+
+import httpx
+
+from scraper_core.http_fetch import USER_AGENT
+from scraper_core.rate_limiter import get_rate_limiter
+from scraper_core.retry import RetryPolicy, classify_error, classify_status
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:  # Sin h2 se usa HTTP/1.1; el pool de conexiones se mantiene
+    HTTP2 = False
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 8
+
+
+def add_extract_args(parser):
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Peticiones simultáneas en total")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help="Peticiones simultáneas por host")
+
+
+# 🗂️ structured_categories → [(ruta, categoria, subcategoria)] en orden
+def category_routes(categories):
+    routes = []
+    for category, subcats in categories.items():
+        if subcats:
+            routes += [(f"{category}/{subcat}", category, subcat) for subcat in subcats]
+        else:
+            routes.append((category, category, None))
+    return routes
+
+
+class ExtractClient:
+    """Cliente async compartido por todas las categorías de un extractor."""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 headers=None, timeout=30, retry=None):
+        self.client = httpx.AsyncClient(
+            http2=HTTP2,
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "es-CL,es;q=0.9", **(headers or {})},
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+        self.global_sem = asyncio.Semaphore(concurrency)
+        self.host_sems = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self.limiter = get_rate_limiter()
+        self.retry = retry or RetryPolicy()
+        self.requests = 0
+        self.retries = 0
+        self.http_versions = defaultdict(int)
+
+    async def _send(self, method, url, **kwargs):
+        host = urlparse(url).netloc
+        async with self.global_sem, self.host_sems[host]:
+            await self.limiter.acquire_async(host)
+            start = time.monotonic()
+            resp = await self.client.request(method, url, **kwargs)
+            self.limiter.feedback_response(host, resp, time.monotonic() - start)
+        self.requests += 1
+        self.http_versions[resp.http_version] += 1
+        return resp
+
+    # check=False devuelve también las respuestas de error (p. ej. un 401 de sesión);
+    # los errores transitorios se reintentan en ambos casos
+    async def request(self, method, url, check=True, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                resp = await self._send(method, url, **kwargs)
+                kind = classify_status(resp.status_code) if resp.status_code >= 400 else None
+                if kind is None or not self.retry.should_retry(kind, attempt):
+                    break
+            except httpx.HTTPError as e:
+                if not self.retry.should_retry(classify_error(e), attempt):
+                    raise
+            self.retries += 1
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+        if check:
+            resp.raise_for_status()
+        return resp
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    def print_stats(self):
+        versions = ", ".join(f"{v}={n}" for v, n in sorted(self.http_versions.items()))
+        print(f"🌐 {self.requests} peticiones ({versions or 'ninguna'}) | {self.retries} reintentos")
+
+
+def describe_error(exc):
+    return str(exc) or type(exc).__name__
+
+
+# 📄 Páginas de una categoría en paralelo: las que fallan (ya reintentadas por
+# el cliente) se informan y se saltan → (páginas obtenidas, páginas perdidas)
+async def gather_pages(route, pages):
+    results = await asyncio.gather(*pages, return_exceptions=True)
+    lost = [r for r in results if isinstance(r, BaseException)]
+    for exc in lost:
+        print(f"⚠️ {route}: página perdida ({describe_error(exc)})")
+    return [r for r in results if not isinstance(r, BaseException)], len(lost)
+
+
+# 🚀 Todas las categorías a la vez; una que falla no frena a las demás
+# collect(ruta, categoria, subcategoria) devuelve (entradas, páginas perdidas);
+# con páginas perdidas la categoría se guarda igual y se marca como parcial
+async def run_categories(routes, collect):
+    results = await asyncio.gather(*(collect(*route) for route in routes), return_exceptions=True)
+    result, errors, partial = {}, {}, {}
+    for (route, *_), outcome in zip(routes, results):
+        if isinstance(outcome, Exception):
+            errors[route] = describe_error(outcome)
+            print(f"❌ Error en {route}: {errors[route]}")
+            continue
+        result[route], lost = outcome
+        if lost:
+            partial[route] = lost
+            print(f"⚠️ {route}: parcial, {lost} páginas perdidas")
+    return result, errors, partial
+
+
+def partial_report_path(output_file):
+    return Path(output_file).with_suffix(".partial.json")
+
+
+# 🧾 {ruta: páginas perdidas} de la última extracción; sin parciales se borra
+def save_partial_report(output_file, partial):
+    path = partial_report_path(output_file)
+    if not partial:
+        path.unlink(missing_ok=True)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(partial, f, indent=2, ensure_ascii=False)
+
+
+def load_partial_report(output_file):
+    try:
+        with open(partial_report_path(output_file), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
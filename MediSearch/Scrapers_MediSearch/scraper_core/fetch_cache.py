@@ -0,0 +1,148 @@
+# 📁 Archivo: scraper_core/fetch_cache.py
+#
+# Caché de descarga por URL de producto (SQLite junto a la salida).
+# Por cada URL guarda el ETag / Last-Modified de la respuesta, una huella de la
+# zona de precio (texto normalizado + atributos content/src de los
+# SPEC["hash_selectors"]) y los campos de extract_data del último registro.
+# En la corrida siguiente:
+#   - el GET lleva If-None-Match / If-Modified-Since y un 304 reutiliza el
+#     registro anterior sin descargar, renderizar ni parsear;
+#   - si el sitio no soporta validadores (o el ETag cambia con cada respuesta)
+#     y la huella del HTML coincide, se salta extract_data y se reutiliza el
+#     registro anterior.
+# Los validadores solo se guardan si el registro salió de esa misma respuesta
+# HTTP: si hubo que renderizar, el HTML servido es un cascarón y un 304 de ese
+# cascarón no dice nada del precio.
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+# Atributos que forman parte de la huella (precios en content, imagen en src)
+HASH_ATTRS = ("content", "src")
+FLUSH_EVERY = 500
+
+CachedPage = namedtuple("CachedPage", "etag last_modified content_hash data")
+
+
+# Mismo caché para corridas completas, --refresh-budget e --incremental
+def fetch_cache_path(spec):
+    return Path(spec["output_file"]).parent / f"{spec['key']}.fetch_cache.sqlite"
+
+
+# 🔏 Huella de la zona de precio; None si ningún selector encontró nada
+def region_fingerprint(soup, selectors):
+    digest = hashlib.sha1()
+    found = False
+    for selector in selectors:
+        for node in soup.select(selector):
+            found = True
+            digest.update(" ".join(node.get_text().split()).encode("utf-8"))
+            for tag in [node] + node.select(", ".join(f"[{attr}]" for attr in HASH_ATTRS)):
+                for attr in HASH_ATTRS:
+                    value = tag.get(attr)
+                    if value:
+                        digest.update(f"\x1e{attr}={value}".encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest() if found else None
+
+
+def response_validators(resp):
+    return resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+
+def conditional_headers(cached):
+    headers = {}
+    if cached is not None and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+class FetchCache:
+    """Validadores, huella y últimos campos por URL; escrituras por lotes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self.entries = {
+            url: CachedPage(etag, last_modified, content_hash, tuple(json.loads(data)))
+            for url, etag, last_modified, content_hash, data in self._conn.execute(
+                "SELECT url, etag, last_modified, content_hash, data FROM pages")
+        }
+        self._pending = {}
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    def store(self, url, validators, content_hash, data):
+        etag, last_modified = validators or (None, None)
+        page = CachedPage(etag, last_modified, content_hash, tuple(data))
+        with self._lock:
+            self.entries[url] = page
+            self._pending[url] = page
+            if len(self._pending) >= FLUSH_EVERY:
+                self._flush()
+
+    def _flush(self):
+        now = time.time()
+        self._conn.executemany(
+            """INSERT INTO pages (url, etag, last_modified, content_hash, data, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET etag = excluded.etag,
+                   last_modified = excluded.last_modified, content_hash = excluded.content_hash,
+                   data = excluded.data, updated_at = excluded.updated_at""",
+            [(url, p.etag, p.last_modified, p.content_hash, json.dumps(p.data, ensure_ascii=False), now)
+             for url, p in self._pending.items()])
+        self._conn.commit()
+        self._pending.clear()
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._flush()
+            self._conn.close()
+
+
+class SkipStats:
+    """Productos reutilizados del caché (304 o huella igual) vs. parseados de nuevo."""
+
+    def __init__(self, pharmacy):
+        self.pharmacy = pharmacy
+        self.counts = Counter()
+
+    def record(self, outcome):
+        self.counts[outcome] += 1
+
+    @property
+    def skipped(self):
+        return self.counts["not_modified"] + self.counts["unchanged"]
+
+    def ratio(self):
+        total = self.skipped + self.counts["parsed"]
+        return self.skipped / total if total else 0.0
+
+    def print_stats(self):
+        print(f"⏭️ {self.pharmacy}: {self.counts['not_modified']} sin cambios por 304 | "
+              f"{self.counts['unchanged']} por huella | {self.counts['parsed']} parseados | "
+              f"salto {self.ratio() * 100:.1f}%")
@@ -0,0 +1,97 @@
+# 📁 Archivo: scraper_core/html_parser.py
+#
+# Backends de parseo intercambiables para extract_data.
+# Todos entregan un objeto con la API que usan los extract_data actuales
+# (select_one, select, get_text, has_attr, tag["attr"]), así la lógica de
+# Ahumada, Cruz Verde y Salcobrand no cambia al pasar a un parser rápido.
+#
+#   html.parser → BeautifulSoup puro Python (el original, el más lento)
+#   lxml        → BeautifulSoup sobre lxml (C)
+#   selectolax  → motor lexbor (C) con un adaptador mínimo tipo BeautifulSoup
+#
+# Los selectores CSS quedan compilados en caché: soupsieve cachea cada
+# selector compilado para BeautifulSoup y lexbor compila el suyo en C.
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+
+# Etiquetas cuyo texto BeautifulSoup no incluye en get_text()
+NON_TEXT_TAGS = ["script", "style", "template"]
+
+
+def available_backends():
+    backends = ["html.parser"]
+    if lxml is not None:
+        backends.append("lxml")
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+
+# 🧠 Backend más rápido instalado
+def default_backend():
+    return available_backends()[-1]
+
+
+class FastNode:
+    """Adaptador de un nodo lexbor con la API de bs4 que usan los extract_data."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select_one(self, selector):
+        found = self.node.css_first(selector)
+        return FastNode(found) if found is not None else None
+
+    def select(self, selector):
+        return [FastNode(n) for n in self.node.css(selector)]
+
+    def get_text(self, strip=False):
+        return self.node.text(deep=True, strip=strip)
+
+    def has_attr(self, key):
+        return key in self.node.attributes
+
+    def get(self, key, default=None):
+        value = self.node.attributes.get(key, default)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.node.attributes[key]
+        return "" if value is None else value
+
+    def __bool__(self):
+        return True
+
+
+def _selectolax_soup(html):
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(NON_TEXT_TAGS)
+    return FastNode(tree.root)
+
+
+# 🏗️ Construye el "soup" con el backend pedido
+def make_soup(html, backend=None):
+    backend = backend or default_backend()
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise ValueError("❌ selectolax no está instalado (pip install selectolax)")
+        return _selectolax_soup(html)
+    if backend == "lxml" and lxml is None:
+        raise ValueError("❌ lxml no está instalado (pip install lxml)")
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"❌ Backend de parseo desconocido: {backend}")
+    return BeautifulSoup(html, backend)
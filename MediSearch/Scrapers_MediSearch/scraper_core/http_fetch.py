@@ -0,0 +1,62 @@
+# 📁 Archivo: scraper_core/http_fetch.py
+#
+# Descarga HTTP directa de páginas de producto.
+# La mayoría de los datos que lee extract_data vienen renderizados desde el
+# servidor, así que primero se intenta un GET con un cliente async compartido
+# y solo se escala al navegador cuando faltan los selectores requeridos.
+
+import httpx
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Si tras este número de intentos el HTTP casi nunca sirve, se deja de intentar
+PROBE_SAMPLE = 50
+MIN_HIT_RATIO = 0.05
+
+
+# 🌐 Cliente async con conexiones reutilizables
+def make_http_client(max_connections):
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT, "Accept-Language": "es-CL,es;q=0.9"},
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections),
+        timeout=20,
+        follow_redirects=True,
+    )
+
+
+# ✅ ¿El HTML trae todo lo que extract_data necesita?
+def has_required(soup, selectors):
+    return all(soup.select_one(sel) is not None for sel in selectors)
+
+
+class HttpFirstStats:
+    """Cuenta aciertos HTTP vs. escalamientos al navegador de una farmacia."""
+
+    def __init__(self, pharmacy):
+        self.pharmacy = pharmacy
+        self.http_hits = 0
+        self.fallbacks = 0
+        self.http_errors = 0
+
+    @property
+    def attempts(self):
+        return self.http_hits + self.fallbacks
+
+    # 🧠 Desactiva el modo HTTP si la farmacia claramente lo renderiza en cliente
+    def http_worthwhile(self):
+        if self.attempts < PROBE_SAMPLE:
+            return True
+        return self.http_hits / self.attempts >= MIN_HIT_RATIO
+
+    def ratio(self):
+        return self.http_hits / self.attempts if self.attempts else 0.0
+
+    def print_stats(self):
+        print(
+            f"🌐 {self.pharmacy}: {self.http_hits} por HTTP | {self.fallbacks} al navegador "
+            f"({self.http_errors} errores HTTP) | acierto {self.ratio() * 100:.1f}%"
+        )
@@ -0,0 +1,108 @@
+# 📁 Archivo: scraper_core/journal.py
+#
+# Bitácora persistente (SQLite) del progreso de una corrida.
+# Registra cada URL terminada por categoría con su resultado, para que
+# `--resume` salte lo ya guardado y solo reintente lo fallido o faltante.
+# Las URLs se marcan "ok" recién cuando el escritor JSONL las bajó a disco.
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    categoria TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (categoria, url)
+)
+"""
+
+
+def journal_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.stem + ".journal.sqlite")
+
+
+# 🧠 "categoria/subcategoria" a partir de un registro ya escrito
+def record_key(record):
+    categoria = record["category"]
+    if record.get("subcategory"):
+        categoria = f"{categoria}/{record['subcategory']}"
+    return categoria, record["url"]
+
+
+class ScrapeJournal:
+    """Progreso por (categoria, url); seguro para usar desde varios hilos."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def reset(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM progress")
+            self._conn.commit()
+
+    def _upsert(self, rows):
+        self._conn.executemany(
+            """INSERT INTO progress (categoria, url, status, error, attempts, updated_at)
+               VALUES (?, ?, ?, ?, 1, ?)
+               ON CONFLICT (categoria, url) DO UPDATE SET
+                   status = excluded.status,
+                   error = excluded.error,
+                   attempts = progress.attempts + 1,
+                   updated_at = excluded.updated_at""",
+            rows,
+        )
+        self._conn.commit()
+
+    def mark_ok(self, keys):
+        now = time.time()
+        with self._lock:
+            self._upsert([(categoria, url, "ok", None, now) for categoria, url in keys])
+
+    def mark_failed(self, categoria, url, error):
+        with self._lock:
+            self._upsert([(categoria, url, "failed", str(error)[:500], time.time())])
+
+    def done_keys(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT categoria, url FROM progress WHERE status = 'ok'").fetchall()
+        return set(rows)
+
+    # 🔁 Lo que ya está en el .part cuenta como terminado aunque la bitácora no alcanzó a anotarlo
+    def reconcile(self, jsonl_file):
+        jsonl_file = Path(jsonl_file)
+        if not jsonl_file.exists():
+            return 0
+        keys = []
+        with open(jsonl_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    keys.append(record_key(json.loads(line)))
+                except (ValueError, KeyError):
+                    continue  # Línea truncada por la caída
+        self.mark_ok(keys)
+        return len(keys)
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM progress GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,159 @@
+# 📁 Archivo: scraper_core/jsonl_writer.py
+#
+# Escritor JSONL único para una corrida de scraping.
+# Un hilo dedicado consume los registros desde una cola y los escribe en
+# lotes sobre "<salida>.part"; al cerrar se hace fsync y un rename atómico
+# sobre el archivo final. Así ningún registro se intercala, los datos llegan
+# a disco a medida que se parsean y la memoria no depende del tamaño de la
+# categoría.
+#
+# Política de fsync:
+#   never → solo flush al sistema operativo
+#   batch → fsync después de cada lote
+#   close → un único fsync antes del rename (por defecto)
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+
+FSYNC_POLICIES = ("never", "batch", "close")
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 2.0
+QUEUE_MAXSIZE = 10000
+
+_STOP = object()
+
+
+def part_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + ".part")
+
+
+# ✂️ Quita una última línea a medio escribir (caída durante un lote)
+def truncate_partial_line(path):
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+class JsonlWriter:
+    """Hilo escritor con lotes, fsync configurable y rename atómico al cerrar."""
+
+    def __init__(self, output_file, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync="close", on_flush=None,
+                 timings=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"❌ Política de fsync desconocida: {fsync}")
+        self.output_file = Path(output_file)
+        self.part_file = part_path(output_file)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.on_flush = on_flush
+        self.timings = timings
+        self.records = 0
+        self.batches = 0
+        self.bytes = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=QUEUE_MAXSIZE)
+        self._thread = None
+
+    # ▶️ Con resume=True se sigue escribiendo sobre el .part (o el archivo final) anterior
+    def start(self, resume=False):
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            if not self.part_file.exists() and self.output_file.exists():
+                shutil.copyfile(self.output_file, self.part_file)
+            if self.part_file.exists():
+                truncate_partial_line(self.part_file)
+            self._file = open(self.part_file, "a", encoding="utf-8")
+        else:
+            self._file = open(self.part_file, "w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, record):
+        self._queue.put(record)
+
+    # Sin bloquear (para el event loop): False si la cola está llena
+    def try_write(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            return False
+        return True
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        start = time.monotonic()
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in batch]
+        chunk = "".join(lines)
+        self._file.write(chunk)
+        self._file.flush()
+        if self.fsync == "batch":
+            os.fsync(self._file.fileno())
+        seconds = time.monotonic() - start
+        if self.timings is not None:
+            self.timings.record("write", seconds)
+        if self.on_flush is not None:
+            self.on_flush(batch, seconds)
+        self.records += len(lines)
+        self.batches += 1
+        self.bytes += len(chunk.encode("utf-8"))
+
+    def _run(self):
+        lines = []
+        last_flush = time.monotonic()
+        stopped = False
+        try:
+            while True:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    record = None
+                if record is _STOP:
+                    stopped = True
+                    break
+                if record is not None:
+                    lines.append(record)
+                if len(lines) >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                    self._flush(lines)
+                    lines = []
+                    last_flush = time.monotonic()
+            self._flush(lines)
+        except Exception as e:
+            self.error = e
+            print(f"❌ Error escribiendo {self.part_file}: {e}")
+            # Se sigue vaciando la cola para no bloquear a los productores
+            while not stopped and self._queue.get() is not _STOP:
+                pass
+
+    # 💾 Vacía la cola, fsync y rename atómico sobre el archivo final
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        if self.error is None:
+            os.replace(self.part_file, self.output_file)
+        return self.error is None
+
+    # ⚠️ Cierra sin publicar: el .part queda en disco para revisar o reanudar
+    def abort(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+
+    def print_stats(self):
+        print(f"💾 {self.output_file.name}: {self.records} registros en {self.batches} lotes "
+              f"({self.bytes / 1024:.1f} KB, fsync={self.fsync})")
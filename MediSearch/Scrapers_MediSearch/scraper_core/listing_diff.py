@@ -0,0 +1,237 @@
+# 📁 Archivo: scraper_core/listing_diff.py
+#
+# Scraping incremental guiado por el listado.
+# Los extractores de URLs son baratos (Algolia, products/search, Search-UpdateGrid)
+# y renderizar la página de producto es caro. Este modo compara el listado
+# actual (extracted_urls, con los "fields" de precio/stock cuando el extractor
+# los guardó) con el que vio la corrida incremental anterior y solo baja:
+#   - productos nuevos en el listado,
+#   - productos cuyo precio o stock de listado cambió (o que cambiaron de categoría),
+#   - una muestra rotativa de los que no cambiaron, empezando por los que hace
+#     más tiempo no se bajan: con --diff-sample 0.05 todo el catálogo pasa por
+#     el navegador cada ~20 corridas aunque el listado no muestre cambios.
+# Los productos que desaparecieron del listado salen del JSONL y quedan como
+# tombstones en <salida>.tombstones.jsonl, pero solo si todas sus categorías
+# llegaron completas y con productos en el listado actual: una categoría que
+# falló, vino vacía o quedó parcial (<listado>.partial.json) no borra nada.
+# Si aun así se eliminaría más de --max-tombstone-ratio del estado, la corrida
+# no crea tombstones y conserva esos productos. El estado vive en
+# <salida>.listing_state.json; sin estado, la salida actual es la línea base.
+
+import json
+import math
+import os
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from scraper_core.async_engine import normalize_entry, run_async_scrape
+from scraper_core.extract_runner import load_partial_report
+from scraper_core.journal import record_key
+from scraper_core.refresh_scheduler import merge_fresh_records
+
+# Fracción de productos sin cambios que se vuelve a bajar en cada corrida
+DEFAULT_DIFF_SAMPLE = 0.05
+# Campos de listado que, si cambian, obligan a bajar la página
+LISTING_FIELDS = ("offer_price", "normal_price", "stock")
+# Máximo de tombstones por corrida como fracción del estado anterior
+DEFAULT_MAX_TOMBSTONE_RATIO = 0.2
+
+
+def add_diff_args(parser):
+    parser.add_argument("--incremental", action="store_true",
+                        help="Bajar solo productos nuevos, con cambios en el listado y una muestra rotativa")
+    parser.add_argument("--diff-sample", type=float, default=DEFAULT_DIFF_SAMPLE,
+                        help="Productos sin cambios a bajar igual (fracción < 1 o cantidad)")
+    parser.add_argument("--max-tombstone-ratio", type=float, default=DEFAULT_MAX_TOMBSTONE_RATIO,
+                        help="Si se eliminaría más de esta fracción del estado, no crear tombstones")
+
+
+# 🏷️ Precio/stock del listado; None si el extractor no guardó campos
+def listing_signature(meta):
+    fields = meta.get("fields")
+    if not fields:
+        return None
+    return [fields.get(field) for field in LISTING_FIELDS]
+
+
+# 🗂️ {url: {"categories", "listing", "id"}} del listado actual
+def listing_snapshot(spec, all_data):
+    snapshot = {}
+    for categoria, entries in all_data.items():
+        for entry in entries:
+            url, meta = normalize_entry(entry)
+            item = snapshot.setdefault(url, {"categories": [], "listing": listing_signature(meta),
+                                             "id": spec["extract_id"](url) or meta.get("sku")})
+            if categoria not in item["categories"]:
+                item["categories"].append(categoria)
+    return snapshot
+
+
+def listing_changed(before, now):
+    if sorted(before["categories"]) != sorted(now["categories"]):
+        return True
+    # Sin precios en alguno de los dos listados no hay con qué comparar
+    return None not in (before["listing"], now["listing"]) and before["listing"] != now["listing"]
+
+
+class ListingDiff:
+    """Decide qué URLs bajar comparando el listado actual con el de la corrida anterior."""
+
+    def __init__(self, spec, sample=DEFAULT_DIFF_SAMPLE, now=None,
+                 max_tombstone_ratio=DEFAULT_MAX_TOMBSTONE_RATIO):
+        self.spec = spec
+        output = Path(spec["output_file"])
+        self.output_file = output
+        self.partial_output = output.with_name(output.stem + ".incremental.jsonl")
+        self.state_file = output.with_name(output.stem + ".listing_state.json")
+        self.tombstones_file = output.with_name(output.stem + ".tombstones.jsonl")
+        self.sample = sample
+        self.max_tombstone_ratio = max_tombstone_ratio
+        self.now = now or time.time()
+        self.state = {}
+        if self.state_file.exists():
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        else:
+            self.state = self.baseline_state()
+        self.snapshot = {}
+        self.selected = set()
+        self.removed = []
+        self.held = []
+
+    # 🧱 Primera corrida incremental: lo que ya está en el JSONL cuenta como
+    # visto (con la fecha del archivo) y solo lo que falta se trata como nuevo
+    def baseline_state(self):
+        if not self.output_file.exists():
+            return {}
+        scraped_at = self.output_file.stat().st_mtime
+        state = {}
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                categoria, url = record_key(record)
+                item = state.setdefault(url, {"categories": [], "listing": None,
+                                              "id": record.get("id"), "scraped_at": scraped_at})
+                if categoria not in item["categories"]:
+                    item["categories"].append(categoria)
+        print(f"🧱 {self.spec['pharmacy']}: sin estado previo, línea base con "
+              f"{len(state)} URLs de {self.output_file.name}")
+        return state
+
+    # 🛡️ Categorías que el listado trae completas y con productos: solo ahí
+    # la ausencia de una URL significa que el producto salió del catálogo
+    def complete_categories(self, all_data):
+        input_file = self.spec.get("input_file")
+        partial = load_partial_report(input_file) if input_file else {}
+        return {categoria for categoria, entries in all_data.items()
+                if entries and categoria not in partial}
+
+    # 🪦 Ausentes del listado → (a tombstone, a conservar)
+    def split_removed(self, all_data):
+        complete = self.complete_categories(all_data)
+        missing = [url for url in self.state if url not in self.snapshot]
+        removed = [url for url in missing
+                   if self.state[url]["categories"] and set(self.state[url]["categories"]) <= complete]
+        held = sorted(set(missing) - set(removed))
+        if self.state and len(removed) > len(self.state) * self.max_tombstone_ratio:
+            print(f"🛑 {self.spec['pharmacy']}: {len(removed)}/{len(self.state)} URLs saldrían del "
+                  f"listado (más de {self.max_tombstone_ratio * 100:.0f}%); no se crean tombstones")
+            return [], held + removed
+        return removed, held
+
+    def sample_size(self, unchanged):
+        if self.sample < 1:
+            return math.ceil(unchanged * self.sample)
+        return min(unchanged, int(self.sample))
+
+    # 🎯 all_data filtrado a nuevos + cambiados + muestra rotativa
+    def select(self, all_data):
+        self.snapshot = listing_snapshot(self.spec, all_data)
+        new, changed, unchanged = set(), set(), []
+        for url, item in self.snapshot.items():
+            before = self.state.get(url)
+            if before is None:
+                new.add(url)
+            elif listing_changed(before, item):
+                changed.add(url)
+            else:
+                unchanged.append(url)
+        # Los menos recientes primero; el crc32 desempata sin sesgo por categoría
+        unchanged.sort(key=lambda url: (self.state[url].get("scraped_at") or 0, zlib.crc32(url.encode())))
+        sampled = set(unchanged[:self.sample_size(len(unchanged))])
+        self.selected = new | changed | sampled
+        self.removed, self.held = self.split_removed(all_data)
+
+        total = len(self.snapshot)
+        share = len(self.selected) / total * 100 if total else 0.0
+        print(f"🔎 {self.spec['pharmacy']}: {len(new)} nuevos | {len(changed)} con cambios | "
+              f"{len(sampled)} de muestra | {len(self.removed)} eliminados | "
+              f"{len(self.held)} conservados sin listado → "
+              f"{len(self.selected)}/{total} URLs a bajar ({share:.1f}%)")
+        return {
+            categoria: [e for e in entries if normalize_entry(e)[0] in self.selected]
+            for categoria, entries in all_data.items()
+        }
+
+    def write_tombstones(self):
+        if not self.removed:
+            return
+        removed_at = datetime.fromtimestamp(self.now).isoformat(timespec="seconds")
+        with open(self.tombstones_file, "a", encoding="utf-8") as f:
+            for url in self.removed:
+                before = self.state[url]
+                f.write(json.dumps({
+                    "pharmacy": self.spec["pharmacy"],
+                    "id": before.get("id"),
+                    "url": url,
+                    "categories": before["categories"],
+                    "removed": True,
+                    "removed_at": removed_at,
+                }, ensure_ascii=False) + "\n")
+        print(f"🪦 {len(self.removed)} tombstones → {self.tombstones_file.name}")
+
+    # 🧩 Mezcla + tombstones + estado. Lo que se eligió pero no se pudo bajar
+    # conserva su estado anterior y vuelve a elegirse en la próxima corrida;
+    # lo conservado sin listado mantiene su registro y su estado tal cual.
+    def commit(self):
+        current = {(categoria, url) for url, item in self.snapshot.items()
+                   for categoria in item["categories"]}
+        current |= {(categoria, url) for url in self.held for categoria in self.state[url]["categories"]}
+        fresh, _ = merge_fresh_records(self.output_file, self.partial_output,
+                                       lambda record: record_key(record) in current)
+        scraped = {url for _, url in fresh}
+        self.write_tombstones()
+
+        state = {}
+        for url, item in self.snapshot.items():
+            if url in scraped:
+                state[url] = dict(item, scraped_at=self.now)
+            elif url in self.selected:
+                if url in self.state:
+                    state[url] = self.state[url]
+            else:
+                state[url] = dict(item, scraped_at=self.state[url].get("scraped_at"))
+        for url in self.held:
+            state[url] = self.state[url]
+        tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.state_file)
+        missed = len(self.selected - scraped)
+        if missed:
+            print(f"⚠️ {missed} URLs elegidas no se pudieron bajar; se reintentan en la próxima corrida")
+
+
+# 🚀 Corrida incremental: solo lo que el listado dice que cambió (+ muestra)
+def run_incremental_scrape(spec, all_data, sample=DEFAULT_DIFF_SAMPLE,
+                           max_tombstone_ratio=DEFAULT_MAX_TOMBSTONE_RATIO, **options):
+    diff = ListingDiff(spec, sample=sample, max_tombstone_ratio=max_tombstone_ratio)
+    selected = diff.select(all_data)
+    engine = run_async_scrape(dict(spec, output_file=diff.partial_output), selected, **options)
+    diff.commit()
+    return engine
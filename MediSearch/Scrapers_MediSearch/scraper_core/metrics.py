@@ -0,0 +1,308 @@
+# 📁 Archivo: scraper_core/metrics.py
+#
+# Instrumentación de las corridas de scraping, sin dependencias externas.
+#   - Contadores, gauges e histogramas con labels (pharmacy, category, phase...)
+#     en formato de texto Prometheus: un endpoint /metrics (--metrics-port) o
+#     un snapshot .prom para el textfile collector de node_exporter.
+#   - Logs JSON (una línea por evento) para filtrar con jq o cargar en otra parte.
+# Con el histograma de fases (http, goto, ready, content, parse, write) se ve si
+# una corrida lenta se debió a la red, al navegador o al parseo.
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter as Tally
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+LOGS_DIR = Path(__file__).resolve().parents[2] / "logs"
+
+SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 60)
+BYTES_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels, value=1):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    # Para totales que se cuentan en otro lado (p. ej. el limitador de tasa);
+    # nunca retrocede, así que muestrear dos veces no duplica
+    def set_total(self, labels, value):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, 0), value)
+
+    def render(self):
+        with self._lock:
+            return self.header() + [f"{self.name}{_format_labels(k)} {v}"
+                                    for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, labels, value):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def render(self):
+        with self._lock:
+            return self.header() + [f"{self.name}{_format_labels(k)} {v}"
+                                    for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    # Estado por labels: [conteos por bucket, suma, total de observaciones]
+    def observe(self, labels, value):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {n}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(total, 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso, renderizable en formato Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, help_text, *args):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, *args)
+            return self._metrics[name]
+
+    def counter(self, name, help_text):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=SECONDS_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # 💾 Escritura atómica (el textfile collector nunca lee un archivo a medias)
+    def write_snapshot(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    # 🌐 GET /metrics en un hilo aparte
+    def serve(self, port, host="127.0.0.1"):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# 📝 Logger JSON a archivo (una línea por evento)
+def get_json_logger(path):
+    logger = logging.getLogger(f"medisearch.{Path(path).stem}")
+    if not logger.handlers:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class PhaseSink:
+    """Recibe record(fase, segundos) y lo reparte entre PhaseTimings y el histograma."""
+
+    def __init__(self, timings, metrics, category):
+        self.timings = timings
+        self.metrics = metrics
+        self.category = category
+
+    def record(self, phase, seconds):
+        self.timings.record(phase, seconds)
+        self.metrics.phase(phase, seconds, self.category)
+
+
+class ScrapeMetrics:
+    """Métricas y eventos de una farmacia sobre el registro del proceso."""
+
+    def __init__(self, pharmacy, json_log=None, registry=None):
+        self.pharmacy = pharmacy
+        self.registry = registry or get_registry()
+        r = self.registry
+        self.phase_seconds = r.histogram(
+            "medisearch_phase_seconds", "Duración por fase (http, goto, ready, content, parse, write)")
+        self.content_bytes = r.histogram(
+            "medisearch_content_bytes", "Tamaño del HTML descargado", BYTES_BUCKETS)
+        self.pages = r.counter(
+            "medisearch_pages_total", "Productos procesados por resultado (ok/failed)")
+        self.records = r.counter(
+            "medisearch_records_written_total", "Registros escritos al JSONL, por categoría")
+        self.retries = r.counter("medisearch_retries_total", "Reintentos por categoría y clase de error")
+        self.failures = r.counter(
+            "medisearch_failures_total", "URLs que terminaron en el dead-letter, por clase de error")
+        self.pages_per_second = r.gauge("medisearch_pages_per_second", "Productos por segundo de la corrida")
+        self.browser_rss = r.gauge(
+            "medisearch_browser_rss_megabytes", "RSS de los procesos hijos (navegadores y parsers)")
+        self.host_rate = r.gauge(
+            "medisearch_host_rate_per_second", "Tasa actual del limitador AIMD por host")
+        self.host_paused = r.gauge(
+            "medisearch_host_paused", "1 si el host está en pausa por Retry-After")
+        self.host_requests = r.counter(
+            "medisearch_host_requests_total", "Peticiones autorizadas por el limitador, por host")
+        self.host_throttles = r.counter(
+            "medisearch_host_throttles_total", "Eventos de throttle (429, 5xx, latencia alta) por host")
+        self.logger = get_json_logger(json_log) if json_log else None
+        self.started_at = time.monotonic()
+        self.completed = 0
+
+    def sink(self, timings, category):
+        return PhaseSink(timings, self, category)
+
+    def phase(self, phase, seconds, category):
+        self.phase_seconds.observe(
+            {"pharmacy": self.pharmacy, "category": category, "phase": phase}, seconds)
+
+    def content(self, size, category):
+        self.content_bytes.observe({"pharmacy": self.pharmacy, "category": category}, size)
+
+    def page_ok(self, url, category, via):
+        self.completed += 1
+        self.pages.inc({"pharmacy": self.pharmacy, "category": category, "result": "ok"})
+        self.event("page_ok", url=url, category=category, via=via)
+
+    def page_failed(self, url, category, kind, attempts, error):
+        self.completed += 1
+        self.pages.inc({"pharmacy": self.pharmacy, "category": category, "result": "failed"})
+        self.failures.inc({"pharmacy": self.pharmacy, "category": category, "kind": kind})
+        self.event("page_failed", level=logging.WARNING, url=url, category=category, kind=kind,
+                   attempts=attempts, error=str(error)[:300])
+
+    def retry(self, url, kind, attempt, delay, category):
+        self.retries.inc({"pharmacy": self.pharmacy, "category": category, "kind": kind})
+        self.event("retry", url=url, category=category, kind=kind, attempt=attempt,
+                   delay_s=round(delay, 2))
+
+    # 💾 Un lote puede mezclar categorías: cada una presente suma una
+    # observación de write (la duración del lote) y sus registros van al contador
+    def records_written(self, records, seconds):
+        for category, count in Tally(record["category"] for record in records).items():
+            self.phase("write", seconds, category)
+            self.records.inc({"pharmacy": self.pharmacy, "category": category}, count)
+
+    # 📈 Gauges que se refrescan periódicamente; rate_limits es
+    # HostRateLimiter.snapshot() (el limitador es del proceso: van todos los hosts)
+    def sample(self, rss_mb, rate_limits=None):
+        elapsed = time.monotonic() - self.started_at
+        labels = {"pharmacy": self.pharmacy}
+        self.pages_per_second.set(labels, round(self.completed / elapsed, 3) if elapsed else 0.0)
+        if rss_mb is not None:
+            self.browser_rss.set(labels, round(rss_mb, 1))
+        for host, state in (rate_limits or {}).items():
+            host_labels = {"host": host}
+            self.host_rate.set(host_labels, state["rate"])
+            self.host_paused.set(host_labels, int(state["paused"]))
+            self.host_requests.set_total(host_labels, state["requests"])
+            self.host_throttles.set_total(host_labels, state["throttles"])
+
+    def event(self, name, level=logging.INFO, **fields):
+        if self.logger is not None:
+            self.logger.log(level, name, extra={"fields": dict(fields, pharmacy=self.pharmacy)})
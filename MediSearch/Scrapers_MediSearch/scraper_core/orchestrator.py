@@ -0,0 +1,249 @@
+# 📁 Archivo: scraper_core/orchestrator.py
+#
+# Orquestador DAG para la cadena de scraping.
+# Cada etapa declara sus dependencias, sus archivos de entrada y salida y
+# cuánta CPU/memoria reserva. Las etapas listas se lanzan en paralelo
+# mientras quepan en el presupuesto global, así las farmacias independientes
+# avanzan a la vez.
+#
+# Caché estilo make: se guarda un hash del contenido de las entradas (y del
+# comando) por etapa; si no cambió, las salidas existen y no venció su
+# max_age, la etapa se salta. Cada ejecución registra su duración.
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_STAGE_MEMORY_MB = 256
+
+
+def default_cpu_budget():
+    return os.cpu_count() or 2
+
+
+# 🧠 70% de la RAM total (o 4 GB si no hay psutil)
+def default_memory_budget_mb():
+    if psutil is None:
+        return 4096
+    return int(psutil.virtual_memory().total / (1024 * 1024) * 0.7)
+
+
+def _hash_path(digest, path):
+    path = Path(path)
+    if path.is_dir():
+        for child in sorted(path.rglob("*")):
+            if child.is_file() and "__pycache__" not in child.parts:
+                digest.update(str(child.relative_to(path)).encode("utf-8"))
+                digest.update(child.read_bytes())
+    elif path.is_file():
+        digest.update(path.read_bytes())
+    else:
+        digest.update(b"<missing>")
+
+
+class Stage:
+    """Nodo del DAG: un comando externo (cmd) o una función Python (func).
+
+    `func` devuelve la lista de archivos que produjo, para las etapas cuyas
+    salidas no se conocen de antemano (p. ej. carpetas con fecha).
+    """
+
+    def __init__(self, name, deps=(), inputs=(), outputs=(), cmd=None, cwd=None, func=None,
+                 cpu=1, memory_mb=DEFAULT_STAGE_MEMORY_MB, max_age=None):
+        self.name = name
+        self.deps = list(deps)
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.cmd = cmd
+        self.cwd = cwd
+        self.func = func
+        self.cpu = cpu
+        self.memory_mb = memory_mb
+        self.max_age = max_age
+
+    def input_hash(self):
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.cmd or getattr(self.func, "__name__", "")).encode("utf-8"))
+        for path in self.inputs:
+            digest.update(str(path).encode("utf-8"))
+            _hash_path(digest, path)
+        return digest.hexdigest()
+
+
+class StageCache:
+    """Hashes de entrada y resultado de la última ejecución de cada etapa."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self._lock = threading.Lock()
+
+    def fresh(self, stage, input_hash):
+        entry = self.entries.get(stage.name)
+        if not entry or entry.get("status") != "ok" or entry.get("input_hash") != input_hash:
+            return False
+        if stage.max_age is not None and time.time() - entry["finished_at"] > stage.max_age:
+            return False
+        return all(Path(p).exists() for p in entry.get("outputs", []))
+
+    def store(self, stage, input_hash, outputs, duration, status):
+        with self._lock:
+            self.entries[stage.name] = {
+                "input_hash": input_hash,
+                "outputs": [str(p) for p in outputs],
+                "finished_at": time.time(),
+                "duration": round(duration, 2),
+                "status": status,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class Orchestrator:
+    """Ejecuta un DAG de etapas con presupuesto de CPU/memoria y caché por hash."""
+
+    def __init__(self, stages, cache_file, cpu_budget=None, memory_budget_mb=None, force=()):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"❌ {stage.name} depende de etapas inexistentes: {missing}")
+        self.cache = StageCache(cache_file)
+        self.cpu_budget = cpu_budget or default_cpu_budget()
+        self.memory_budget_mb = memory_budget_mb or default_memory_budget_mb()
+        self.force = set(force)
+        self.results = {}
+        self._print_lock = threading.Lock()
+
+    def log(self, stage_name, line):
+        with self._print_lock:
+            print(f"[{stage_name}] {line}", flush=True)
+
+    def forced(self, stage):
+        return "all" in self.force or stage.name in self.force
+
+    # 🔀 Lo que está listo cuando todas sus dependencias terminaron bien
+    def _ready(self, done, running):
+        ready, blocked = [], []
+        for name, stage in self.stages.items():
+            if name in done or name in running:
+                continue
+            states = [self.results.get(d, {}).get("status") for d in stage.deps]
+            if any(s in ("failed", "blocked") for s in states):
+                blocked.append(stage)
+            elif all(s in ("ok", "skipped") for s in states):
+                ready.append(stage)
+        return ready, blocked
+
+    def _fits(self, stage, cpu_used, memory_used, running):
+        if not running:
+            return True  # Una etapa más grande que el presupuesto corre sola
+        return (cpu_used + stage.cpu <= self.cpu_budget
+                and memory_used + stage.memory_mb <= self.memory_budget_mb)
+
+    def _run_command(self, stage):
+        proc = subprocess.Popen(stage.cmd, cwd=stage.cwd, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True, encoding="utf-8",
+                                errors="replace")
+        for line in proc.stdout:
+            self.log(stage.name, line.rstrip())
+        if proc.wait() != 0:
+            raise RuntimeError(f"salió con código {proc.returncode}")
+        return stage.outputs
+
+    def _execute(self, stage):
+        input_hash = stage.input_hash()
+        if not self.forced(stage) and self.cache.fresh(stage, input_hash):
+            return {"status": "skipped", "duration": 0.0}
+        self.log(stage.name, "🟢 Iniciando")
+        start = time.monotonic()
+        try:
+            outputs = stage.func() if stage.func is not None else self._run_command(stage)
+            status, error = "ok", None
+        except Exception as e:
+            outputs, status, error = [], "failed", str(e)
+            self.log(stage.name, f"❌ {e}")
+        duration = time.monotonic() - start
+        # Tras ejecutar se recalcula el hash: una etapa puede reescribir sus propias entradas
+        self.cache.store(stage, stage.input_hash() if status == "ok" else input_hash,
+                         outputs or [], duration, status)
+        return {"status": status, "duration": duration, "error": error}
+
+    def run(self):
+        done, running = set(), {}
+        cpu_used = memory_used = 0
+        started_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(self.stages) or 1) as executor:
+            while len(done) < len(self.stages):
+                ready, blocked = self._ready(done, running.values())
+                for stage in blocked:
+                    self.results[stage.name] = {"status": "blocked", "duration": 0.0}
+                    done.add(stage.name)
+                    self.log(stage.name, "⏭️ Bloqueada por una dependencia fallida")
+                for stage in ready:
+                    if not self._fits(stage, cpu_used, memory_used, running):
+                        continue
+                    future = executor.submit(self._execute, stage)
+                    running[future] = stage.name
+                    cpu_used += stage.cpu
+                    memory_used += stage.memory_mb
+                if not running:
+                    if blocked:
+                        continue
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    cpu_used -= stage.cpu
+                    memory_used -= stage.memory_mb
+                    self.results[name] = future.result()
+                    done.add(name)
+                    result = self.results[name]
+                    if result["status"] == "skipped":
+                        self.log(name, "⏩ Sin cambios en sus entradas, se salta")
+                    elif result["status"] == "ok":
+                        self.log(name, f"✅ Terminó en {result['duration']:.1f}s")
+        self.elapsed = time.monotonic() - started_at
+        return self.results
+
+    @property
+    def succeeded(self):
+        return all(r["status"] in ("ok", "skipped") for r in self.results.values())
+
+    # 📊 Duración de cada etapa, en el orden del DAG
+    def print_summary(self):
+        print(f"\n📊 Etapas ({self.elapsed:.1f}s en total, presupuesto "
+              f"{self.cpu_budget} CPU / {self.memory_budget_mb} MB)")
+        for name in self.stages:
+            result = self.results.get(name, {"status": "pending", "duration": 0.0})
+            print(f"   {name:<28} {result['status']:<8} {result['duration']:8.1f}s")
+
+    def write_report(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "elapsed": round(self.elapsed, 2),
+            "cpu_budget": self.cpu_budget,
+            "memory_budget_mb": self.memory_budget_mb,
+            "stages": {name: dict(r, duration=round(r["duration"], 2))
+                       for name, r in self.results.items()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
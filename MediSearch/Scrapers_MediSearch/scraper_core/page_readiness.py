@@ -0,0 +1,72 @@
+# 📁 Archivo: scraper_core/page_readiness.py
+#
+# Política de "página lista" por farmacia.
+# En vez de networkidle + 1 s fijo + sleep(0.2), se espera a que aparezcan
+# los selectores de nombre/precio que usa extract_data, con un timeout.
+# Además se bloquean imágenes, fuentes, analítica y scripts de terceros.
+
+import time
+from urllib.parse import urlparse
+
+DEFAULT_READY_TIMEOUT_MS = 8000
+GOTO_TIMEOUT_MS = 20000
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOST_KEYWORDS = (
+    "google-analytics", "googletagmanager", "doubleclick", "facebook", "hotjar",
+    "clarity.ms", "retailrocket", "criteo", "tiktok", "newrelic", "nr-data",
+)
+
+
+def _host_matches(host, domains):
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+# 🚫 Bloqueo de recursos que no aportan a extract_data
+async def install_blocking(context, first_party_domains):
+    async def handler(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return await route.abort()
+        if any(k in host for k in BLOCKED_HOST_KEYWORDS):
+            return await route.abort()
+        if request.resource_type == "script" and not _host_matches(host, first_party_domains):
+            return await route.abort()
+        await route.continue_()
+
+    await context.route("**/*", handler)
+
+
+# ⏳ Espera a que existan todos los selectores o se acabe el tiempo
+async def wait_until_ready(page, selectors, timeout_ms=DEFAULT_READY_TIMEOUT_MS):
+    deadline = time.monotonic() + timeout_ms / 1000
+    for selector in selectors:
+        remaining = int((deadline - time.monotonic()) * 1000)
+        if remaining <= 0:
+            return False
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=remaining)
+        except Exception:
+            return False
+    return True
+
+
+# 🌐 goto + espera adaptativa, registrando cada fase en `timings`
+# Devuelve (html, status HTTP del documento, segundos del goto).
+async def load_page(page, url, spec, timings):
+    start = time.monotonic()
+    response = await page.goto(url, timeout=GOTO_TIMEOUT_MS, wait_until="domcontentloaded")
+    goto_seconds = time.monotonic() - start
+    timings.record("goto", goto_seconds)
+    status = response.status if response is not None else None
+
+    start = time.monotonic()
+    ready = await wait_until_ready(page, spec.get("ready_selectors", []),
+                                   spec.get("ready_timeout_ms", DEFAULT_READY_TIMEOUT_MS))
+    timings.record("ready" if ready else "ready_timeout", time.monotonic() - start)
+
+    start = time.monotonic()
+    html = await page.content()
+    timings.record("content", time.monotonic() - start)
+    return html, status, goto_seconds
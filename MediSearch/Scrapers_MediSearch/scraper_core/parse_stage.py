@@ -0,0 +1,76 @@
+# 📁 Archivo: scraper_core/parse_stage.py
+#
+# Etapa de parseo desacoplada de la E/S del navegador.
+# Los workers de descarga solo juntan HTML crudo y lo dejan en una cola
+# acotada; un ProcessPoolExecutor corre el extract_data de la farmacia fuera
+# del GIL del proceso principal. Si la cola se llena, la descarga espera
+# (backpressure) y la memoria se mantiene plana.
+# Con el caché de descarga, el parser calcula además la huella de la zona de
+# precio y se salta extract_data si coincide con la anterior (fetch_cache.py).
+# Si la farmacia tiene SPEC["extract_structured"], primero se prueba el JSON-LD
+# o el estado embebido sin armar el DOM (structured_data.py).
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper_core.fetch_cache import region_fingerprint
+from scraper_core.html_parser import make_soup
+from scraper_core.http_fetch import has_required
+from scraper_core.product_api import merge_fields, missing_fields
+from scraper_core.registry import load_scraper
+from scraper_core.structured_data import structured_fingerprint
+
+# HTML pendiente de parsear por cada proceso parser
+QUEUE_PAGES_PER_WORKER = 4
+
+
+def default_parse_workers():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+# 🧠 Corre dentro del proceso parser: HTML → (tupla de extract_data, huella, camino)
+# El camino es "structured" si los datos embebidos traían todo lo requerido y
+# "selectors" si hubo que armar el DOM.
+# Con require_complete=True la tupla es None si faltan los selectores requeridos.
+# Con fingerprint=True se calcula la huella de SPEC["hash_selectors"]; si es
+# igual a known_hash (o con hash_only) no se corre extract_data.
+def parse_job(pharmacy, backend, html, require_complete=False, fingerprint=False,
+              known_hash=None, hash_only=False, structured=True):
+    scraper = load_scraper(pharmacy)
+    extract_structured = scraper.SPEC.get("extract_structured")
+    if structured and extract_structured is not None:
+        fields = extract_structured(html)
+        if fields is not None and not missing_fields(fields):
+            content_hash = structured_fingerprint(fields) if fingerprint else None
+            return (None if hash_only else merge_fields(fields)), content_hash, "structured"
+    soup = make_soup(html, backend)
+    content_hash = None
+    if fingerprint and scraper.SPEC.get("hash_selectors"):
+        content_hash = region_fingerprint(soup, scraper.SPEC["hash_selectors"])
+        if hash_only or (content_hash is not None and content_hash == known_hash):
+            return None, content_hash, "selectors"
+    if require_complete and not has_required(soup, scraper.SPEC.get("required_selectors", [])):
+        return None, content_hash, "selectors"
+    return scraper.extract_data(soup), content_hash, "selectors"
+
+
+class ParseStage:
+    """Ejecuta parse_job en procesos (workers > 0) o en hilos (workers = 0)."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    @property
+    def queue_size(self):
+        return max(1, self.workers) * QUEUE_PAGES_PER_WORKER
+
+    async def parse(self, loop, pharmacy, backend, html, require_complete=False,
+                    fingerprint=False, known_hash=None, hash_only=False, structured=True):
+        return await loop.run_in_executor(self.executor, parse_job, pharmacy, backend, html,
+                                          require_complete, fingerprint, known_hash, hash_only,
+                                          structured)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
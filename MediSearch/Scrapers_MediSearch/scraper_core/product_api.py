@@ -0,0 +1,138 @@
+# 📁 Archivo: scraper_core/product_api.py
+#
+# Modo "api" del motor async: algunas farmacias sirven los datos del producto
+# como JSON (Cruz Verde: product-service), así que no hace falta renderizar.
+# El SPEC entrega en "api" una clase que traduce una URL de producto a los
+# campos de extract_data usando el cliente httpx compartido del motor. Si la
+# API no trae algún campo requerido, la URL pasa por el navegador y el HTML
+# solo completa lo que faltaba.
+# El modo "listing" usa los mismos campos, pero tomados de los "fields" que el
+# extractor guardó con cada URL (no hay petición por producto).
+# La cookie de sesión es una sola para todas las corrutinas: el primer 401 la
+# renueva y las demás esperan esa renovación en vez de pedir otra.
+
+import asyncio
+from collections import Counter
+
+from scraper_core.retry import FetchError
+
+FIELDS = ("name", "image", "normal_price", "offer_price", "discount", "stock", "bioequivalent")
+# Sin estos campos el registro no sirve y se completa en el navegador
+REQUIRED_FIELDS = ("name", "offer_price", "stock")
+
+
+def discount_of(normal_price, offer_price):
+    if normal_price and offer_price and normal_price > offer_price:
+        return round((1 - offer_price / normal_price) * 100)
+    return 0
+
+
+def missing_fields(fields, required=REQUIRED_FIELDS):
+    if fields is None:
+        return list(required)
+    return [field for field in required if fields.get(field) is None]
+
+
+# 🧩 Tupla de extract_data con los campos de la API; lo que falte sale del HTML
+def merge_fields(fields, data=None):
+    parsed = dict(zip(FIELDS, data)) if data is not None else {}
+    merged = {field: fields[field] if fields.get(field) is not None else parsed.get(field)
+              for field in FIELDS}
+    merged["discount"] = discount_of(merged["normal_price"], merged["offer_price"])
+    return tuple(merged[field] for field in FIELDS)
+
+
+def cookie_header(cookies):
+    return "; ".join(f"{name}={value}" for name, value in cookies)
+
+
+def session_rejected(resp):
+    return resp.status_code == 401 or b"INVALID_SESSION" in resp.content[:200]
+
+
+class SharedSession:
+    """Cookie de sesión compartida por todas las corrutinas de una corrida."""
+
+    def __init__(self, url, get, browser_cookies=None):
+        self.url = url
+        self.get = get
+        self.browser_cookies = browser_cookies
+        self.cookie = None
+        self.generation = 0
+        self.refreshes = 0
+        # Si una cookie recién pedida por HTTP se rechaza, el sitio la arma con JS
+        self.browser_only = browser_cookies is not None and get is None
+        self._lock = asyncio.Lock()
+
+    async def current(self):
+        if self.cookie is None:
+            await self.refresh(self.generation)
+        return self.cookie, self.generation
+
+    # 🍪 Renueva solo si nadie lo hizo desde que se leyó `seen`
+    async def refresh(self, seen, browser=False):
+        async with self._lock:
+            if self.generation != seen:
+                return
+            if self.cookie is not None:
+                print("🔁 Cookie expirada. Renovando sesión...")
+            if browser and self.browser_cookies is not None:
+                self.browser_only = True
+            cookie = None
+            if not self.browser_only:
+                resp = await self.get(self.url)
+                if resp.status_code >= 400:
+                    raise FetchError(self.url, resp.status_code)
+                cookie = cookie_header(resp.cookies.items())
+            if not cookie and self.browser_cookies is not None:
+                # La sesión se arma con JS: se pide a un navegador
+                cookie = await self.browser_cookies(self.url)
+            if not cookie:
+                raise FetchError(self.url, 401)
+            self.cookie = cookie
+            self.generation += 1
+            self.refreshes += 1
+
+    # 🔁 send(cookie) → respuesta; ante 401 / INVALID_SESSION se renueva la
+    # sesión y se repite (la segunda vez, con cookie de navegador)
+    async def call(self, send, attempts=3):
+        for attempt in range(attempts):
+            cookie, generation = await self.current()
+            resp = await send(cookie)
+            if not session_rejected(resp):
+                break
+            if attempt + 1 < attempts:
+                await self.refresh(generation, browser=attempt > 0)
+        return resp
+
+
+class ApiStats:
+    """Cuenta productos completos por API (o listado) vs. completados descargando la página."""
+
+    def __init__(self, pharmacy, source="API"):
+        self.pharmacy = pharmacy
+        self.source = source
+        self.api_hits = 0
+        self.fallbacks = 0
+        self.missing = Counter()
+
+    def record(self, fields):
+        missing = missing_fields(fields)
+        if missing:
+            self.fallbacks += 1
+            self.missing.update(missing if fields is not None else ["producto"])
+        else:
+            self.api_hits += 1
+        return missing
+
+    def ratio(self):
+        total = self.api_hits + self.fallbacks
+        return self.api_hits / total if total else 0.0
+
+    def print_stats(self, session=None):
+        refreshes = f" | {session.refreshes} sesiones" if session is not None else ""
+        print(f"🔌 {self.pharmacy}: {self.api_hits} completos por {self.source} | {self.fallbacks} "
+              f"descargados por campos faltantes | acierto {self.ratio() * 100:.1f}%{refreshes}")
+        if self.missing:
+            detail = ", ".join(f"{field}={n}" for field, n in self.missing.most_common())
+            print(f"   faltantes: {detail}")
@@ -0,0 +1,89 @@
+# 📁 Archivo: scraper_core/product_export.py
+#
+# Últimas etapas de la cadena: validar el JSONL de un fast scraper y
+# convertirlo al formato que lee scraping_tasks/insertMedicines.ts
+# (product_updates/<farmacia>/<fecha>/<categoria>.json, un arreglo por categoría).
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+REQUIRED_FIELDS = ("pharmacy", "url", "name", "category")
+# Bajo este porcentaje de registros válidos la corrida se considera rota
+MIN_VALID_RATIO = 0.8
+
+
+def report_path(jsonl_file):
+    jsonl_file = Path(jsonl_file)
+    return jsonl_file.with_name(jsonl_file.stem + ".validation.json")
+
+
+# 🧪 Problemas de un registro (lista vacía = válido)
+def record_problems(record):
+    problems = [f"falta {field}" for field in REQUIRED_FIELDS if not record.get(field)]
+    if record.get("id") is None:
+        problems.append("falta id")
+    prices = [record.get("offer_price"), record.get("normal_price")]
+    if all(p is None for p in prices):
+        problems.append("sin precio")
+    for price in prices:
+        if price is not None and (not isinstance(price, int) or price <= 0):
+            problems.append(f"precio inválido {price!r}")
+    return problems
+
+
+def validate_products(jsonl_file, min_valid_ratio=MIN_VALID_RATIO):
+    total = valid = 0
+    by_problem = {}
+    with open(jsonl_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            total += 1
+            try:
+                problems = record_problems(json.loads(line))
+            except ValueError:
+                problems = ["línea JSON inválida"]
+            if not problems:
+                valid += 1
+            for problem in problems:
+                by_problem[problem] = by_problem.get(problem, 0) + 1
+
+    ratio = valid / total if total else 0.0
+    report = {
+        "file": str(jsonl_file),
+        "total": total,
+        "valid": valid,
+        "valid_ratio": round(ratio, 4),
+        "problems": by_problem,
+    }
+    with open(report_path(jsonl_file), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"🧪 {Path(jsonl_file).name}: {valid}/{total} registros válidos ({ratio:.1%})")
+    if ratio < min_valid_ratio:
+        raise ValueError(f"solo {ratio:.1%} de registros válidos (mínimo {min_valid_ratio:.0%})")
+    return report
+
+
+# 📦 JSONL → carpeta con fecha, solo con registros válidos
+def export_load_ready(jsonl_file, pharmacy_dir):
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_dir = Path(pharmacy_dir) / timestamp
+    by_category = {}
+    with open(jsonl_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record_problems(record):
+                continue
+            by_category.setdefault(record["category"], []).append(record)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for category, records in by_category.items():
+        with open(output_dir / f"{category}.json", "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+    print(f"📦 {sum(len(r) for r in by_category.values())} productos en "
+          f"{len(by_category)} categorías → {output_dir}")
+    return [output_dir]
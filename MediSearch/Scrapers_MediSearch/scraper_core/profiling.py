@@ -0,0 +1,222 @@
+# 📁 Archivo: scraper_core/profiling.py
+#
+# Modo --profile para fast scrapers, extractores de URLs y stock_checker.
+#   - cprofile: cProfile en el hilo principal y en cada hilo nuevo (los parsers
+#     en hilos incluidos) → profile.pstats (snakeviz, flameprof) y top en texto
+#   - sampling: un hilo toma las pilas de todos los hilos cada pocos ms →
+#     stacks.folded (flamegraph.pl, speedscope, inferno)
+#   - --profile-memory: tracemalloc con las asignaciones top de cada etapa
+# Todo queda en logs/profiles/<nombre>_<fecha>/ junto a un summary.json.
+# Sin --profile se usa NULL_PROFILER, cuyas etapas son un nullcontext.
+
+import cProfile
+import io
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from scraper_core.metrics import LOGS_DIR
+
+PROFILES_DIR = LOGS_DIR / "profiles"
+PROFILE_MODES = ("cprofile", "sampling")
+DEFAULT_INTERVAL_MS = 5
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+
+def add_profile_args(parser, sampling=False):
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Perfilar la corrida (resultados en logs/profiles/)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Además, asignaciones top por etapa con tracemalloc")
+    parser.add_argument("--profile-interval-ms", type=float, default=DEFAULT_INTERVAL_MS,
+                        help="Intervalo del perfilador por muestreo")
+    if sampling:
+        parser.add_argument("--profile-sample", type=float, default=None,
+                            help="Perfilar solo una muestra de URLs (fracción < 1 o cantidad)")
+
+
+# 🎲 all_data reducido a una muestra de URLs (fracción o cantidad), misma forma
+def sample_entries(all_data, sample, seed=0):
+    entries = [(categoria, entry) for categoria, items in all_data.items() for entry in items]
+    count = int(len(entries) * sample) if sample < 1 else int(sample)
+    picked = set(random.Random(seed).sample(range(len(entries)), min(count, len(entries))))
+    result = {}
+    for i, (categoria, entry) in enumerate(entries):
+        if i in picked:
+            result.setdefault(categoria, []).append(entry)
+    return result
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Muestrea las pilas de todos los hilos y las acumula en formato folded."""
+
+    def __init__(self, interval_ms):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self._halt = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._halt.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _NullProfiler:
+    enabled = False
+    run_dir = None
+
+    def start(self):
+        return self
+
+    def stage(self, name):
+        return nullcontext()
+
+    def stop(self):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class RunProfiler:
+    """Perfil de una corrida completa con reportes por etapa en un directorio propio."""
+
+    enabled = True
+
+    def __init__(self, name, mode="cprofile", memory=False, interval_ms=DEFAULT_INTERVAL_MS,
+                 base_dir=PROFILES_DIR):
+        self.name = name
+        self.mode = mode
+        self.memory = memory
+        self.interval_ms = interval_ms
+        self.run_dir = Path(base_dir) / f"{name}_{datetime.now():%Y-%m-%d_%H-%M-%S}"
+        self.stages = {}
+        self.sampler = None
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._started_at = None
+
+    # 🧵 Cada hilo nuevo arranca su propio cProfile (threading.setprofile)
+    def _thread_hook(self, frame, event, arg):
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        if self.memory:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self.mode == "cprofile":
+            threading.setprofile(self._thread_hook)
+            main = cProfile.Profile()
+            self._profiles.append(main)
+            main.enable()
+        else:
+            self.sampler = StackSampler(self.interval_ms)
+            self.sampler.start()
+        self._started_at = time.perf_counter()
+        print(f"🔬 Perfilando {self.name} ({self.mode}{' + memoria' if self.memory else ''}) "
+              f"→ {self.run_dir}")
+        return self
+
+    # 📦 Duración de la etapa y, con memoria, sus asignaciones top
+    @contextmanager
+    def stage(self, name):
+        before = tracemalloc.take_snapshot() if self.memory else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"seconds": round(time.perf_counter() - start, 3)}
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                entry["top_allocations"] = self._write_allocations(name, before, after)
+            self.stages[name] = entry
+
+    def _write_allocations(self, name, before, after):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore),
+                                                      "lineno")[:TOP_ALLOCATIONS]
+        with open(self.run_dir / f"alloc_{name}.txt", "w", encoding="utf-8") as f:
+            f.write(f"# Asignaciones top de la etapa {name} (delta de tracemalloc)\n")
+            for stat in diff:
+                f.write(f"{stat}\n")
+        return [{"where": str(s.traceback[0]), "kib": round(s.size_diff / 1024, 1),
+                 "blocks": s.count_diff} for s in diff[:5]]
+
+    def stop(self):
+        elapsed = time.perf_counter() - self._started_at
+        summary = {"name": self.name, "mode": self.mode, "elapsed_s": round(elapsed, 3),
+                   "stages": self.stages}
+        if self.mode == "cprofile":
+            threading.setprofile(None)
+            for profile in self._profiles:
+                profile.disable()
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                try:
+                    stats.add(profile)
+                except TypeError:  # Hilo que nunca llegó a registrar llamadas
+                    continue
+            stats.dump_stats(self.run_dir / "profile.pstats")
+            out = io.StringIO()
+            pstats.Stats(str(self.run_dir / "profile.pstats"), stream=out) \
+                .sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            (self.run_dir / "profile_top.txt").write_text(out.getvalue(), encoding="utf-8")
+            summary["threads_profiled"] = len(self._profiles)
+        else:
+            self.sampler.stop()
+            self.sampler.write_folded(self.run_dir / "stacks.folded")
+            summary["samples"] = self.sampler.samples
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            summary["traced_peak_mb"] = round(peak / (1024 * 1024), 1)
+        with open(self.run_dir / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"🔬 Perfil de {self.name} guardado en {self.run_dir} ({elapsed:.1f}s)")
+
+
+# 🔧 Perfilador según los flags de add_profile_args (ya iniciado)
+def make_profiler(args, name):
+    if not getattr(args, "profile", None):
+        return NULL_PROFILER
+    return RunProfiler(name, args.profile, args.profile_memory, args.profile_interval_ms).start()
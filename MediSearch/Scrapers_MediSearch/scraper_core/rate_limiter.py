@@ -0,0 +1,157 @@
+# 📁 Archivo: scraper_core/rate_limiter.py
+#
+# Limitador de tasa adaptativo por host, compartido por scrapers, extractores
+# y obtenedores de stock (reemplaza los time.sleep fijos).
+#
+# Cada host tiene un token bucket cuya tasa se ajusta estilo AIMD:
+#   - respuesta sana y rápida → la tasa sube de a poco (aditivo)
+#   - 429 / 5xx / latencia alta → la tasa se divide (multiplicativo) y se
+#     cuenta un evento de throttle; un Retry-After pausa el host completo.
+# Sirve tanto para código sync (acquire) como asyncio (acquire_async).
+# snapshot() alimenta las métricas por host del motor (ver metrics.py).
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+DEFAULT_RATE = 4.0        # peticiones/segundo iniciales por host
+MIN_RATE = 0.2
+MAX_RATE = 30.0
+BURST = 4.0
+ADDITIVE_STEP = 0.25
+DECREASE_FACTOR = 0.5
+SLOW_LATENCY_S = 5.0
+MAX_RETRY_AFTER_S = 120.0
+DECREASE_COOLDOWN_S = 1.0  # Un solo recorte por ráfaga de respuestas malas
+
+
+def host_of(url):
+    return urlparse(url).netloc or url
+
+
+class _HostBucket:
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = BURST
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.throttles = 0
+        self.last_status = None
+
+    def _refill(self, now):
+        self.tokens = min(BURST, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Segundos a esperar antes de poder consumir un token (0 = ya se consumió)
+    def reserve(self, now):
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.requests += 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class HostRateLimiter:
+    """Token bucket por host con ajuste AIMD según status y latencia."""
+
+    def __init__(self, rate=DEFAULT_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = _HostBucket(self.initial_rate)
+        return self._buckets[host]
+
+    def _reserve(self, host):
+        with self._lock:
+            return self._bucket(host).reserve(time.monotonic())
+
+    # ⏳ Bloquea hasta que el host tenga un token disponible
+    def acquire(self, url_or_host):
+        host = host_of(url_or_host)
+        while True:
+            wait = self._reserve(host)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, url_or_host):
+        host = host_of(url_or_host)
+        while True:
+            wait = self._reserve(host)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    # 📈📉 Ajuste AIMD con el resultado de la petición
+    def feedback(self, url_or_host, status=None, latency=None, retry_after=None):
+        host = host_of(url_or_host)
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.last_status = status
+            throttled = (status == 429 or (status is not None and status >= 500)
+                         or (latency is not None and latency > SLOW_LATENCY_S))
+            if throttled:
+                now = time.monotonic()
+                if now - bucket.last_decrease >= DECREASE_COOLDOWN_S:
+                    bucket.rate = max(self.min_rate, bucket.rate * DECREASE_FACTOR)
+                    bucket.last_decrease = now
+                bucket.throttles += 1
+                if retry_after:
+                    pause = min(float(retry_after), MAX_RETRY_AFTER_S)
+                    bucket.paused_until = time.monotonic() + pause
+                # Vaciar el bucket evita una ráfaga justo después del throttle
+                bucket.tokens = min(bucket.tokens, 0.0)
+            elif status is None or status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + ADDITIVE_STEP)
+
+    def feedback_response(self, url_or_host, response, latency):
+        """Atajo para respuestas de requests/httpx (lee status y Retry-After)."""
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        self.feedback(url_or_host, response.status_code, latency, retry_after)
+
+    # 📊 Tasas actuales y eventos de throttle por host
+    def snapshot(self):
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(b.rate, 3),
+                    "requests": b.requests,
+                    "throttles": b.throttles,
+                    "paused": b.paused_until > time.monotonic(),
+                    "last_status": b.last_status,
+                }
+                for host, b in self._buckets.items()
+            }
+
+    def print_stats(self):
+        for host, s in self.snapshot().items():
+            print(f"🚦 {host}: {s['rate']} req/s | {s['requests']} peticiones | "
+                  f"{s['throttles']} throttles | último status {s['last_status']}")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+# 🔗 Limitador único del proceso
+def get_rate_limiter():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HostRateLimiter()
+        return _shared
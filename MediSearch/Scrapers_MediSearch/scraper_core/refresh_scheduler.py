@@ -0,0 +1,212 @@
+# 📁 Archivo: scraper_core/refresh_scheduler.py
+#
+# Planificador de refresco por prioridad.
+# En vez de volver a scrapear todo el catálogo en cada corrida, cada producto
+# recibe un intervalo objetivo según cuánto cambió su precio en los snapshots
+# de product_updates/<farmacia>/<fecha>/ y, opcionalmente, según su demanda.
+# En cada corrida se eligen los productos más atrasados respecto de su
+# intervalo hasta agotar el presupuesto de peticiones.
+#
+#   prioridad = horas desde el último refresco / intervalo objetivo
+#   intervalo = 24 h / cambios por día, acotado a [MIN_INTERVAL_H, MAX_INTERVAL_H]
+#               y dividido por (1 + DEMAND_WEIGHT * demanda normalizada)
+#
+# Los registros nuevos se mezclan sobre la salida completa anterior, así el
+# JSONL final sigue teniendo todo el catálogo.
+
+import json
+import math
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from scraper_core.async_engine import normalize_entry, run_async_scrape
+from scraper_core.journal import record_key
+
+SNAPSHOTS_DIR = Path(__file__).resolve().parent.parent / "product_updates"
+SNAPSHOT_FORMAT = "%Y-%m-%d_%H-%M-%S"
+MIN_INTERVAL_H = 1.0
+MAX_INTERVAL_H = 7 * 24.0
+# Cambios por día supuestos para productos sin historia suficiente
+PRIOR_CHANGES_PER_DAY = 0.1
+DEMAND_WEIGHT = 2.0
+
+
+def _snapshot_time(path):
+    try:
+        return datetime.strptime(path.name, SNAPSHOT_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+
+def _price(record):
+    offer = record.get("offer_price", record.get("price_offer"))
+    normal = record.get("normal_price", record.get("price_normal"))
+    return offer if offer is not None else normal
+
+
+# 📈 {url: [(epoch, precio), ...]} ordenado por fecha de snapshot, más un
+# índice por id para productos cuya URL cambió de formato entre snapshots
+def load_price_history(pharmacy_dir):
+    history = {}
+    by_id = {}
+    snapshots = sorted((p for p in Path(pharmacy_dir).iterdir() if p.is_dir()),
+                       key=lambda p: p.name) if Path(pharmacy_dir).exists() else []
+    for snapshot in snapshots:
+        taken_at = _snapshot_time(snapshot)
+        if taken_at is None:
+            continue
+        seen = set()
+        for file in snapshot.glob("*.json"):
+            try:
+                with open(file, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+            except ValueError:
+                continue
+            for record in records if isinstance(records, list) else [records]:
+                url = record.get("url")
+                if not url or url in seen:
+                    continue
+                seen.add(url)
+                observations = history.setdefault(url, [])
+                observations.append((taken_at, _price(record)))
+                if record.get("id") is not None:
+                    by_id.setdefault(str(record["id"]), observations)
+    return history, by_id
+
+
+def changes_per_day(observations):
+    if len(observations) < 2:
+        return None
+    changes = sum(1 for (_, a), (_, b) in zip(observations, observations[1:]) if a != b)
+    span_days = max(1.0, (observations[-1][0] - observations[0][0]) / 86400)
+    return changes / span_days
+
+
+# 🔥 Demanda opcional: JSON {url o id: visitas/búsquedas}; se normaliza a [0, 1] en escala log
+def load_demand(path):
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    top = max((math.log1p(v) for v in raw.values() if v > 0), default=0)
+    if top == 0:
+        return {}
+    return {str(key): math.log1p(v) / top for key, v in raw.items() if v > 0}
+
+
+class RefreshScheduler:
+    """Elige qué URLs refrescar en esta corrida según volatilidad, demanda y antigüedad."""
+
+    def __init__(self, spec, demand_file=None, now=None):
+        self.spec = spec
+        output = Path(spec["output_file"])
+        self.output_file = output
+        self.refresh_output = output.with_name(output.stem + ".refresh.jsonl")
+        self.state_file = output.with_name(output.stem + ".refresh_state.json")
+        self.history, self.history_by_id = load_price_history(SNAPSHOTS_DIR / spec["key"])
+        self.demand = load_demand(demand_file)
+        self.now = now or time.time()
+        self.last_refresh = {}
+        if self.state_file.exists():
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self.last_refresh = json.load(f)
+        self.selected = set()
+        self.known_urls = set()
+
+    def observations(self, url):
+        if url in self.history:
+            return self.history[url]
+        return self.history_by_id.get(str(self.spec["extract_id"](url)), [])
+
+    def target_interval_h(self, url):
+        rate = changes_per_day(self.observations(url))
+        if rate is None:
+            rate = PRIOR_CHANGES_PER_DAY
+        interval = 24.0 / rate if rate > 0 else MAX_INTERVAL_H
+        interval = min(MAX_INTERVAL_H, max(MIN_INTERVAL_H, interval))
+        product_id = self.spec["extract_id"](url)
+        demand = self.demand.get(url, self.demand.get(str(product_id), 0.0))
+        return max(MIN_INTERVAL_H, interval / (1 + DEMAND_WEIGHT * demand))
+
+    def last_seen(self, url):
+        if url in self.last_refresh:
+            return self.last_refresh[url]
+        observations = self.observations(url)
+        return observations[-1][0] if observations else None
+
+    def priority(self, url):
+        last = self.last_seen(url)
+        if last is None:
+            return math.inf  # Producto nuevo: nunca se ha scrapeado
+        return (self.now - last) / 3600 / self.target_interval_h(url)
+
+    # 🎯 all_data filtrado a las `budget` URLs más atrasadas
+    def select(self, all_data, budget):
+        urls = {normalize_entry(e)[0] for entries in all_data.values() for e in entries}
+        priorities = {url: self.priority(url) for url in urls}
+        ranked = sorted(urls, key=priorities.get, reverse=True)
+        self.selected = set(ranked[:budget])
+        self.known_urls = urls
+        overdue = sum(1 for p in priorities.values() if p >= 1)
+        print(f"🗓️ {self.spec['pharmacy']}: {len(self.selected)}/{len(urls)} URLs a refrescar "
+              f"({overdue} atrasadas respecto de su intervalo)")
+        return {
+            categoria: [e for e in entries if normalize_entry(e)[0] in self.selected]
+            for categoria, entries in all_data.items()
+        }
+
+    # 🧩 Registros frescos sobre la salida completa anterior + marca de refresco
+    def commit(self):
+        # Se descartan productos que ya no están en el listado actual
+        fresh, _ = merge_fresh_records(self.output_file, self.refresh_output,
+                                       lambda record: record["url"] in self.known_urls)
+        for url in {url for _, url in fresh}:
+            self.last_refresh[url] = self.now
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump(self.last_refresh, f)
+
+
+# 🧩 Salida parcial (`refresh_output`) mezclada sobre la salida completa: los
+# registros frescos reemplazan a los anteriores con la misma (categoria, url) y
+# de los demás se conservan los que `keep(record)` acepte. Devuelve los frescos.
+def merge_fresh_records(output_file, refresh_output, keep):
+    output_file, refresh_output = Path(output_file), Path(refresh_output)
+    fresh = {}
+    if refresh_output.exists():
+        with open(refresh_output, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                fresh[record_key(record)] = record
+
+    tmp = output_file.with_name(output_file.name + ".merge")
+    kept = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        if output_file.exists():
+            with open(output_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record_key(record) in fresh or not keep(record):
+                        continue
+                    out.write(line if line.endswith("\n") else line + "\n")
+                    kept += 1
+        for record in fresh.values():
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, output_file)
+    refresh_output.unlink(missing_ok=True)
+    print(f"🧩 {output_file.name}: {len(fresh)} registros refrescados + {kept} conservados")
+    return fresh, kept
+
+
+# 🚀 Corrida con presupuesto: `requests_per_hour` durante `window_hours`
+def run_scheduled_refresh(spec, all_data, requests_per_hour, window_hours=1.0,
+                          demand_file=None, **options):
+    scheduler = RefreshScheduler(spec, demand_file=demand_file)
+    selected = scheduler.select(all_data, int(requests_per_hour * window_hours))
+    engine = run_async_scrape(dict(spec, output_file=scheduler.refresh_output), selected, **options)
+    scheduler.commit()
+    return engine
@@ -0,0 +1,31 @@
+# 📁 Archivo: scraper_core/registry.py
+#
+# Carga los módulos de los fast scrapers (y de los extractores de URLs) por
+# ruta (no son un paquete) para reutilizar su extract_data, su SPEC o su
+# parseo del listado desde benchmarks y procesos de parseo.
+
+import importlib.util
+from pathlib import Path
+
+SCRAPERS_DIR = Path(__file__).resolve().parent.parent / "fast_scrapers_new"
+EXTRACTORS_DIR = Path(__file__).resolve().parent.parent / "url_extractor" / "url_extractors"
+PHARMACIES = ("ahumada", "cruzverde", "salcobrand")
+
+_loaded = {}
+
+
+def _load(name, path):
+    if name not in _loaded:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[name] = module
+    return _loaded[name]
+
+
+def load_scraper(pharmacy):
+    return _load(f"{pharmacy}_fast_scraper", SCRAPERS_DIR / f"{pharmacy}_fast_scraper.py")
+
+
+def load_extractor(pharmacy):
+    return _load(f"{pharmacy}_extractor", EXTRACTORS_DIR / f"{pharmacy}_extractor.py")
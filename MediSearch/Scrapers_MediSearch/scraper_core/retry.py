@@ -0,0 +1,228 @@
+# 📁 Archivo: scraper_core/retry.py
+#
+# Reintentos por URL dentro de la corrida (en vez de relanzar el scraper
+# completo), clasificación de errores, circuit breaker por host y archivo
+# dead-letter con las URLs que agotaron sus intentos.
+#
+# Clases de error:
+#   timeout   → goto/GET excedió el tiempo               (se reintenta)
+#   throttled → 429                                     (se reintenta)
+#   http_5xx  → error del servidor                      (se reintenta)
+#   network   → conexión caída, DNS, reset              (se reintenta)
+#   parse     → extract_data lanzó una excepción        (se reintenta)
+#   http_4xx  → 404/410/403...: la URL no sirve         (va directo al dead-letter)
+#   other     → cualquier otra cosa                     (va directo al dead-letter)
+#
+# El backoff es exponencial con "full jitter": espera aleatoria entre 0 y
+# min(tope, base * 2^intento), para que los workers no reintenten en bloque.
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import httpx
+
+DEFAULT_MAX_ATTEMPTS = 3
+BASE_DELAY_S = 1.0
+MAX_DELAY_S = 30.0
+RETRYABLE = {"timeout", "throttled", "http_5xx", "network", "parse"}
+# Errores que cuentan como "el sitio está fallando" para el breaker
+HOST_FAILURES = {"timeout", "throttled", "http_5xx", "network"}
+
+BREAKER_WINDOW = 20
+BREAKER_MIN_SAMPLES = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_COOLDOWN_S = 30.0
+BREAKER_MAX_COOLDOWN_S = 300.0
+
+
+class FetchError(Exception):
+    """Documento recibido con un status HTTP de error."""
+
+    def __init__(self, url, status):
+        super().__init__(f"HTTP {status} en {url}")
+        self.url = url
+        self.status = status
+
+
+class ParseError(Exception):
+    """extract_data falló sobre un HTML descargado."""
+
+
+def classify_status(status):
+    if status == 429:
+        return "throttled"
+    if status == 408:
+        return "timeout"
+    if status >= 500:
+        return "http_5xx"
+    return "http_4xx"
+
+
+# 🏷️ Clase de error a partir de la excepción
+def classify_error(exc):
+    if isinstance(exc, FetchError):
+        return classify_status(exc.status)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return classify_status(exc.response.status_code)
+    if isinstance(exc, ParseError):
+        return "parse"
+    # Cubre asyncio/builtin TimeoutError, httpx.TimeoutException y el de Playwright
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, httpx.TimeoutException)) \
+            or type(exc).__name__ == "TimeoutError":
+        return "timeout"
+    if isinstance(exc, (httpx.TransportError, ConnectionError)):
+        return "network"
+    if "net::ERR_" in str(exc):
+        return "network"
+    return "other"
+
+
+def backoff_delay(attempt, base=BASE_DELAY_S, cap=MAX_DELAY_S):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RetryPolicy:
+    """Decide si un intento fallido se repite y cuánto esperar antes."""
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=BASE_DELAY_S,
+                 max_delay=MAX_DELAY_S):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    # attempt es el número del intento que acaba de fallar (0 = el primero)
+    def should_retry(self, kind, attempt):
+        return kind in RETRYABLE and attempt + 1 < self.max_attempts
+
+    def delay(self, attempt):
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+
+class _HostCircuit:
+    def __init__(self):
+        self.outcomes = deque(maxlen=BREAKER_WINDOW)
+        self.open_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN_S
+        self.half_open = False
+        self.trips = 0
+
+
+class CircuitBreaker:
+    """Pausa un host cuando la mitad de sus últimas respuestas fallaron.
+
+    Tras la pausa queda "medio abierto": el siguiente resultado decide si se
+    cierra (éxito) o se vuelve a abrir con el doble de espera (fallo).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _circuit(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = _HostCircuit()
+        return self._hosts[host]
+
+    # Segundos que faltan para que el host vuelva a aceptar peticiones
+    def blocked_for(self, host):
+        with self._lock:
+            return max(0.0, self._circuit(host).open_until - time.monotonic())
+
+    async def wait_async(self, host):
+        while True:
+            wait = self.blocked_for(host)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _open(self, host, circuit):
+        circuit.open_until = time.monotonic() + circuit.cooldown
+        circuit.half_open = True
+        circuit.trips += 1
+        circuit.outcomes.clear()
+        print(f"⛔ Circuito abierto para {host}: pausa de {circuit.cooldown:.0f}s")
+        circuit.cooldown = min(BREAKER_MAX_COOLDOWN_S, circuit.cooldown * 2)
+
+    def record(self, host, ok):
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.open_until > time.monotonic():
+                return  # Respuestas de peticiones lanzadas antes de abrir
+            if circuit.half_open:
+                if ok:
+                    circuit.half_open = False
+                    circuit.cooldown = BREAKER_COOLDOWN_S
+                    print(f"✅ Circuito cerrado para {host}")
+                else:
+                    self._open(host, circuit)
+                    return
+            circuit.outcomes.append(ok)
+            failures = circuit.outcomes.count(False)
+            if (len(circuit.outcomes) >= BREAKER_MIN_SAMPLES
+                    and failures / len(circuit.outcomes) >= BREAKER_FAILURE_RATIO):
+                self._open(host, circuit)
+
+    def print_stats(self):
+        with self._lock:
+            for host, circuit in self._hosts.items():
+                if circuit.trips:
+                    print(f"⛔ {host}: circuito abierto {circuit.trips} veces")
+
+
+def dead_letter_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.stem + ".deadletter.jsonl")
+
+
+class DeadLetter:
+    """URLs que agotaron sus intentos, una por línea (seguro entre hilos)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.by_kind = {}
+
+    # `entry` es la entrada original del JSON de URLs (string o dict de Salcobrand)
+    def add(self, categorias, entry, kind, error, attempts):
+        line = json.dumps({
+            "categorias": categorias,
+            "entry": entry,
+            "kind": kind,
+            "error": str(error)[:500],
+            "attempts": attempts,
+        }, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def print_stats(self):
+        if not self.by_kind:
+            return
+        detail = ", ".join(f"{kind}={n}" for kind, n in sorted(self.by_kind.items()))
+        print(f"🪦 {sum(self.by_kind.values())} URLs en {self.path.name} ({detail})")
+
+
+# 📥 Dead-letter → mismo formato {categoria: [entradas]} que extracted_urls
+def load_dead_letter(path):
+    all_data = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            for categoria in item["categorias"]:
+                all_data.setdefault(categoria, []).append(item["entry"])
+    return all_data
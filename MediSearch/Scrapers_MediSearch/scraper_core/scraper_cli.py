@@ -0,0 +1,121 @@
+# 📁 Archivo: scraper_core/scraper_cli.py
+#
+# CLI común de los fast scrapers, armado a partir del SPEC de cada farmacia
+# (igual que extract_runner.py para los extractores). Cada scraper solo
+# declara en su SPEC la entrada, los límites de concurrencia/pool y la ayuda
+# de --fetch-mode; si necesita opciones propias las agrega al parser que
+# devuelve build_parser antes de llamar a run_cli.
+#
+# run_cli carga la entrada (o el dead-letter), aplica --profile-sample y
+# despacha al modo de corrida: --incremental, --refresh-budget o completa.
+
+import argparse
+import json
+from datetime import datetime
+
+from scraper_core.async_engine import FETCH_MODES, run_async_scrape
+from scraper_core.html_parser import PARSER_BACKENDS
+from scraper_core.jsonl_writer import DEFAULT_BATCH_SIZE, FSYNC_POLICIES
+from scraper_core.listing_diff import add_diff_args, run_incremental_scrape
+from scraper_core.metrics import LOGS_DIR
+from scraper_core.profiling import add_profile_args, make_profiler, sample_entries
+from scraper_core.refresh_scheduler import run_scheduled_refresh
+from scraper_core.retry import DEFAULT_MAX_ATTEMPTS, dead_letter_path, load_dead_letter
+
+
+# 🧰 Parser con todas las opciones del motor; "api" solo si el SPEC trae cliente
+def build_parser(spec):
+    parser = argparse.ArgumentParser(description=f"Fast scraper {spec['pharmacy']}")
+    parser.add_argument("--concurrency", type=int, default=spec["concurrency"])
+    parser.add_argument("--per-host", type=int, default=spec["per_host"])
+    parser.add_argument("--browsers", type=int, default=spec["browsers"])
+    fetch_modes = [mode for mode in FETCH_MODES if mode != "api" or spec.get("api")]
+    parser.add_argument("--fetch-mode", choices=fetch_modes, default="http-first",
+                        help=spec.get("fetch_mode_help"))
+    parser.add_argument("--parser", choices=PARSER_BACKENDS, default=None,
+                        help="Backend de parseo (por defecto el más rápido instalado)")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Procesos de parseo (0 = hilos; por defecto CPUs - 1)")
+    parser.add_argument("--no-structured-data", action="store_true",
+                        help="No probar JSON-LD / estado embebido antes de los selectores")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="close")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--resume", action="store_true",
+                        help="Continuar la corrida anterior saltando las URLs ya guardadas")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Intentos por URL antes de mandarla al dead-letter")
+    parser.add_argument("--dead-letter", action="store_true",
+                        help="Reintentar solo las URLs del dead-letter de la corrida anterior")
+    parser.add_argument("--refresh-budget", type=int, default=None, metavar="PETICIONES_POR_HORA",
+                        help="Refrescar solo los productos más prioritarios dentro de este presupuesto")
+    parser.add_argument("--refresh-window", type=float, default=1.0,
+                        help="Horas que cubre esta corrida (presupuesto total = budget * ventana)")
+    parser.add_argument("--demand", default=None,
+                        help="JSON {url o id: demanda} para priorizar productos populares")
+    add_diff_args(parser)
+    parser.add_argument("--fetch-cache", action="store_true",
+                        help="GET condicionales (ETag/Last-Modified) y reutilizar registros con la misma huella de precio")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Exponer /metrics (formato Prometheus) en este puerto durante la corrida")
+    parser.add_argument("--metrics-file", default=str(LOGS_DIR / f"{spec['key']}_metrics.prom"),
+                        help="Snapshot .prom que se reescribe cada pocos segundos")
+    parser.add_argument("--json-log", default=None,
+                        help="Log JSON de eventos (por defecto logs/<farmacia>_<fecha>.log.jsonl)")
+    add_profile_args(parser, sampling=True)
+    return parser
+
+
+def parse_cli_args(parser, argv=None):
+    args = parser.parse_args(argv)
+    # El diff necesita el listado completo: con un subconjunto todo lo demás sería "eliminado"
+    if args.incremental and (args.dead_letter or args.refresh_budget or args.profile_sample):
+        parser.error("--incremental no se combina con --dead-letter, --refresh-budget ni --profile-sample")
+    return args
+
+
+def engine_options(spec, args):
+    # Perfilando, el parseo va en hilos para que el perfilador lo vea
+    parse_workers = 0 if args.profile and args.parse_workers is None else args.parse_workers
+    return dict(concurrency=args.concurrency, per_host=args.per_host,
+                browsers=args.browsers, max_pages=spec["max_pages"],
+                max_rss_mb=spec["max_rss_mb"], fetch_mode=args.fetch_mode,
+                parser=args.parser, parse_workers=parse_workers,
+                fsync=args.fsync, batch_size=args.batch_size,
+                resume=args.resume, max_attempts=args.max_attempts,
+                fetch_cache=args.fetch_cache, structured_data=not args.no_structured_data,
+                metrics_file=args.metrics_file, metrics_port=args.metrics_port,
+                json_log=args.json_log or LOGS_DIR / f"{spec['key']}_{datetime.now():%Y-%m-%d_%H-%M-%S}.log.jsonl")
+
+
+def run(spec, args, profiler):
+    with profiler.stage("load_input"):
+        if args.dead_letter:
+            # Se agregan a la salida existente: equivale a --resume sobre esas URLs
+            all_data = load_dead_letter(dead_letter_path(spec["output_file"]))
+            args.resume = True
+        else:
+            with open(spec["input_file"], "r", encoding="utf-8") as f:
+                all_data = json.load(f)
+        if args.profile and args.profile_sample:
+            all_data = sample_entries(all_data, args.profile_sample)
+
+    options = engine_options(spec, args)
+    with profiler.stage("scrape"):
+        if args.incremental:
+            run_incremental_scrape(spec, all_data, args.diff_sample,
+                                   args.max_tombstone_ratio, **options)
+        elif args.refresh_budget:
+            run_scheduled_refresh(spec, all_data, args.refresh_budget, args.refresh_window,
+                                  demand_file=args.demand, **options)
+        else:
+            run_async_scrape(spec, all_data, **options)
+
+
+# 🚀 Punto de entrada de cada fast scraper
+def run_cli(spec, parser=None, argv=None):
+    args = parse_cli_args(parser or build_parser(spec), argv)
+    profiler = make_profiler(args, spec["key"])
+    try:
+        run(spec, args, profiler)
+    finally:
+        profiler.stop()
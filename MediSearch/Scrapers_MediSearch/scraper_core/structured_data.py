@@ -0,0 +1,179 @@
+# 📁 Archivo: scraper_core/structured_data.py
+#
+# Camino rápido de extracción: datos estructurados embebidos en la página.
+# Muchas tiendas publican el producto como JSON-LD (schema.org/Product con sus
+# offers) o lo dejan en un blob de estado para hidratar la SPA. Encontrarlo es
+# un recorrido de texto (sin árbol DOM) y decodificarlo es un json.loads, así
+# que es mucho más barato que make_soup + los selectores de extract_data.
+# Cada farmacia arma en SPEC["extract_structured"](html) los campos de
+# extract_data con estas piezas; si falta alguno requerido, parse_stage usa los
+# selectores de siempre. benchmarks/structured_parity.py compara ambos caminos.
+
+import hashlib
+import html as html_lib
+import json
+import re
+
+LD_JSON_RE = re.compile(
+    r"<script\b[^>]*\btype\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL)
+NON_TEXT_RE = re.compile(r"<(script|style|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+DIV_TAG_RE = re.compile(r"<(/?)div\b")
+# "9.490" en un precio de schema.org es separador de miles (CLP no usa decimales)
+THOUSANDS_RE = re.compile(r"^\d{1,3}(\.\d{3})+$")
+# Entidades con que Angular escapa el JSON de TransferState
+ANGULAR_ESCAPES = {"&q;": '"', "&a;": "&", "&s;": "'", "&l;": "<", "&g;": ">"}
+
+AVAILABILITY = {
+    "instock": "available",
+    "limitedavailability": "available",
+    "onlineonly": "available",
+    "instoreonly": "available",
+    "preorder": "available",
+    "outofstock": "out_of_stock",
+    "soldout": "out_of_stock",
+    "discontinued": "out_of_stock",
+}
+STRIKE_PRICE_TYPES = ("strikethroughprice", "listprice")
+
+
+def _walk(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+    elif isinstance(node, dict):
+        yield node
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                yield from _walk(value)
+
+
+def _types(node):
+    kind = node.get("@type")
+    kinds = kind if isinstance(kind, list) else [kind]
+    return {str(k).rsplit("/", 1)[-1].lower() for k in kinds if k}
+
+
+# 🔎 Primer schema.org/Product de los bloques JSON-LD (incluye @graph y listas)
+def json_ld_product(html):
+    for match in LD_JSON_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        for node in _walk(data):
+            if "product" in _types(node):
+                return node
+    return None
+
+
+# 🧊 JSON que empieza tras `marker` (p. ej. 'id="serverApp-state"' o
+# "window.__INITIAL_STATE__"); lo que sigue al objeto no se lee
+def embedded_json(html, marker, angular_escapes=False):
+    start = html.find(marker)
+    if start < 0:
+        return None
+    start = html.find("{", start + len(marker))
+    if start < 0:
+        return None
+    text = html[start:]
+    if angular_escapes:
+        end = text.find("</script")
+        text = text[:end] if end >= 0 else text
+        for escaped, char in ANGULAR_ESCAPES.items():
+            text = text.replace(escaped, char)
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except ValueError:
+        return None
+
+
+# 🔑 Primer valor de `key` en cualquier nivel de un estado embebido
+def find_key(data, key):
+    for node in _walk(data):
+        if key in node:
+            return node[key]
+    return None
+
+
+def to_price(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip().lstrip("$").strip()
+        if THOUSANDS_RE.match(value):
+            value = value.replace(".", "")
+        value = value.replace(",", "")
+    try:
+        price = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+def to_stock(availability):
+    if not availability:
+        return None
+    return AVAILABILITY.get(str(availability).rsplit("/", 1)[-1].lower())
+
+
+def _image(value):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get("url") or value.get("contentUrl")
+    return value or None
+
+
+# 🧾 schema.org/Product → campos de extract_data (sin bioequivalent, que
+# ninguna farmacia publica en JSON-LD)
+def json_ld_fields(product):
+    offers = product.get("offers") or {}
+    offer = offers[0] if isinstance(offers, list) and offers else offers
+    if not isinstance(offer, dict):
+        offer = {}
+    offer_price = to_price(offer.get("price", offer.get("lowPrice")))
+    normal_price = None
+    specs = offer.get("priceSpecification") or []
+    for spec in specs if isinstance(specs, list) else [specs]:
+        if not isinstance(spec, dict):
+            continue
+        price_type = str(spec.get("priceType", "")).rsplit("/", 1)[-1].lower()
+        if price_type in STRIKE_PRICE_TYPES:
+            normal_price = to_price(spec.get("price"))
+        elif offer_price is None:
+            offer_price = to_price(spec.get("price"))
+    name = product.get("name")
+    return {
+        "name": html_lib.unescape(name).strip() if isinstance(name, str) else None,
+        "image": _image(product.get("image")),
+        "normal_price": normal_price,
+        "offer_price": offer_price,
+        "stock": to_stock(offer.get("availability")),
+    }
+
+
+# 📝 Texto visible aproximado (sin scripts, estilos ni etiquetas), en minúsculas
+def visible_text(html):
+    return html_lib.unescape(TAG_RE.sub(" ", NON_TEXT_RE.sub(" ", html))).lower()
+
+
+# 🧱 HTML del primer <div> con la clase `class_name` (como div.<clase> en los
+# selectores), hasta su </div>; None si la página no lo trae
+def div_block(html, class_name):
+    match = re.search(r'<div\b[^>]*\bclass="[^"]*(?<![\w-])' + re.escape(class_name) + r'(?![\w-])', html)
+    if match is None:
+        return None
+    depth = 0
+    for tag in DIV_TAG_RE.finditer(html, match.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[match.start():html.find(">", tag.end()) + 1]
+    return html[match.start():]
+
+
+# 🔏 Huella de --fetch-cache cuando el registro salió de datos estructurados
+def structured_fingerprint(fields):
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return "ld:" + hashlib.sha1(payload.encode("utf-8")).hexdigest()
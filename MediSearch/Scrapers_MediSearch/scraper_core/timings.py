@@ -0,0 +1,50 @@
+# 📁 Archivo: scraper_core/timings.py
+#
+# Tiempos por fase (http, goto, ready, content, parse...) de una corrida,
+# para ver en qué se va el tiempo de cada producto.
+
+import threading
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PhaseTimings:
+    """Acumula duraciones (segundos) por nombre de fase."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}
+
+    def record(self, phase, seconds):
+        with self._lock:
+            self._phases.setdefault(phase, []).append(seconds)
+
+    def values(self, phase):
+        with self._lock:
+            return list(self._phases.get(phase, []))
+
+    def summary(self):
+        with self._lock:
+            phases = {k: list(v) for k, v in self._phases.items()}
+        return {
+            phase: {
+                "count": len(values),
+                "total_s": round(sum(values), 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+            }
+            for phase, values in phases.items()
+        }
+
+    def print_summary(self, title="⏱️ Tiempos por fase"):
+        print(title)
+        for phase, s in self.summary().items():
+            print(f"   {phase:<14} n={s['count']:<6} total={s['total_s']}s "
+                  f"media={s['mean_ms']}ms p50={s['p50_ms']}ms p95={s['p95_ms']}ms")
@@ -0,0 +1,207 @@
+# 📁 Archivo: scraper_core/work_queue.py
+#
+# Cola de trabajo para repartir el scraping entre varias máquinas.
+# El coordinador parte las URLs únicas de cada farmacia en shards y los
+# encola en un broker; los workers toman un shard con un lease (préstamo con
+# vencimiento), lo scrapean con el motor async y reportan los registros.
+# Si un worker muere, su lease vence y otro worker retoma el shard.
+#
+# El broker es intercambiable: cualquier clase con la interfaz de `Broker`.
+# SqliteBroker sirve para una sola máquina (varios procesos) y para pruebas;
+# HttpBroker (broker_http.py) expone el mismo broker a workers remotos.
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_SHARD_SIZE = 100
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    pharmacy TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (job, status);
+CREATE TABLE IF NOT EXISTS results (
+    task_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_task ON results (task_id);
+"""
+
+
+# ✂️ Tareas (url, meta, [categorias]) → shards serializables
+def shard_tasks(tasks, shard_size=DEFAULT_SHARD_SIZE):
+    return [
+        [[url, meta, categorias] for url, meta, categorias in tasks[i:i + shard_size]]
+        for i in range(0, len(tasks), shard_size)
+    ]
+
+
+class Broker:
+    """Interfaz del broker. Un lease es un dict {"id", "job", "pharmacy", "shard"}.
+
+    complete/extend devuelven False si el lease ya no pertenece al worker
+    (venció y otro lo tomó), para que el worker descarte su resultado.
+    """
+
+    def enqueue(self, job, pharmacy, shards):
+        raise NotImplementedError
+
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, job=None):
+        raise NotImplementedError
+
+    def extend(self, task_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        raise NotImplementedError
+
+    def complete(self, task_id, worker, records, dead_letters):
+        raise NotImplementedError
+
+    def fail(self, task_id, worker, error):
+        raise NotImplementedError
+
+    def counts(self, job=None):
+        raise NotImplementedError
+
+    def results(self, job, pharmacy, kind="record"):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SqliteBroker(Broker):
+    """Broker sobre un archivo SQLite; el lease es atómico con BEGIN IMMEDIATE."""
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, job, pharmacy, shards):
+        now = time.time()
+        rows = [(job, pharmacy, json.dumps(shard, ensure_ascii=False), now) for shard in shards]
+        self._transaction(lambda c: c.executemany(
+            "INSERT INTO tasks (job, pharmacy, payload, updated_at) VALUES (?, ?, ?, ?)", rows))
+        return len(rows)
+
+    # ⏰ Leases vencidos: vuelven a la cola o, sin intentos restantes, quedan fallidos
+    def _reap(self, conn, now):
+        conn.execute("""UPDATE tasks SET status = 'failed', error = 'lease vencido', updated_at = ?
+                        WHERE status = 'leased' AND lease_until < ? AND attempts >= ?""",
+                     (now, now, self.max_attempts))
+        conn.execute("""UPDATE tasks SET status = 'pending', worker = NULL, updated_at = ?
+                        WHERE status = 'leased' AND lease_until < ?""", (now, now))
+
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, job=None):
+        def take(conn):
+            now = time.time()
+            self._reap(conn, now)
+            query = "SELECT id, job, pharmacy, payload FROM tasks WHERE status = 'pending'"
+            params = ()
+            if job is not None:
+                query += " AND job = ?"
+                params = (job,)
+            row = conn.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            conn.execute("""UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?,
+                                attempts = attempts + 1, updated_at = ? WHERE id = ?""",
+                         (worker, now + lease_seconds, now, row[0]))
+            return {"id": row[0], "job": row[1], "pharmacy": row[2], "shard": json.loads(row[3])}
+        return self._transaction(take)
+
+    def extend(self, task_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        cursor = self._transaction(lambda c: c.execute(
+            """UPDATE tasks SET lease_until = ?, updated_at = ?
+               WHERE id = ? AND worker = ? AND status = 'leased'""",
+            (now + lease_seconds, now, task_id, worker)))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, worker, records, dead_letters):
+        def finish(conn):
+            cursor = conn.execute(
+                """UPDATE tasks SET status = 'done', error = NULL, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (time.time(), task_id, worker))
+            if cursor.rowcount != 1:
+                return False
+            rows = [(task_id, "record", json.dumps(r, ensure_ascii=False)) for r in records]
+            rows += [(task_id, "dead", json.dumps(d, ensure_ascii=False)) for d in dead_letters]
+            conn.executemany("INSERT INTO results (task_id, kind, data) VALUES (?, ?, ?)", rows)
+            return True
+        return self._transaction(finish)
+
+    def fail(self, task_id, worker, error):
+        def release(conn):
+            conn.execute(
+                """UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       worker = NULL, error = ?, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (self.max_attempts, str(error)[:500], time.time(), task_id, worker))
+        self._transaction(release)
+
+    def counts(self, job=None):
+        query = "SELECT status, COUNT(*) FROM tasks"
+        params = ()
+        if job is not None:
+            query += " WHERE job = ?"
+            params = (job,)
+        with self._lock:
+            return dict(self._conn.execute(query + " GROUP BY status", params).fetchall())
+
+    def results(self, job, pharmacy, kind="record"):
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT r.data FROM results r JOIN tasks t ON t.id = r.task_id
+                   WHERE t.job = ? AND t.pharmacy = ? AND r.kind = ? ORDER BY r.rowid""",
+                (job, pharmacy, kind)).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def job_finished(counts):
+    return counts.get("pending", 0) == 0 and counts.get("leased", 0) == 0
+
+
+# 🔌 "sqlite:///ruta.db", una ruta a secas o "http://host:puerto"
+def make_broker(url, token=None):
+    if url.startswith(("http://", "https://")):
+        from scraper_core.broker_http import HttpBroker
+        return HttpBroker(url, token=token)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SqliteBroker(url)
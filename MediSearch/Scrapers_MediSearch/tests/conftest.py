@@ -0,0 +1,9 @@
+# 📁 Archivo: tests/conftest.py
+#
+# Los módulos de Scrapers_MediSearch no son un paquete: igual que los scripts,
+# los tests agregan la carpeta al path para importar scraper_core.
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,69 @@
+# 📁 Archivo: tests/test_async_engine_reuse.py
+#
+# Reutilización del caché de descarga (--fetch-cache) en modo api/listing:
+# si el HTML no cambió pero la API trae otro precio, se escribe el nuevo.
+
+import asyncio
+
+from scraper_core.async_engine import AsyncScrapeEngine
+from scraper_core.fetch_cache import FetchCache
+
+URL = "https://farmacia.test/producto-123.html"
+OLD = ("Producto", "https://farmacia.test/img.jpg", 5000, 4000, 20, "available", False)
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def try_write(self, record):
+        self.records.append(record)
+        return True
+
+
+def make_engine(tmp_path, fetch_mode="listing"):
+    spec = {"key": "test", "pharmacy": "Farmacia Test", "extract_id": lambda url: 123,
+            "output_file": tmp_path / "test_products.jsonl"}
+    engine = AsyncScrapeEngine(spec, fetch_mode=fetch_mode, fetch_cache=True)
+    engine.cache = FetchCache(tmp_path / "test.fetch_cache.sqlite")
+    engine.cache.store(URL, ('"etag-1"', None), "hash-1", OLD)
+    engine.writer = ListWriter()
+    return engine
+
+
+def test_unchanged_hash_keeps_fresh_api_price(tmp_path):
+    engine = make_engine(tmp_path)
+    engine.api_partial[URL] = {"offer_price": 3500, "stock": "available"}
+    asyncio.run(engine.reuse(URL, {}, ["dolor/analgesicos"], engine.cache.get(URL), "unchanged", "hash-1"))
+
+    record, = engine.writer.records
+    assert record["offer_price"] == 3500
+    assert record["normal_price"] == 5000
+    assert record["discount"] == 30
+    assert URL not in engine.api_partial
+    # El caché guarda lo escrito y conserva el ETag anterior
+    cached = engine.cache.get(URL)
+    assert cached.data[3] == 3500
+    assert cached.etag == '"etag-1"'
+
+
+def test_not_modified_keeps_fresh_api_price(tmp_path):
+    engine = make_engine(tmp_path)
+    engine.api_partial[URL] = {"offer_price": 3500}
+    engine.validators[URL] = ('"etag-2"', None)
+    asyncio.run(engine.reuse(URL, {}, ["dolor/analgesicos"], engine.cache.get(URL), "not_modified"))
+
+    assert engine.writer.records[0]["offer_price"] == 3500
+    assert URL not in engine.api_partial
+    cached = engine.cache.get(URL)
+    assert cached.data[3] == 3500
+    assert cached.etag == '"etag-2"'
+    assert cached.content_hash == "hash-1"
+
+
+def test_http_first_reuses_cached_record(tmp_path):
+    engine = make_engine(tmp_path, fetch_mode="http-first")
+    asyncio.run(engine.reuse(URL, {}, ["dolor/analgesicos"], engine.cache.get(URL), "unchanged", "hash-1"))
+
+    assert engine.writer.records[0]["offer_price"] == 4000
+    assert tuple(engine.cache.get(URL).data) == OLD
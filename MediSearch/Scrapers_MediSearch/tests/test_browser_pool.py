@@ -0,0 +1,97 @@
+# 📁 Archivo: tests/test_browser_pool.py
+#
+# AsyncBrowserPool con un Playwright falso: un navegador desconectado deja
+# de recibir préstamos y se reemplaza.
+
+import asyncio
+
+from scraper_core.browser_pool import AsyncBrowserPool
+
+
+class FakeContext:
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        if not self.connected:
+            raise RuntimeError("Target page, context or browser has been closed")
+        self.contexts += 1
+        return FakeContext()
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launched = []
+
+    async def launch(self, headless=True):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+
+async def lease(pool):
+    async with pool.page():
+        pass
+
+
+def test_disconnected_browser_is_replaced():
+    async def scenario():
+        playwright = FakePlaywright()
+        pool = AsyncBrowserPool(playwright, size=2)
+        await pool.start()
+        dead = playwright.chromium.launched[0]
+        dead.connected = False
+
+        for _ in range(6):
+            await lease(pool)
+
+        assert dead.contexts == 0
+        assert len(playwright.chromium.launched) == 3
+        assert [e["browser"] for e in pool._browsers] == playwright.chromium.launched[1:]
+        stats = pool.stats()
+        assert stats["crashes"] == 1
+        assert stats["pages"] == 6
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_draining_browser_that_dies_is_not_replaced_twice():
+    async def scenario():
+        playwright = FakePlaywright()
+        pool = AsyncBrowserPool(playwright, size=1, max_pages=2)
+        async with pool.page():
+            await lease(pool)
+            await lease(pool)
+            # Llegó a max_pages con un préstamo abierto: queda drenando y ya tiene reemplazo
+            await lease(pool)
+            old, replacement = playwright.chromium.launched
+            assert pool._browsers[0]["draining"]
+            old.connected = False
+            await lease(pool)
+        assert len(playwright.chromium.launched) == 2
+        assert [e["browser"] for e in pool._browsers] == [replacement]
+        assert pool.stats()["crashes"] == 1
+        await pool.close()
+
+    asyncio.run(scenario())
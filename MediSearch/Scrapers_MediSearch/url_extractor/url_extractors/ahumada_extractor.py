@@ -1,18 +1,26 @@
+import argparse
+import asyncio
 import json
-import httpx
 import re
+import sys
+from pathlib import Path
 from bs4 import BeautifulSoup
 from urllib.parse import quote
 
-CATEGORIES_FILE = "../structured_categories/ahumada_categories.json"
-OUTPUT_FILE = "../extracted_urls/ahumada_urls.json"
-API_BASE = "https://www.farmaciasahumada.cl/on/demandware.store/Sites-ahumada-cl-Site/default/Search-UpdateGrid"
+# 🔗 Cliente async, limitador de tasa y perfilador compartidos (scraper_core)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from scraper_core.extract_runner import (ExtractClient, add_extract_args, category_routes, describe_error,
+                                         gather_pages, run_categories, save_partial_report)
+from scraper_core.profiling import add_profile_args, make_profiler
+from scraper_core.rate_limiter import get_rate_limiter
 
-with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
-    categories = json.load(f)
+# Productos por página de Search-UpdateGrid; se sigue con start += sz mientras haya "ver más"
+PAGE_SIZE = 300
 
-result = {}
-errors = {}
+CATEGORIES_FILE = "../structured_categories/ahumada_categories.json"
+OUTPUT_FILE = "../extracted_urls/ahumada_urls.json"
+BASE_URL = "https://www.farmaciasahumada.cl"
+API_BASE = f"{BASE_URL}/on/demandware.store/Sites-ahumada-cl-Site/default/Search-UpdateGrid"
 
 # 🔧 Eliminar sufijos -1, -2 si es necesario
 def normalize_subcat(subcat):
@@ -37,51 +45,133 @@ def get_cgid(category, subcat=None):
         raw = f"medicamentos-{category}"
         return quote(raw, safe="")
 
-def collect_urls(category, subcat=None):
-    route = f"{category}/{subcat}" if subcat else category
-
+def tile_price(tile, selector):
+    tag = tile.select_one(selector)
+    try:
+        return int(float(tag["content"])) if tag and tag.has_attr("content") else None
+    except ValueError:
+        return None
+
+# 🧱 Datos de un tile del grid con los mismos nombres que los campos de extract_data
+def parse_tile(tile):
+    link = tile.select_one("div.pdp-link a[href]") or tile.select_one("a[href$='.html']")
+    if not link or not link["href"].startswith("/"):
+        return None, None
+    image = tile.select_one("img.tile-image[src], div.image-container img[src]")
+    normal_price = tile_price(tile, "span.strike-through span.value")
+    offer_price = tile_price(tile, "span.sales span.value")
+    return BASE_URL + link["href"], {
+        "name": link.get_text(strip=True) or None,
+        "image": image["src"] if image else None,
+        "normal_price": normal_price if normal_price and offer_price and normal_price > offer_price else None,
+        "offer_price": offer_price,
+        # El grid solo marca los agotados
+        "stock": "out_of_stock" if tile.select_one("[class*='agotado']") else "available",
+        "bioequivalent": bool(tile.select_one("[class*='bioequivalent']")),
+    }
+
+def grid_url(category, subcat):
     # 🟡 CASO 1: Excepción exacta para 'inductores-del-sueno'
     if category == "sistema-nervioso" and subcat == "inductores-del-sueno":
-        api_url = (
-            "https://www.farmaciasahumada.cl/on/demandware.store/"
-            "Sites-ahumada-cl-Site/default/Search-UpdateGrid"
-            "?cgid=medicamentos-sistema-nervioso-inductores-del-sue%C3%B1o"
-            "&start=0&sz=300"
-        )
+        return f"{API_BASE}?cgid=medicamentos-sistema-nervioso-inductores-del-sue%C3%B1o"
+    return f"{API_BASE}?cgid={get_cgid(category, subcat)}"
+
+# 📄 Una página del grid → {url: fields o None}, ¿hay "ver más"?, total si el grid lo informa
+async def fetch_grid_page(client, url, with_prices):
+    resp = await client.get(url)
+    soup = BeautifulSoup(resp.text, "html.parser")
+    products = {}
+    for a in soup.select("a[href$='.html']"):
+        if a["href"].startswith("/"):
+            products.setdefault(BASE_URL + a["href"], None)
+    if with_prices:
+        for tile in soup.select("div.product[data-pid]"):
+            tile_url, fields = parse_tile(tile)
+            if tile_url:
+                products[tile_url] = fields
+    grid = soup.select_one("[data-total]")
+    total = int(grid["data-total"]) if grid and grid["data-total"].isdigit() else None
+    return products, soup.select_one("div.show-more [data-url]") is not None, total
+
+async def collect_urls(client, args, route, category, subcat):
+    base = grid_url(category, subcat)
+    page_url = lambda start: f"{base}&start={start}&sz={args.page_size}"
+    products, more, total = await fetch_grid_page(client, page_url(0), args.with_prices)
+    lost = 0
+
+    if more and total is not None:
+        # Con el total a la vista, el resto de las páginas va en paralelo
+        pages, lost = await gather_pages(route, (fetch_grid_page(client, page_url(start), args.with_prices)
+                                                 for start in range(args.page_size, total, args.page_size)))
+        for page, _, _ in pages:
+            products.update(page)
     else:
-        cgid = get_cgid(category, subcat)
-        api_url = f"{API_BASE}?cgid={cgid}&start=0&sz=300"
-
-    print(f"🔍 Visitando: {route}")
-    print(f"🌐 URL generada: {api_url}")
+        start = 0
+        while more:
+            start += args.page_size
+            before = len(products)
+            try:
+                page, more, _ = await fetch_grid_page(client, page_url(start), args.with_prices)
+            except Exception as e:
+                # Sin esta página no se sabe si hay más: se corta con lo que haya
+                print(f"⚠️ {route}: página perdida en start={start} ({describe_error(e)})")
+                lost += 1
+                break
+            products.update(page)
+            if len(products) == before:  # Sin productos nuevos la categoría terminó
+                break
+
+    if not products:
+        raise ValueError("0 productos encontrados")
+    print(f"✅ {route}: {len(products)} productos encontrados")
+    if args.with_prices:
+        return [{"url": url, "fields": products[url]} if products[url] else {"url": url}
+                for url in sorted(products)], lost
+    return sorted(products), lost
+
+async def collect_all(args, routes):
+    async with ExtractClient(args.concurrency, args.per_host) as client:
+        result, errors, partial = await run_categories(
+            routes, lambda *route: collect_urls(client, args, *route))
+        client.print_stats()
+    return result, errors, partial
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extractor de URLs de Farmacias Ahumada")
+    parser.add_argument("--with-prices", action="store_true",
+                        help="Guardar también nombre, precios, imagen y stock de cada tile (fast scraper --fetch-mode listing)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Valor de sz por página")
+    add_extract_args(parser)
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    profiler = make_profiler(args, "ahumada_urls")
 
     try:
-        resp = httpx.get(api_url, timeout=30)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        links = [a["href"] for a in soup.select("a[href$='.html']") if a["href"].startswith("/")]
-        product_links = {f"https://www.farmaciasahumada.cl{href}" for href in links}
-
-        if product_links:
-            result[route] = sorted(product_links)
-            print(f"✅ {route}: {len(product_links)} productos encontrados")
-        else:
-            errors[route] = "0 productos encontrados"
-            print(f"⚠️ {route}: 0 productos encontrados")
-    except Exception as e:
-        errors[route] = str(e)
-        print(f"❌ Error en {route}: {e}")
-
-# ▶️ Recolectar URLs
-for category, subcats in categories.items():
-    if subcats:
-        for subcat in subcats:
-            collect_urls(category, subcat)
-    else:
-        collect_urls(category)
-
-# 💾 Guardar resultados
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(result, f, indent=2, ensure_ascii=False)
-
-print("\n🏁 Proceso completado.")
+        with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
+            categories = json.load(f)
+        routes = category_routes(categories)
+
+        # ▶️ Recolectar URLs
+        print(f"🔍 Recolectando {len(routes)} categorías")
+        with profiler.stage("collect"):
+            result, errors, partial = asyncio.run(collect_all(args, routes))
+
+        # 💾 Guardar resultados
+        with profiler.stage("save"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        save_partial_report(OUTPUT_FILE, partial)
+
+        if errors:
+            print(f"⚠️ {len(errors)} categorías con errores: {', '.join(errors)}")
+        if partial:
+            print(f"⚠️ {len(partial)} categorías parciales: {', '.join(partial)}")
+        get_rate_limiter().print_stats()
+    finally:
+        profiler.stop()
+    print("\n🏁 Proceso completado.")
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,132 @@
+import argparse
+import asyncio
 import json
-import httpx
+import sys
+from pathlib import Path
+
 from playwright.sync_api import sync_playwright
 
+# 🔗 Cliente async, limitador de tasa y perfilador compartidos (scraper_core)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from scraper_core.extract_runner import (ExtractClient, add_extract_args, category_routes, describe_error,
+                                         gather_pages, run_categories, save_partial_report)
+from scraper_core.product_api import SharedSession
+from scraper_core.profiling import add_profile_args, make_profiler
+from scraper_core.rate_limiter import get_rate_limiter
+
 BASE_API = "https://api.cruzverde.cl/product-service/products/search"
 BASE_URL = "https://www.cruzverde.cl/medicamentos"
+SESSION_URL = "https://www.cruzverde.cl/medicamentos/"
 CATEGORIES_FILE = "../structured_categories/cruzverde_categories.json"
 OUTPUT_FILE = "../extracted_urls/cruzverde_urls.json"
+PAGE_SIZE = 80
+API_HEADERS = {
+    "Accept": "application/json",
+    "Origin": "https://www.cruzverde.cl",
+    "Referer": "https://www.cruzverde.cl/",
+}
 
 # Obtener cookie de sesión con Playwright
-def get_cruzverde_cookie():
+def get_cruzverde_cookie(url=SESSION_URL):
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context()
         page = context.new_page()
-        page.goto("https://www.cruzverde.cl/medicamentos/", wait_until="networkidle")
+        page.goto(url, wait_until="networkidle")
         cookies = context.cookies()
         cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
         browser.close()
         return cookie_str
 
 
+def get_cgid(category, subcat=None):
+    return f"{subcat}-{category}-medicamentos" if subcat else f"{category}-medicamentos"
+
+
+# Una página de la búsqueda; la cookie vencida se renueva una vez para todos
+async def search_page(client, session, cgid, offset):
+    params = {"limit": PAGE_SIZE, "offset": offset, "refine[]": f"cgid={cgid}"}
+    resp = await session.call(lambda cookie: client.get(
+        BASE_API, params=params, headers=dict(API_HEADERS, Cookie=cookie), check=False))
+    resp.raise_for_status()
+    return resp.json()
+
+
+def hit_urls(data, cgid):
+    clean_path = cgid.replace("-medicamentos", "").replace("-", "/")
+    return [f"{BASE_URL}/{clean_path}/{hit['productId']}.html"
+            for hit in data.get("hits", []) if hit.get("productId")]
+
+
 # Obtener URLs de los productos de una subcategoría
-def get_all_product_urls(cgid, cookie):
-    headers = {
-        "Accept": "application/json",
-        "Cookie": cookie,
-        "Origin": "https://www.cruzverde.cl",
-        "Referer": "https://www.cruzverde.cl/",
-    }
-    params = {
-        "limit": 80,
-        "offset": 0,
-        "refine[]": f"cgid={cgid}",
-    }
-
-    urls = []
-    while True:
-        try:
-            resp = httpx.get(BASE_API, params=params, headers=headers, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-
-            for hit in data.get("hits", []):
-                product_id = hit.get("productId")
-                if product_id:
-                    clean_path = cgid.replace("-medicamentos", "").replace("-", "/")
-                    urls.append(f"{BASE_URL}/{clean_path}/{product_id}.html")
-
-            if len(data.get("hits", [])) < 80:
+async def get_all_product_urls(client, session, route, category, subcat):
+    cgid = get_cgid(category, subcat)
+    pages = [await search_page(client, session, cgid, 0)]
+    total = pages[0].get("total")
+    lost = 0
+    if total is not None:
+        # Con el total a la vista, el resto de las páginas va en paralelo
+        rest, lost = await gather_pages(route, (search_page(client, session, cgid, offset)
+                                                for offset in range(PAGE_SIZE, total, PAGE_SIZE)))
+        pages += rest
+    else:
+        while len(pages[-1].get("hits", [])) >= PAGE_SIZE:
+            offset = PAGE_SIZE * len(pages)
+            try:
+                pages.append(await search_page(client, session, cgid, offset))
+            except Exception as e:
+                # Sin esta página no se sabe si hay más: se corta con lo que haya
+                print(f"⚠️ {route}: página perdida en offset={offset} ({describe_error(e)})")
+                lost += 1
                 break
 
-            params["offset"] += 80
-            print(f"⏩ Más productos en {cgid}, offset: {params['offset']}")
+    urls = [url for page in pages for url in hit_urls(page, cgid)]
+    if urls:
+        print(f"✅ {route}: {len(urls)} productos encontrados")
+    return urls, lost
 
-        except Exception as e:
-            print(f"❌ Failed to fetch {cgid}: {e}")
-            break
 
-    return urls
+async def collect_all(args, routes):
+    async with ExtractClient(args.concurrency, args.per_host) as client:
+        # Cookie por HTTP; si el sitio la arma con JS, con Playwright en otro hilo
+        session = SharedSession(SESSION_URL, lambda url: client.get(url, check=False),
+                                lambda url: asyncio.to_thread(get_cruzverde_cookie, url))
+        result, errors, partial = await run_categories(
+            routes, lambda *route: get_all_product_urls(client, session, *route))
+        client.print_stats()
+        print(f"🍪 {session.refreshes} sesiones")
+    return result, errors, partial
 
 
 # Función principal
 def main():
-    with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
-        categories = json.load(f)
-
-    all_urls = {}
-    cookie = get_cruzverde_cookie()
-
-    for category, subcats in categories.items():
-        if subcats:
-            for subcat in subcats:
-                print(f"🔍 Recolectando: {category}/{subcat}")
-                cgid = f"{subcat}-{category}-medicamentos"
-                urls = get_all_product_urls(cgid, cookie)
-                if urls:
-                    all_urls[f"{category}/{subcat}"] = urls
-                    print(f"✅ {category}/{subcat}: {len(urls)} productos encontrados")
-        else:
-            print(f"🔍 Recolectando: {category} (sin subcategorías)")
-            cgid = f"{category}-medicamentos"
-            urls = get_all_product_urls(cgid, cookie)
-            if urls:
-                all_urls[category] = urls
-                print(f"✅ {category}: {len(urls)} productos encontrados")
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_urls, f, indent=2, ensure_ascii=False)
+    parser = argparse.ArgumentParser(description="Extractor de URLs de Cruz Verde")
+    add_extract_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = make_profiler(args, "cruzverde_urls")
+
+    try:
+        with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
+            categories = json.load(f)
+        routes = category_routes(categories)
+
+        print(f"🔍 Recolectando {len(routes)} categorías")
+        with profiler.stage("collect"):
+            result, errors, partial = asyncio.run(collect_all(args, routes))
+        all_urls = {route: urls for route, urls in result.items() if urls}
+
+        with profiler.stage("save"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+            json.dump(all_urls, f, indent=2, ensure_ascii=False)
+        save_partial_report(OUTPUT_FILE, partial)
+
+        if errors:
+            print(f"⚠️ {len(errors)} categorías con errores: {', '.join(errors)}")
+        if partial:
+            print(f"⚠️ {len(partial)} categorías parciales: {', '.join(partial)}")
+        get_rate_limiter().print_stats()
+    finally:
+        profiler.stop()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,19 @@
-import requests
+import argparse
+import asyncio
 import json
-import time
+import sys
+from pathlib import Path
+
+# 🔗 Cliente async, limitador de tasa y perfilador compartidos (scraper_core)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from scraper_core.extract_runner import ExtractClient, add_extract_args, category_routes, save_partial_report
+from scraper_core.profiling import add_profile_args, make_profiler
+from scraper_core.rate_limiter import get_rate_limiter
+from scraper_core.structured_data import to_price
+
+# Algolia acepta varias consultas por POST: una página de muchas categorías a la vez
+QUERIES_PER_REQUEST = 50
+HITS_PER_PAGE = 100
 
 CATEGORIES_FILE = "../structured_categories/salcobrand_categories.json"
 OUTPUT_FILE = "../extracted_urls/salcobrand_urls.json"
@@ -30,83 +43,195 @@ def build_facet_filter(main, sub=None):
     else:
         return f"Medicamentos > {main_facet}"
 
-def fetch_urls(main_cat, sub_cat):
-    product_data = []
-    page = 0
-    while True:
-        if main_cat == "test-de-autodiagnostico" and sub_cat is None:
-            facet_filter = "Medicamentos > Test de autodiagnostico"
-            facet_level = "lvl1"
-        else:
-            facet_filter = build_facet_filter(main_cat, sub_cat)
-            facet_level = "lvl2"
-
-        payload = {
-            "requests": [
-                {
-                    "indexName": INDEX_NAME,
-                    "params": f"clickAnalytics=true&facetFilters=[[\"product_categories.{facet_level}:{facet_filter}\"]]"
-                              f"&facets=[]&filters=(timestamp_available_on < 1743975542)"
-                              f"&hitsPerPage=100&page={page}"
-                }
-            ]
-        }
-
-        response = requests.post(ALGOLIA_URL, headers=HEADERS, json=payload)
+def category_facet(main_cat, sub_cat):
+    if main_cat == "test-de-autodiagnostico" and sub_cat is None:
+        return "lvl1", "Medicamentos > Test de autodiagnostico"
+    return "lvl2", build_facet_filter(main_cat, sub_cat)
+
+def build_query(facet_level, facet_filter, page):
+    return {
+        "indexName": INDEX_NAME,
+        "params": f"clickAnalytics=true&facetFilters=[[\"product_categories.{facet_level}:{facet_filter}\"]]"
+                  f"&facets=[]&filters=(timestamp_available_on < 1743975542)"
+                  f"&hitsPerPage={HITS_PER_PAGE}&page={page}"
+    }
+
+# 🏷️ Atributos del hit para --with-prices.
+# ⚠️ SIN VERIFICAR: no hay una respuesta real de sb_variant_production grabada
+# en el repo; estos nombres son candidatos (se prueba cada alternativa en
+# orden). Lo único confirmado, porque lo usaba el extractor original, es
+# url/slug/productUrl, objectID y sku. Graba una respuesta real y ajusta
+# estas tuplas antes de confiar en --fetch-mode listing para Salcobrand.
+NAME_ATTRS = ("name",)
+IMAGE_ATTRS = ("image_url", "image")
+NORMAL_PRICE_ATTRS = ("normal_price", "price")
+OFFER_PRICE_ATTRS = ("offer_price", "sale_price")
+STOCK_ATTRS = ("in_stock", "available")
+BIOEQUIVALENT_ATTRS = ("bioequivalent",)
+IN_STOCK_VALUES = {"true", "1", "available", "in_stock", "instock"}
+OUT_OF_STOCK_VALUES = {"false", "0", "unavailable", "out_of_stock", "outofstock"}
+
+def hit_value(hit, attrs):
+    for attr in attrs:
+        if hit.get(attr) not in (None, ""):
+            return hit[attr]
+    return None
+
+def hit_stock(value):
+    if isinstance(value, bool):
+        return "available" if value else "out_of_stock"
+    if isinstance(value, (int, float)):
+        return "available" if value > 0 else "out_of_stock"
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in IN_STOCK_VALUES:
+            return "available"
+        if value in OUT_OF_STOCK_VALUES:
+            return "out_of_stock"
+    return None
+
+# Campos con los mismos nombres que extract_data; None si algún precio viene
+# con un formato que no se entiende (la entrada queda solo con la URL y el
+# fast scraper baja la página)
+def hit_fields(hit):
+    raw_normal = hit_value(hit, NORMAL_PRICE_ATTRS)
+    raw_offer = hit_value(hit, OFFER_PRICE_ATTRS)
+    normal_price, offer_price = to_price(raw_normal), to_price(raw_offer)
+    if (raw_normal is not None and normal_price is None) or (raw_offer is not None and offer_price is None):
+        return None
+    offer_price = offer_price or normal_price
+    name = hit_value(hit, NAME_ATTRS)
+    image = hit_value(hit, IMAGE_ATTRS)
+    bioequivalent = hit_value(hit, BIOEQUIVALENT_ATTRS)
+    return {
+        "name": name.strip() if isinstance(name, str) else None,
+        "image": image if isinstance(image, str) else None,
+        # Como en la página: precio normal solo si hay uno de oferta menor
+        "normal_price": normal_price if normal_price and offer_price and normal_price > offer_price else None,
+        "offer_price": offer_price,
+        "stock": hit_stock(hit_value(hit, STOCK_ATTRS)),
+        # Sin el atributo queda None (desconocido), no False
+        "bioequivalent": None if bioequivalent is None else bool(bioequivalent),
+    }
+
+def hit_entry(hit, with_prices):
+    if not isinstance(hit, dict):
+        return None
+    slug = hit.get("url") or hit.get("slug") or hit.get("productUrl")
+    objectID = hit.get("objectID")
+    sku = hit.get("sku") or objectID
+    if not (isinstance(slug, str) and sku):
+        return None
+    entry = {
+        "url": PRODUCT_URL_PREFIX + slug.lstrip("/"),
+        "objectID": str(objectID),
+        "sku": str(sku)
+    }
+    if with_prices:
+        fields = hit_fields(hit)
+        if fields is not None:
+            entry["fields"] = fields
+    return entry
+
+# 📦 Un POST con varias consultas (categoría, página); None si el lote falla
+async def fetch_batch(client, batch, algolia_url=ALGOLIA_URL):
+    payload = {"requests": [build_query(level, facet, page) for _, level, facet, page in batch]}
+    try:
+        response = await client.post(algolia_url, headers=HEADERS, json=payload, check=False)
         if response.status_code != 200:
             raise Exception(f"Error {response.status_code}")
-
-        data = response.json()
-        hits = data["results"][0].get("hits", [])
-        if not hits:
-            break
-
-        for hit in hits:
-            slug = hit.get("url") or hit.get("slug") or hit.get("productUrl")
-            objectID = hit.get("objectID")
-            sku = hit.get("sku") or objectID
-            if slug and sku:
-                full_url = PRODUCT_URL_PREFIX + slug.lstrip("/")
-                product_data.append({
-                    "url": full_url,
-                    "objectID": str(objectID),
-                    "sku": str(sku)
-                })
-
-        page += 1
-        time.sleep(0.5)
-
-    return product_data
-
-# Recolectar todas las categorías
-with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
-    categories = json.load(f)
-
-result = {}
-
-for main_cat, subcats in categories.items():
-    if subcats:
-        for sub_cat in subcats:
-            print(f"🔍 Recolectando: {main_cat}/{sub_cat}")
-            try:
-                urls = fetch_urls(main_cat, sub_cat)
-                result[f"{main_cat}/{sub_cat}"] = urls
-                print(f"✅ {main_cat}/{sub_cat}: {len(urls)} productos encontrados")
-            except Exception as e:
-                print(f"⚠️ Error en {main_cat}/{sub_cat}: {e}")
-                result[f"{main_cat}/{sub_cat}"] = []
-    else:
-        print(f"🔍 Recolectando: {main_cat} (sin subcategorías)")
-        try:
-            urls = fetch_urls(main_cat, None)
-            result[main_cat] = urls
-            print(f"✅ {main_cat}: {len(urls)} productos encontrados")
-        except Exception as e:
-            print(f"⚠️ Error en {main_cat}: {e}")
-            result[main_cat] = []
-
-# Guardar resultado
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(result, f, indent=2, ensure_ascii=False)
-
-print("✅ Recolección completa.")
+        return response.json()["results"]
+    except Exception as e:
+        print(f"⚠️ Error en {len(batch)} consultas ({', '.join(key for key, *_ in batch)}): {e}")
+        return None
+
+# 🚀 Por rondas: primero la página 0 de todas las categorías; su nbPages dice
+# cuántas quedan y la segunda ronda pide todas esas páginas a la vez. Los
+# lotes de cada ronda salen en paralelo sobre el cliente compartido. Sin la
+# página 0 la categoría falla; si se pierde otra, queda parcial con lo demás.
+async def fetch_all(client, categories, with_prices, per_request, algolia_url=ALGOLIA_URL):
+    pages = {key: {} for key, _, _ in categories}
+    failed = set()
+    lost = {key: 0 for key, _, _ in categories}
+    pending = [(key, *category_facet(main_cat, sub_cat), 0) for key, main_cat, sub_cat in categories]
+    while pending:
+        batches = [pending[i:i + per_request] for i in range(0, len(pending), per_request)]
+        pending = []
+        for batch, results in zip(batches, await asyncio.gather(*(fetch_batch(client, b, algolia_url) for b in batches))):
+            if results is None:
+                for key, _, _, page in batch:
+                    if page == 0:
+                        failed.add(key)
+                    else:
+                        lost[key] += 1
+                continue
+            for (key, level, facet, page), data in zip(batch, results):
+                hits = data.get("hits") if isinstance(data, dict) else None
+                if not isinstance(hits, list):
+                    print(f"⚠️ {key}: página {page} con formato inesperado, se omite")
+                    if page == 0:
+                        failed.add(key)
+                    else:
+                        lost[key] += 1
+                    continue
+                pages[key][page] = [entry for entry in (hit_entry(hit, with_prices) for hit in hits) if entry]
+                if not hits:
+                    continue
+                if not isinstance(data.get("nbPages"), int):
+                    pending.append((key, level, facet, page + 1))
+                elif page == 0:
+                    pending += [(key, level, facet, p) for p in range(1, data["nbPages"])]
+
+    result, partial = {}, {}
+    for key, _, _ in categories:
+        result[key] = [] if key in failed else [e for page in sorted(pages[key]) for e in pages[key][page]]
+        if key in failed:
+            continue
+        print(f"✅ {key}: {len(result[key])} productos encontrados")
+        if lost[key]:
+            partial[key] = lost[key]
+            print(f"⚠️ {key}: parcial, {lost[key]} páginas perdidas")
+    return result, partial
+
+async def collect_all(args, routes):
+    async with ExtractClient(args.concurrency, args.per_host) as client:
+        result, partial = await fetch_all(client, routes, args.with_prices, args.queries_per_request)
+        client.print_stats()
+    return result, partial
+
+# Función principal
+def main():
+    parser = argparse.ArgumentParser(description="Extractor de URLs de Salcobrand")
+    parser.add_argument("--with-prices", action="store_true",
+                        help="Guardar también nombre, precios, imagen y stock de cada hit (fast scraper --fetch-mode listing)")
+    parser.add_argument("--queries-per-request", type=int, default=QUERIES_PER_REQUEST,
+                        help="Consultas de categoría por POST a /queries")
+    add_extract_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = make_profiler(args, "salcobrand_urls")
+
+    try:
+        with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
+            categories = json.load(f)
+        routes = category_routes(categories)
+
+        print(f"🔍 Recolectando {len(routes)} categorías en lotes de {args.queries_per_request} consultas")
+        with profiler.stage("collect"):
+            result, partial = asyncio.run(collect_all(args, routes))
+
+        # Guardar resultado
+        with profiler.stage("save"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        save_partial_report(OUTPUT_FILE, partial)
+        if partial:
+            print(f"⚠️ {len(partial)} categorías parciales: {', '.join(partial)}")
+
+        get_rate_limiter().print_stats()
+    finally:
+        profiler.stop()
+    print("✅ Recolección completa.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,125 @@
 # Archivo: run_all_scrapers.py
+#
+# Orquesta la cadena completa por farmacia como un DAG:
+#   zonas → URLs → productos (fast_scrapers_new) → validación → carpeta para insertMedicines
+# más las sucursales, que no alimentan a nadie. Las farmacias corren en
+# paralelo dentro del presupuesto de CPU/memoria y cada etapa se salta si sus
+# entradas no cambiaron desde la última corrida (ver scraper_core/orchestrator.py).
 
-import subprocess
-import time
+import argparse
+import os
 import sys
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SCRAPERS_DIR = BASE_DIR / "Scrapers_MediSearch"
+sys.path.append(str(SCRAPERS_DIR))
+from scraper_core.orchestrator import Orchestrator, Stage
+from scraper_core.product_export import export_load_ready, report_path, validate_products
+from scraper_core.registry import load_scraper
+
+STOCK_DIR = BASE_DIR / "src" / "stock"
+EXTRACTOR_DIR = SCRAPERS_DIR / "url_extractor" / "url_extractors"
+LOCATIONS_DIR = SCRAPERS_DIR / "localization_scrapers" / "location_scrapers"
+UPDATES_DIR = SCRAPERS_DIR / "product_updates"
+PRODUCTS_DIR = BASE_DIR / "product_updates"  # JSONL de fast_scrapers_new
+CACHE_FILE = BASE_DIR / "logs" / "pipeline_state.json"
+PYTHON = sys.executable
+
+PHARMACIES = ["ahumada", "cruzverde", "salcobrand"]
+
+HOUR = 3600
+# Las etapas que dependen de la red se refrescan igual pasado este tiempo
+ZONES_MAX_AGE = 7 * 24 * HOUR
+URLS_MAX_AGE = 20 * HOUR
+PRODUCTS_MAX_AGE = 20 * HOUR
+
+# 🧭 Reserva por etapa. El scraper de productos reserva sus navegadores
+# (SPEC["browsers"], reciclados al pasar SPEC["max_rss_mb"] cada uno) más el
+# proceso, los parsers y el escritor
+SCRAPE_OVERHEAD_MB = 500
+NETWORK_STAGE_MEMORY_MB = 150
+
+
+def scrape_memory_mb(spec):
+    return spec["browsers"] * spec["max_rss_mb"] + SCRAPE_OVERHEAD_MB
+
+
+def pharmacy_stages(key, scrape_cpu):
+    products = PRODUCTS_DIR / f"{key}_products.jsonl"
+    urls = SCRAPERS_DIR / "url_extractor" / "extracted_urls" / f"{key}_urls.json"
+    zones = STOCK_DIR / "zones" / f"{key}_stock_locations.json"
+    scraper = SCRAPERS_DIR / "fast_scrapers_new" / f"{key}_fast_scraper.py"
+    collector = STOCK_DIR / "zones_scrapper" / f"{key}_zones_collector.py"
+    extractor = EXTRACTOR_DIR / f"{key}_extractor.py"
+    locator = LOCATIONS_DIR / f"location_scraper_{key}.py"
+    spec = load_scraper(key).SPEC
+
+    def validate():
+        validate_products(products)
+        return [report_path(products)]
+
+    def load_ready():
+        return export_load_ready(products, UPDATES_DIR / key)
+
+    return [
+        Stage(f"{key}:zonas", inputs=[collector], outputs=[zones],
+              cmd=[PYTHON, collector.name], cwd=collector.parent,
+              memory_mb=NETWORK_STAGE_MEMORY_MB, max_age=ZONES_MAX_AGE),
+        Stage(f"{key}:sucursales", inputs=[locator],
+              outputs=[SCRAPERS_DIR / "localization_scrapers" / "scraped_location_jsons"
+                       / f"scraped_location_{key}.json"],
+              cmd=[PYTHON, locator.name], cwd=locator.parent,
+              memory_mb=NETWORK_STAGE_MEMORY_MB, max_age=ZONES_MAX_AGE),
+        Stage(f"{key}:urls", deps=[f"{key}:zonas"],
+              inputs=[extractor,
+                      SCRAPERS_DIR / "url_extractor" / "structured_categories" / f"{key}_categories.json"],
+              outputs=[urls], cmd=[PYTHON, extractor.name], cwd=extractor.parent,
+              memory_mb=NETWORK_STAGE_MEMORY_MB, max_age=URLS_MAX_AGE),
+        Stage(f"{key}:productos", deps=[f"{key}:urls"],
+              inputs=[scraper, urls, SCRAPERS_DIR / "scraper_core"], outputs=[products],
+              cmd=[PYTHON, str(scraper), "--parse-workers", str(max(1, scrape_cpu - 1)),
+                   "--browsers", str(spec["browsers"])],
+              cpu=scrape_cpu, memory_mb=scrape_memory_mb(spec), max_age=PRODUCTS_MAX_AGE),
+        Stage(f"{key}:validacion", deps=[f"{key}:productos"],
+              inputs=[products], outputs=[report_path(products)],
+              func=validate),
+        Stage(f"{key}:carga", deps=[f"{key}:validacion"],
+              inputs=[products, report_path(products)],
+              func=load_ready),
+    ]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cadena completa de scraping de farmacias")
+    parser.add_argument("--pharmacies", nargs="+", choices=PHARMACIES, default=PHARMACIES)
+    parser.add_argument("--cpus", type=int, default=None, help="Presupuesto de CPU (por defecto todas)")
+    parser.add_argument("--memory-mb", type=int, default=None,
+                        help="Presupuesto de memoria (por defecto 70%% de la RAM)")
+    parser.add_argument("--force", nargs="*", default=[],
+                        help="Etapas a ejecutar aunque no hayan cambiado (ej. salcobrand:urls, o 'all')")
+    return parser.parse_args()
 
-scrapers = [
-    { "name": "Farmacia Ahumada", "path": "../Scrapers_MediSearch/old_fast_scrapers/ahumada_fast_scraper.py" },
-    { "name": "Cruz Verde", "path": "../Scrapers_MediSearch/old_fast_scrapers/cruzverde_fast_scraper.py" },
-    { "name": "Salcobrand", "path": "../Scrapers_MediSearch/old_fast_scrapers/salcobrand_fast_scraper.py" }
-]
-
-def print_progress_bar(index, total, prefix='', length=40):
-    percent = int(100 * (index / float(total)))
-    bar = '█' * int(length * index // total) + '-' * (length - int(length * index // total))
-    sys.stdout.write(f'\r{prefix} |{bar}| {percent}%')
-    sys.stdout.flush()
-
-def run_scraper(scraper, i, total):
-    print(f"\n🟢 Iniciando scraper: {scraper['name']}")
-    start = time.time()
-
-    success = False
-    for attempt in range(2):
-        try:
-            subprocess.run(["python", scraper["path"]], check=True)
-            success = True
-            break
-        except subprocess.CalledProcessError:
-            print(f"⚠️ Intento {attempt + 1} fallido para {scraper['name']}")
-
-    end = time.time()
-
-    if success:
-        print_progress_bar(i + 1, total, prefix='✅ Completado')
-        print(f"\n⏱️ Tiempo: {round(end - start, 2)} segundos\n")
-    else:
-        print(f"❌ No se pudo ejecutar correctamente {scraper['name']}")
 
 def main():
-    total = len(scrapers)
-    print("🚀 Ejecutando scrapers de farmacias...\n")
-    for i, scraper in enumerate(scrapers):
-        run_scraper(scraper, i, total)
+    args = parse_args()
+    cpus = args.cpus or os.cpu_count() or 2
+    # Los scrapers se reparten la CPU para no sobresuscribir los procesos de parseo
+    scrape_cpu = max(2, cpus // len(args.pharmacies))
+    stages = [stage for key in args.pharmacies for stage in pharmacy_stages(key, scrape_cpu)]
+
+    print("🚀 Ejecutando cadena de scraping de farmacias...\n")
+    orchestrator = Orchestrator(stages, CACHE_FILE, cpu_budget=cpus,
+                                memory_budget_mb=args.memory_mb, force=args.force)
+    orchestrator.run()
+    orchestrator.print_summary()
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    orchestrator.write_report(BASE_DIR / "logs" / f"pipeline_{timestamp}.json")
+
+    if not orchestrator.succeeded:
+        print("\n❌ Algunas etapas fallaron; revisa el log de cada una.")
+        sys.exit(1)
 
     print("\n🎉 Scrapeo completo.")
     print("📁 Archivos JSON listos.\n")
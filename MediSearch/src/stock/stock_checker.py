@@ -3,6 +3,8 @@
 from stock.stock_obtainers.salcobrand_stock_obtainer import obtener_stock as stock_salcobrand
 from stock.stock_obtainers.cruzverde_stock_obtainer import obtener_stock as stock_cruzverde
 from stock.stock_obtainers.ahumada_stock_obtainer import obtener_stock as stock_ahumada
+# Los obtainers ya agregan Scrapers_MediSearch al sys.path
+from scraper_core.profiling import add_profile_args, make_profiler
 
 def seleccionar_farmacia(url: str):
     if "salcobrand.cl" in url:
@@ -24,10 +26,15 @@ def obtener_stock_general(url: str, comuna: str) -> str:
 
 # 🧪 Modo consola para pruebas manuales
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) == 3:
-        url = sys.argv[1]
-        comuna = sys.argv[2]
-        print(obtener_stock_general(url, comuna))
-    else:
-        print("❌ Uso incorrecto. Debes pasar: python stock_checker.py <url> <comuna>")
+    import argparse
+    parser = argparse.ArgumentParser(description="Stock de un producto en una comuna")
+    parser.add_argument("url")
+    parser.add_argument("comuna")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = make_profiler(args, "stock_checker")
+    try:
+        with profiler.stage("stock"):
+            print(obtener_stock_general(args.url, args.comuna))
+    finally:
+        profiler.stop()
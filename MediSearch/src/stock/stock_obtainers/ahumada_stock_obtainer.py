@@ -1,7 +1,15 @@
 import json
+import sys
+import time
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+# 🔗 Limitador de tasa compartido con los scrapers (Scrapers_MediSearch/scraper_core)
+sys.path.append(str(Path(__file__).resolve().parents[3] / "Scrapers_MediSearch"))
+from scraper_core.rate_limiter import get_rate_limiter
+
+limiter = get_rate_limiter()
+
 # Ruta al archivo de zonas
 ZONES_PATH = Path(__file__).parent.parent / "zones" / "ahumada_stock_locations.json"
 
@@ -42,7 +50,10 @@ def obtener_stock(product_url: str, comuna: str) -> str:
             page.wait_for_timeout(1500)
 
             # Visitar la página del producto
-            page.goto(product_url, wait_until="domcontentloaded")
+            limiter.acquire(product_url)
+            start = time.monotonic()
+            response = page.goto(product_url, wait_until="domcontentloaded")
+            limiter.feedback(product_url, response.status if response else None, time.monotonic() - start)
             page.wait_for_timeout(2000)
 
             # Verificar presencia del mensaje de sin stock
@@ -1,8 +1,17 @@
 import requests
 import json
 import re
+import sys
+import time
+from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+# 🔗 Limitador de tasa compartido con los scrapers (Scrapers_MediSearch/scraper_core)
+sys.path.append(str(Path(__file__).resolve().parents[3] / "Scrapers_MediSearch"))
+from scraper_core.rate_limiter import get_rate_limiter
+
+limiter = get_rate_limiter()
+
 # 🔐 Obtener cookie de sesión válida desde el navegador
 def get_cruzverde_cookie():
     with sync_playwright() as p:
@@ -36,7 +45,10 @@ def obtener_stock(url_producto: str, comuna: str) -> str:
             "Cookie": cookie
         }
 
+        limiter.acquire(api_url)
+        start = time.monotonic()
         response = requests.get(api_url, headers=headers, timeout=10)
+        limiter.feedback_response(api_url, response, time.monotonic() - start)
         response.raise_for_status()
         data = response.json()
 
@@ -1,7 +1,15 @@
 import json
+import sys
+import time
 import requests
 from pathlib import Path
 
+# 🔗 Limitador de tasa compartido con los scrapers (Scrapers_MediSearch/scraper_core)
+sys.path.append(str(Path(__file__).resolve().parents[3] / "Scrapers_MediSearch"))
+from scraper_core.rate_limiter import get_rate_limiter
+
+limiter = get_rate_limiter()
+
 # 📁 Rutas absolutas
 BASE_PATH = Path(__file__).resolve().parent.parent.parent
 ZONES_FILE = BASE_PATH / "zones" / "salcobrand_stock_locations.json"
@@ -39,7 +47,10 @@ def obtener_stock(url: str, comuna: str) -> str:
     api_url = f"https://salcobrand.cl/api/v2/products/store_stock?state_id={state_id}&sku={sku}"
 
     try:
+        limiter.acquire(api_url)
+        start = time.monotonic()
         response = requests.get(api_url, timeout=10)
+        limiter.feedback_response(api_url, response, time.monotonic() - start)
         response.raise_for_status()
         data = response.json()
 